@@ -1,21 +1,30 @@
+import time
+STARTUP = time.perf_counter()
+
 import sys
 import os
 import importlib
 import datetime
-import platform
-import requests
-import re
+import json
+import multiprocessing
 import subprocess
-import pandas as pd
-from geopy.distance import geodesic
-from PyQt6.QtCore import QUrl, QSettings, QUrl, QAbstractTableModel, Qt, QModelIndex
+import tempfile
+from PyQt6.QtCore import QUrl, QSettings, QUrl, Qt, QTimer, QFileSystemWatcher
 from PyQt6.QtGui import QIcon, QDesktopServices, QPixmap, QDesktopServices
-from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QPushButton, QLabel, QStackedWidget, QHBoxLayout, QGroupBox, QSizePolicy, QLineEdit, QFileDialog, QMessageBox, QListWidget, QCheckBox, QListWidgetItem, QSpacerItem, QComboBox, QFormLayout, QTabWidget, QTableView, QStyledItemDelegate
+from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QPushButton, QLabel, QStackedWidget, QHBoxLayout, QGroupBox, QSizePolicy, QLineEdit, QFileDialog, QMessageBox, QListWidget, QCheckBox, QListWidgetItem, QSpacerItem, QComboBox, QFormLayout, QTabWidget, QTableView, QStyledItemDelegate, QProgressBar, QListView, QSpinBox
+
+# Only light modules here, pandas and friends are imported on first use to keep the start fast
+from wettkampftools import __version__
+from wettkampftools.diagnostics import DiagnosticsLog, Run, runs_table
+from wettkampftools.gui.jobs import JobManager
+from wettkampftools.gazetteer import GazetteerCache
+from wettkampftools.settings import Settings, DEFAULT_AGE_GROUPS, DEFAULT_AGE_GROUPS_SENIOR_TEAM, DEFAULT_AGE_GROUPS_SENIOR_INDIVIDUAL, DEFAULT_START_AGE_GROUP_WWK, DEFAULT_VENUES
 
 basedir = os.path.dirname(__file__)
 
-# Coordinates for Bad Nauheim
-bad_nauheim_coords = (50.367073, 8.740880)
+# How long downloaded data is used before it is fetched again (seconds)
+GLD_DATA_TTL = 7 * 24 * 60 * 60
+UPDATE_CHECK_TTL = 24 * 60 * 60
 
 try:
     from ctypes import windll  # Only exists on Windows.
@@ -30,21 +39,40 @@ if '_PYIBoot_SPLASH' in os.environ and importlib.util.find_spec("pyi_splash"):
     pyi_splash.close()
 
 
-if importlib.util.find_spec("win32com"):
-    from win32com.client import *
-    def get_version_number(file_path):
-        information_parser = Dispatch("Scripting.FileSystemObject")
-        print(information_parser)
-        version = information_parser.GetFileVersion(file_path)
-        return version
-    VERSION = f'v{get_version_number(sys.argv[0])}'
-else:
-    VERSION = 'DEV VERSION'
+VERSION = f'v{__version__}' if __version__ else 'DEV VERSION'
+
+
+class StartupProfile:
+    """Time the phases of the start, enabled with --profile-startup."""
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.last = STARTUP
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        if not self.enabled:
+            return
+        lines = [f'{phase:<20} {seconds * 1000:8.1f} ms' for phase, seconds in self.phases]
+        lines.append(f'{"Gesamt":<20} {(self.last - STARTUP) * 1000:8.1f} ms')
+        if sys.stderr:
+            print('\n'.join(lines), file=sys.stderr)
+        else:
+            # Windowed build has no console
+            with open(os.path.join(tempfile.gettempdir(), 'wettkampftools_startup.txt'), 'w', encoding='utf-8') as file:
+                file.write('\n'.join(lines) + '\n')
 
 
 class MainApplication(QMainWindow):
-    def __init__(self):
+    PREPARATION_PAGE, EVALUATION_PAGE, CERTIFICATES_PAGE, DISTANCE_PAGE, SETTINGS_PAGE, ARCHIVE_PAGE = range(6)
+
+    def __init__(self, profile=None):
         super().__init__()
+        profile = profile or StartupProfile()
 
         self.setWindowTitle(f'Wettkampftools {VERSION}')
         self.setGeometry(100, 100, 1000, 600)
@@ -60,19 +88,36 @@ class MainApplication(QMainWindow):
         central_layout.addWidget(self.stacked_widget)
         central_widget.setLayout(central_layout)
 
-        # Inhalte für die Hauptanwendungen hinzufügen
-        self.setup_wwk_preperation()
-        self.setup_wwk_evaluation()
-        self.setup_tools_urkunden()
-        self.setup_tools_distance()
-        self.setup_settings_page()
+        profile.mark('Navigation')
 
-        self.fetch_gliederungen_data()
+        # Hintergrundaufgaben, damit das Fenster während Import und Export bedienbar bleibt
+        self.jobs = JobManager(self)
+        self.setup_status_bar()
+        profile.mark('Statusleiste')
+
+        self.built_pages = set()
         self.load_settings()
+        profile.mark('Einstellungen')
 
-        self.check_for_update()
+        # Gliederungen are read from disk when they are needed for the first time
+        self.gazetteer = GazetteerCache()
+        # Stage timings of imports, evaluations and exports
+        self.diagnostics = DiagnosticsLog()
 
         self.preperation_competition_df=None
+        # Live results for displays in the local network, see wettkampftools.live_server
+        self.live_server = None
+
+        # Pages are built when they are shown for the first time
+        self.page_builders = [self.setup_wwk_preperation, self.setup_wwk_evaluation, self.setup_tools_urkunden,
+                              self.setup_tools_distance, self.setup_settings_page, self.setup_archive_page]
+        for _ in self.page_builders:
+            self.stacked_widget.addWidget(QWidget())
+        self.change_page(self.PREPARATION_PAGE)
+        profile.mark('Erste Seite')
+
+        # Network requests only start once the window is shown
+        QTimer.singleShot(0, self.start_background_updates)
 
     def setup_navigation(self):
         # Links angeordnete Navigationsliste
@@ -98,10 +143,11 @@ class MainApplication(QMainWindow):
 
         # Gruppe "Tools" mit Button "Urkunden sortieren"
         tools_group = QGroupBox("Tools")
-        tools_group.setFixedHeight(120)
+        tools_group.setFixedHeight(160)
         tools_layout = QVBoxLayout()
         tools_layout.addWidget(QPushButton("Urkunden sortieren", clicked=lambda: self.change_page(2)))
         tools_layout.addWidget(QPushButton("Entfernungen berechnen", clicked=lambda: self.change_page(3)))
+        tools_layout.addWidget(QPushButton("Saisonarchiv", clicked=lambda: self.change_page(5)))
         tools_group.setLayout(tools_layout)
         top_groups.addWidget(tools_group)
 
@@ -119,6 +165,39 @@ class MainApplication(QMainWindow):
         navigation_widget.setLayout(navigation_layout)
         return navigation_widget
 
+    def setup_status_bar(self):
+        self.job_label = QLabel()
+        self.job_progress = QProgressBar()
+        self.job_progress.setMaximumWidth(200)
+        self.job_cancel_button = QPushButton('Abbrechen', clicked=lambda: self.jobs.cancel())
+        for widget in (self.job_label, self.job_progress, self.job_cancel_button):
+            self.statusBar().addPermanentWidget(widget)
+            widget.hide()
+
+        # Status of the Gliederungen data used for the distances
+        self.gld_data_status = QLabel()
+        self.statusBar().addWidget(self.gld_data_status)
+
+        self.jobs.busy_changed.connect(self.set_busy)
+        self.jobs.progress.connect(self.show_job_progress)
+
+    def set_busy(self, busy):
+        # Block the pages while a job runs so it can not be queued twice
+        self.stacked_widget.setEnabled(not busy)
+        for widget in (self.job_label, self.job_progress, self.job_cancel_button):
+            widget.setVisible(busy)
+        if busy:
+            self.show_job_progress('Bitte warten...', -1)
+
+    def show_job_progress(self, text, percent):
+        self.job_label.setText(text)
+        if percent < 0:
+            # Unknown progress, show busy indicator
+            self.job_progress.setRange(0, 0)
+        else:
+            self.job_progress.setRange(0, 100)
+            self.job_progress.setValue(percent)
+
     def msg_box(self, title, text, icon: QMessageBox.Icon = QMessageBox.Icon.Information, buttonText=None, buttonClick=None):
         msg_box = QMessageBox(self)
         msg_box.setWindowTitle(title)
@@ -131,8 +210,21 @@ class MainApplication(QMainWindow):
             custom_button.clicked.connect(buttonClick)
         msg_box.exec()
 
+    def build_page(self, index):
+        if index in self.built_pages:
+            return
+        self.built_pages.add(index)
+        placeholder = self.stacked_widget.widget(index)
+        self.stacked_widget.insertWidget(index, self.page_builders[index]())
+        self.stacked_widget.removeWidget(placeholder)
+        placeholder.deleteLater()
+
     def change_page(self, index):
+        self.build_page(index)
         self.stacked_widget.setCurrentIndex(index)
+        if index == self.DISTANCE_PAGE:
+            # Load the Gliederungen while the user selects the ISC export
+            self.jobs.start('gld_load', lambda job: self.gazetteer.index, background=True)
 
     def create_listwidget(self):
         listwidget = QListWidget()
@@ -141,119 +233,162 @@ class MainApplication(QMainWindow):
         return listwidget
 
     def select_isc_export_file(self):
-        self.isc_export_file_path, _ = QFileDialog.getOpenFileName(self, 'ISC Export auswählen', '', 'ISC Export (*.csv)')
-        if self.isc_export_file_path:
-            self.isc_export_file_entry.setText(self.isc_export_file_path)
+        files, _ = QFileDialog.getOpenFileNames(self, 'ISC Exporte auswählen', '', 'ISC Export (*.csv)')
+        if files:
+            self.isc_export_file_paths = files
+            self.isc_export_file_entry.setText('; '.join(files))
             self.generate_competition_preperation()
 
-    def generate_competition_preperation(self):
-        file = self.isc_export_file_path
-
-        if not os.path.exists(file):
-            self.msg_box(title='Fehler!', text=f'{file}˙\nexistiert nicht!', icon=QMessageBox.Icon.Critical)
+    def generate_competition_preperation(self, keep_selection=False):
+        files = self.isc_export_file_paths
+        if not files:
+            self.msg_box(title='Fehler!', text='Bitte zuerst einen ISC Export auswählen!', icon=QMessageBox.Icon.Critical)
             return
 
-        # Check for Excel file
-        if not file.endswith(('.csv')):
-            self.msg_box(title='Fehler!', text=f'{file}˙\ist keine CSV Datei!', icon=QMessageBox.Icon.Critical)
-            return
+        for file in files:
+            if not os.path.exists(file):
+                self.msg_box(title='Fehler!', text=f'{file}˙\nexistiert nicht!', icon=QMessageBox.Icon.Critical)
+                return
 
-        try:
+            # Check for Excel file
+            if not file.endswith(('.csv')):
+                self.msg_box(title='Fehler!', text=f'{file}˙\ist keine CSV Datei!', icon=QMessageBox.Icon.Critical)
+                return
 
-            # Prepair Data and add Team Numbers if multiple Teams in one AK exist.
-            df = pd.read_csv(file, sep=';', encoding='utf-8')
-            # Remove Unnamed columns
-            df = df.loc[:, ~df.columns.str.contains('^Unnamed')]
-            # Remove unessesary whitespaces
-            df['gliederung'] = df['gliederung'].str.strip()
-            df['ak'] = df['ak'].str.replace(r'\bAK\b', 'AK', case=False, regex=True)
-
-            # Count teams from same organization, age group and gender
-            df['ctn'] = df.groupby(['gliederung', 'ak', 'geschlecht'])['gliederung'].transform('count')
-            df['cc'] = df.groupby(['gliederung', 'ak', 'geschlecht'])['gliederung'].cumcount(ascending=False)
-            # Concat team name
-            df['name'] = df.apply(lambda x: x["gliederung"] if x["ctn"] < 2 else f'{x["gliederung"]} {x["ctn"] - x["cc"]}', axis=1)
-            # Remove temporary columns
-            df.drop(columns=['ctn', 'cc'], inplace=True)
-
-            df.replace('AK offen', 'AK Offen', inplace=True)
-
-            if self.simplify_senior_groups:
-                df.replace(self.age_groups_senior_team, 'AK Senioren', inplace=True)
-
-            # Preselect AK that are allowed to start in wave
-            df['start_as_akw'] = df['ak'].str.upper().isin(
-                ak.upper() for ak in self.age_groups_start_permit_wwk[self.age_groups_start_permit_wwk.index(self.start_age_group_wwk):])
-
-            self.preperation_competition_df = df
-
-            self.gliederungen_list.clear()
-            self.gliederungen_list.addItems(df['gliederung'].unique())
-            self.gliederungen_list.show()
-            self.teams_list.show()
-            self.reset_selected_teams.show()
-            self.export_preperation_file.show()
-
-        except Exception as e:
-            msg_box = QMessageBox()
-            msg_box.setWindowTitle('Fehler')
-            msg_box.setText(
-                f'Ist die Datei\n{file}˙\nein Export aus dem ISC?\nVerwende bitte eine andere Datei!\n{e}')
-            msg_box.addButton(QMessageBox.StandardButton.Ok)
-            msg_box.setStandardButtons(QMessageBox.StandardButton.Ok)
-            msg_box.setIcon(QMessageBox.Icon.Critical)
-            msg_box.exec()
+        file = '\n'.join(files)
+        on_error = lambda e: self.msg_box(title='Fehler', text=f'Ist die Datei\n{file}˙\nein Export aus dem ISC?\nVerwende bitte eine andere Datei!\n{e}', icon=QMessageBox.Icon.Critical)
+        if keep_selection and self.preperation_competition_df is not None:
+            self.jobs.start('preparation', self.reload_competition_preperation_job, self.preperation_competition_df, files, self.competition_settings, self.diagnostics,
+                            on_result=self.show_reloaded_competition_preperation, on_error=on_error)
+        else:
+            self.jobs.start('preparation', self.load_competition_preperation_job, files, self.competition_settings, self.diagnostics,
+                            on_result=self.competition_preperation_loaded, on_error=on_error)
+
+    @staticmethod
+    def load_competition_preperation_job(job, files, settings, log):
+        from wettkampftools import preparation
+        job.progress('ISC Export einlesen...' if len(files) == 1 else f'{len(files)} ISC Exporte einlesen...')
+        with Run('Vorbereitung', '; '.join(files), log, job.check_cancelled) as run:
+            return preparation.load_competition_preperation(files, settings, run)
+
+    @staticmethod
+    def reload_competition_preperation_job(job, previous, files, settings, log):
+        from wettkampftools import preparation
+        job.progress('ISC Export neu einlesen...')
+        with Run('Vorbereitung aktualisieren', '; '.join(files), log, job.check_cancelled) as run:
+            return preparation.reload_competition_preperation(previous, files, settings, run)
+
+    def competition_preperation_loaded(self, df):
+        from wettkampftools import preparation
+        self.show_competition_preperation(df)
+        self.warn_unknown_age_groups(preparation.unknown_age_groups(df, self.competition_settings))
+
+    def show_reloaded_competition_preperation(self, result):
+        from wettkampftools import preparation
+        df, added, removed = result
+        self.show_competition_preperation(df)
+        self.msg_box(title='Meldungen aktualisiert', text=f'{added} neue Teams, {removed} Teams nicht mehr gemeldet.\nDie Auswahl der übrigen Teams wurde übernommen.')
+        self.warn_unknown_age_groups(preparation.unknown_age_groups(df, self.competition_settings))
+
+    def warn_unknown_age_groups(self, unknown):
+        if unknown:
+            self.msg_box(title='Unbekannte Altersklassen', icon=QMessageBox.Icon.Warning,
+                         text=f'Diese Altersklassen stehen nicht in den Einstellungen und werden hinten einsortiert:\n{", ".join(unknown)}')
+
+    def restore_competition_preperation(self):
+        # The last state is loaded in the background, pandas is not imported yet
+        self.jobs.start('preparation_restore', self.load_snapshot_job, background=True, on_result=self.show_snapshot)
+
+    @staticmethod
+    def load_snapshot_job(job):
+        from wettkampftools import preparation
+        return preparation.load_snapshot()
+
+    def show_snapshot(self, snapshot):
+        # Nothing to restore or an export was selected in the meantime
+        if snapshot is None or self.preperation_competition_df is not None:
             return
+        self.isc_export_file_paths = snapshot['paths']
+        self.isc_export_file_entry.setText('; '.join(snapshot['paths']))
+        from wettkampftools import preparation
+        if preparation.settings_changed(snapshot['settings'], self.competition_settings) and all(os.path.exists(path) for path in snapshot['paths']):
+            # The age groups may have changed, prepare again but keep the selection
+            self.preperation_competition_df = snapshot['df']
+            self.generate_competition_preperation(keep_selection=True)
+        else:
+            self.show_competition_preperation(snapshot['df'], save=False)
 
-    def show_gliederung_teams(self):
-        df = self.preperation_competition_df
-
-        selected_gliederung = self.gliederungen_list.currentItem().text()
-        filtered_df = df[df['gliederung'] == selected_gliederung]
+    def save_preparation_snapshot(self):
+        if self.preperation_competition_df is None:
+            return
+        from wettkampftools import preparation
+        self.snapshot_timer.stop()
+        try:
+            preparation.save_snapshot(self.preperation_competition_df, self.isc_export_file_paths, self.competition_settings)
+        except OSError:
+            # Without the snapshot the export just has to be imported again
+            pass
 
-        self.teams_list.clear()
-        for index, team in filtered_df[['name', 'ak', 'geschlecht', 'start_as_akw']].to_dict('index').items():
-            item = QListWidgetItem(self.teams_list)
-            name = f"{team['name']} {team['ak']} {team['geschlecht']}"
-            checkbox = QCheckBox(name)
-            item.setSizeHint(checkbox.sizeHint())
-            self.teams_list.setItemWidget(item, checkbox)
-            checkbox.setChecked(team['start_as_akw'])
-            checkbox.stateChanged.connect(lambda state, index=index, checkbox=checkbox: self.update_preperation_competition_state(
-                index, checkbox.isChecked()))
+    def closeEvent(self, event):
+        if self.PREPARATION_PAGE in self.built_pages and self.snapshot_timer.isActive():
+            self.save_preparation_snapshot()
+        if self.live_server is not None:
+            self.live_server.stop()
+        super().closeEvent(event)
+
+    def show_competition_preperation(self, df, save=True):
+        from wettkampftools.gui.models import TeamSelectionModel
+        self.preperation_competition_df = df
+        # The model writes the selection straight into the start_as_akw column
+        self.teams_model = TeamSelectionModel(df, self)
+        self.teams_model.selection_changed.connect(self.snapshot_timer.start)
+        self.teams_list.setModel(self.teams_model)
+
+        self.gliederungen_list.clear()
+        self.gliederungen_list.addItems(self.teams_model.clubs)
+        self.age_group_selection_combobox.clear()
+        self.age_group_selection_combobox.addItems(df['ak'].astype(str).unique())
+
+        self.gliederungen_list.show()
+        self.teams_list.show()
+        self.team_selection_buttons.show()
+        self.reset_selected_teams.show()
+        self.reload_isc_export_button.show()
+        self.export_preperation_file.show()
+        if save:
+            self.save_preparation_snapshot()
 
-    def update_preperation_competition_state(self, index, state):
-        self.preperation_competition_df.at[index, 'start_as_akw'] = state
+    def show_gliederung_teams(self):
+        item = self.gliederungen_list.currentItem()
+        if item:
+            self.teams_model.set_club(item.text())
 
     def export_competition_preperation(self):
-        file_path, _ = QFileDialog.getSaveFileName(self, 'Export F:xile', f'{str(datetime.datetime.now().date()).replace("-","")}_WWK_Meldungen', 'Excel files (*.xlsx)')
-        df = self.preperation_competition_df
-
-        filtered_df = df[df['start_as_akw']]
-        filtered_df['ak'] = filtered_df['ak'].str.replace(r'\bAK\b', 'AkW', case=False, regex=True)
-
-        result_df = pd.concat([df, filtered_df])
-
-        # Reset the index of the result DataFrame
-        result_df.reset_index(drop=True, inplace=True)
-        result_df.drop(['start_as_akw'], axis=1, inplace=True)
-
-        # Predefine category sort
-        result_df['ak'] = pd.Categorical(result_df['ak'], self.all_age_groups)
-        # Sort values
-        result_df.sort_values(by=['ak', 'geschlecht', 'gliederung'], ascending=[True, False, False], inplace=True)
-
+        file_path = self.save_file_name('Export File', f'{str(datetime.datetime.now().date()).replace("-","")}_WWK_Meldungen')
         if file_path:
-            result_df.to_excel(file_path, sheet_name='Meldungen', index=False)
-            self.msg_box(title='Export erfolgreich!', text='Export erfolgreich!', icon=QMessageBox.Icon.Information, buttonText='Meldungen öffnen',
-                         buttonClick=lambda _, path=file_path: self.open_export_file(path))
+            from wettkampftools import preparation
+            self.jobs.start('export', self.export_job, self.diagnostics, file_path, preparation.export_registrations, self.preperation_competition_df, file_path, self.competition_settings,
+                            on_result=lambda _: self.msg_box(title='Export erfolgreich!', text='Export erfolgreich!', icon=QMessageBox.Icon.Information, buttonText='Meldungen öffnen',
+                                                             buttonClick=lambda _, path=file_path: self.open_export_file(path)),
+                            on_error=lambda e: self.msg_box(title='Fehler', text=f'Export fehlgeschlagen!\n{e}', icon=QMessageBox.Icon.Critical))
+
+    def save_file_name(self, caption, filename):
+        from wettkampftools import export
+        file_path, file_filter = QFileDialog.getSaveFileName(self, caption, filename, export.file_filter())
+        return export.with_extension(file_path, file_filter) if file_path else file_path
+
+    @staticmethod
+    def export_job(job, log, path, export, *args):
+        job.progress('Exportieren...')
+        with Run('Export', path, log, job.check_cancelled) as run:
+            export(*args, run=run)
 
     def open_export_file(self, path):
         url = QUrl.fromLocalFile(path)
         QDesktopServices.openUrl(url)
 
     def setup_wwk_preperation(self):
-        self.isc_export_file_path = None
+        self.isc_export_file_paths = []
 
         # Seite für "Wellenwettkampf" mit Inhalt
         wwk_preperation = QWidget()
@@ -268,7 +403,7 @@ class MainApplication(QMainWindow):
         select_isc_file_layout = QHBoxLayout()
         wwk_preperation_layout.addLayout(select_isc_file_layout)
 
-        folder_label_preperation = QLabel('ISC Export:')
+        folder_label_preperation = QLabel('ISC Exporte:')
         select_isc_file_layout.addWidget(folder_label_preperation)
 
         self.isc_export_file_entry = QLineEdit()
@@ -291,15 +426,36 @@ class MainApplication(QMainWindow):
         self.gliederungen_list.hide()
         select_gliederung_teams_layout.addWidget(self.gliederungen_list)
 
-        # Create a QListWidget to display names with checkboxes
-        self.teams_list = QListWidget()
+        # Teams of the selected Gliederung with checkboxes
+        self.teams_list = QListView()
         self.teams_list.hide()
         select_gliederung_teams_layout.addWidget(self.teams_list)
 
+        self.team_selection_buttons = QWidget()
+        team_selection_layout = QHBoxLayout()
+        team_selection_layout.setContentsMargins(0, 0, 0, 0)
+        team_selection_layout.addWidget(QPushButton('Gliederung auswählen', clicked=lambda: self.teams_model.set_club_checked(True)))
+        team_selection_layout.addWidget(QPushButton('Gliederung abwählen', clicked=lambda: self.teams_model.set_club_checked(False)))
+        team_selection_layout.addStretch()
+        team_selection_layout.addWidget(QLabel('Alle Gliederungen in'))
+        self.age_group_selection_combobox = QComboBox()
+        team_selection_layout.addWidget(self.age_group_selection_combobox)
+        team_selection_layout.addWidget(QPushButton('auswählen', clicked=lambda: self.teams_model.set_age_group_checked(self.age_group_selection_combobox.currentText(), True)))
+        team_selection_layout.addWidget(QPushButton('abwählen', clicked=lambda: self.teams_model.set_age_group_checked(self.age_group_selection_combobox.currentText(), False)))
+        self.team_selection_buttons.setLayout(team_selection_layout)
+        self.team_selection_buttons.hide()
+        select_gliederung_layout.addWidget(self.team_selection_buttons)
+
         spacer = QSpacerItem(0, 0, QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Minimum)
         select_gliederung_teams_buttons.addSpacerItem(spacer)
 
-        self.reset_selected_teams = QPushButton('Auswahl zurücksetzten', clicked=self.generate_competition_preperation)  # type: ignore
+        # Late registrations: read the exports again without losing the selection
+        self.reload_isc_export_button = QPushButton('Neu einlesen', clicked=lambda: self.generate_competition_preperation(keep_selection=True))  # type: ignore
+        self.reload_isc_export_button.setToolTip('ISC Exporte neu einlesen, die Auswahl bereits gemeldeter Teams bleibt erhalten')
+        self.reload_isc_export_button.hide()
+        select_gliederung_teams_buttons.addWidget(self.reload_isc_export_button)
+
+        self.reset_selected_teams = QPushButton('Auswahl zurücksetzten', clicked=lambda: self.generate_competition_preperation())  # type: ignore
         self.reset_selected_teams.hide()
         select_gliederung_teams_buttons.addWidget(self.reset_selected_teams)
 
@@ -309,29 +465,12 @@ class MainApplication(QMainWindow):
 
         wwk_preperation_layout.addStretch()
 
-        wwk_preperation.setLayout(wwk_preperation_layout)
-        self.stacked_widget.addWidget(wwk_preperation)
-
-    def creation_date(self, path_to_file):
-        '''
-        Try to get the date that a file was created, falling back to when it was
-        last modified if that isn't possible.
-        See http://stackoverflow.com/a/39501288/1709587 for explanation.
-        '''
-        if platform.system() == 'Windows':
-            creation_year = datetime.date.fromtimestamp(os.path.getctime(path_to_file)).year
-            last_change_year = datetime.date.fromtimestamp(os.path.getmtime(path_to_file)).year
-            return min(creation_year, last_change_year)
-        else:
-            stat = os.stat(path_to_file)
-            try:
-                date = stat.st_birthtime
-            except AttributeError:
-                # We're probably on Linux. No easy way to get creation dates here,
-                # so we'll settle for when its content was last modified.
-                date = stat.st_mtime
+        # Save the selection shortly after the last change
+        self.snapshot_timer = QTimer(self, singleShot=True, interval=2000, timeout=self.save_preparation_snapshot)
+        QTimer.singleShot(0, self.restore_competition_preperation)
 
-            return datetime.date.fromtimestamp(date).year
+        wwk_preperation.setLayout(wwk_preperation_layout)
+        return wwk_preperation
 
     def evaluation_wwk(self, evaluate=True):
         file = self.jauswertung_file_path
@@ -345,68 +484,60 @@ class MainApplication(QMainWindow):
             self.msg_box(title='Fehler', text=f'{file}˙\ist keine Excel Datei!', icon=QMessageBox.Icon.Critical)
             return
 
-        try:
-            file_year = self.creation_date(file)
-            current_year = datetime.date.today().year
-            if file_year != current_year:
-                self.msg_box(title='ACHTUNG!', text=f'Hast du die richtige Datei ausgewählt?\nDie Datei ist aus dem Jahr {file_year}', icon=QMessageBox.Icon.Critical)
-
-            seriendruck = pd.read_excel(file, sheet_name='Seriendruck')
-
-            # Fix names when something is wrong
-            seriendruck['Altersklasse'].replace(r'\bAK\b', value='AK', regex=True, inplace=True)
-            seriendruck['Altersklasse'].replace(r'\bAkW\b', value='AkW', regex=True, inplace=True)
-            seriendruck.replace('AK offen', 'AK Offen', inplace=True)
-            seriendruck.replace('AkW offen', 'AkW Offen', inplace=True)
-
-            seriendruck['WWK'] = seriendruck['Altersklasse'].str.contains(r'\bAkW\b', case=False, na=False).replace({True: 'x', False: ''}, regex=True)
-
-            # Predefine category sort
-            seriendruck['Altersklasse'] = pd.Categorical(seriendruck['Altersklasse'], categories=self.all_age_groups)
-            # Sort values
-            seriendruck.sort_values(by=['Altersklasse', 'Geschlecht', 'Platz'], ascending=[True, False, False], inplace=True)
-
-            filename = f'{str(datetime.datetime.now().date()).replace("-","")}_Seriendruck'
-
-            if evaluate:
-                filename = f'{str(datetime.datetime.now().date()).replace("-","")}_WWK_Auswertung'
-                df = pd.read_excel(file, sheet_name='Daten')
-
-                if self.drop_not_started_teams:
-                    df = df.dropna(subset=['Platz'])
-
-                df['Punktzahl'] = df.groupby(['Altersklasse', 'Geschlecht'])['Platz'].transform(lambda x: len(x) + 1 - x)
-                df['Punktzahl'] = df.apply(lambda row: row['Punktzahl'] + 1 if row['Platz'] == 1 else row['Punktzahl'], axis=1)
-
-                df_AK = df[df['Altersklasse'].str.contains(r'\bAK\b')]
-                df_AkW = df[df['Altersklasse'].str.contains(r'\bAkW\b')]
-
-                ergebnis = df_AK.groupby('Gliederung')['Punktzahl'].sum().reset_index().sort_values(by='Punktzahl', ascending=False).reset_index(drop=True)
-                ergebnis.index += 1
-
-                ergebnis_welle = df_AkW.groupby('Gliederung')['Punktzahl'].sum().reset_index().sort_values(by='Punktzahl', ascending=False).reset_index(drop=True)
-                ergebnis_welle.index += 1
-
-            output_path, _ = QFileDialog.getSaveFileName(self, 'Speichern', filename, 'Auswertung Export (*.xlsx)')
-            if output_path:
-                with pd.ExcelWriter(output_path, engine='xlsxwriter') as writer:
-                    seriendruck.to_excel(writer, sheet_name='Seriendruck', index=False)
-                    if evaluate:
-                        ergebnis.to_excel(writer, sheet_name='Rettungswettkampf', index=True)
-                        ergebnis_welle.to_excel(writer, sheet_name='Wellenwettkampf', index=True)
-                        df.to_excel(writer, sheet_name='Quelldaten', index=False)
-
-                self.msg_box(title='Export erfolgreich!', text='Export erfolgreich!', icon=QMessageBox.Icon.Information,
-                             buttonText='Auswertung öffnen', buttonClick=lambda _, path=output_path: self.open_export_file(path))
-
-        except Exception as e:
-            self.msg_box(title='Fehler', text=f'Ist die Datei\n{file}˙\nein Export aus JAuswertung?\nVerwende bitte eine andere Datei!\n{e}', icon=QMessageBox.Icon.Critical)
-            return
+        from wettkampftools import evaluation
+        file_year = evaluation.creation_year(file)
+        current_year = datetime.date.today().year
+        if file_year != current_year:
+            self.msg_box(title='ACHTUNG!', text=f'Hast du die richtige Datei ausgewählt?\nDie Datei ist aus dem Jahr {file_year}', icon=QMessageBox.Icon.Critical)
+
+        archive = evaluate and self.archive_checkbox.isChecked()
+        self.jobs.start('evaluation', self.evaluation_job, file, self.competition_settings, evaluate, self.diagnostics, archive, self.live_server,
+                        on_result=lambda result: self.evaluation_finished(result, evaluate, archive),
+                        on_error=lambda e: self.msg_box(title='Fehler', text=f'Ist die Datei\n{file}˙\nein Export aus JAuswertung?\nVerwende bitte eine andere Datei!\n{e}', icon=QMessageBox.Icon.Critical))
+
+    @staticmethod
+    def evaluation_job(job, file, settings, evaluate, log, archive=False, server=None):
+        from wettkampftools import evaluation
+        job.progress('JAuswertung Export auswerten...' if evaluate else 'Urkunden sortieren...')
+        with Run('Auswertung' if evaluate else 'Seriendruck', file, log, job.check_cancelled) as run:
+            # Every stage of the run checks for cancellation first, the stages themselves can not be interrupted
+            result = evaluation.evaluate_file(file, settings, evaluate, run=run)
+            job.check_cancelled()
+            if archive:
+                from wettkampftools.archive import Archive
+                from wettkampftools.scoring import ScoringRules
+                job.progress('Im Saisonarchiv speichern...')
+                with run.stage('archivieren') as stage:
+                    stage.rows = Archive().add(result.quelldaten, evaluation.creation_year(file), os.path.splitext(os.path.basename(file))[0],
+                                               ScoringRules.from_settings(settings), file)
+            if evaluate and server is not None:
+                from wettkampftools.scoring import ScoringRules
+                with run.stage('live') as stage:
+                    server.publish(result.rankings, result.quelldaten, ScoringRules.from_settings(settings), settings.age_group_registry)
+                    stage.rows = len(result.quelldaten)
+            return result
+
+    def evaluation_finished(self, result, evaluate, archive):
+        if archive and self.ARCHIVE_PAGE in self.built_pages:
+            self.update_archive_years()
+        self.warn_unknown_age_groups(result.unknown_age_groups)
+        self.save_evaluation(result, evaluate)
+
+    def save_evaluation(self, result, evaluate):
+        filename = f'{str(datetime.datetime.now().date()).replace("-","")}_{"WWK_Auswertung" if evaluate else "Seriendruck"}'
+
+        output_path = self.save_file_name('Speichern', filename)
+        if output_path:
+            from wettkampftools import evaluation
+            self.jobs.start('export', self.export_job, self.diagnostics, output_path, evaluation.write_evaluation, result, output_path,
+                            on_result=lambda _: self.msg_box(title='Export erfolgreich!', text='Export erfolgreich!', icon=QMessageBox.Icon.Information,
+                                                             buttonText='Auswertung öffnen', buttonClick=lambda _, path=output_path: self.open_export_file(path)),
+                            on_error=lambda e: self.msg_box(title='Fehler', text=f'Export fehlgeschlagen!\n{e}', icon=QMessageBox.Icon.Critical))
 
     def select_jauswertung_export_file(self, evaluate=True):
         self.jauswertung_file_path, _ = QFileDialog.getOpenFileName(self, 'JAuswertung Export auswählen', '', 'JAuswertung Export (*.xls *.xlsx)')
         if self.jauswertung_file_path:
-            self.jauswertung_file_entry.setText(self.jauswertung_file_path)
+            (self.jauswertung_file_entry if evaluate else self.seriendruck_file_entry).setText(self.jauswertung_file_path)
             self.evaluation_wwk(evaluate)
 
     def setup_wwk_evaluation(self):
@@ -431,9 +562,143 @@ class MainApplication(QMainWindow):
         self.folder_button_evaluation = QPushButton('Auswählen', clicked=lambda: self.select_jauswertung_export_file(True))  # type: ignore
         select_jauswertung_file_layout.addWidget(self.folder_button_evaluation)
 
+        self.archive_checkbox = QCheckBox('Im Saisonarchiv speichern')
+        # Opt-in like --archiv, test runs and re-runs should not end up in the archive
+        self.archive_checkbox.setChecked(self.settings.value("archive_evaluations", False, type=bool))
+        self.archive_checkbox.toggled.connect(lambda checked: self.settings.setValue("archive_evaluations", checked))
+        wwk_evaluation_layout.addWidget(self.archive_checkbox)
+
+        # Live standings, updated whenever JAuswertung rewrites its export
+        self.live_button = QPushButton('Live verfolgen', checkable=True, toggled=self.toggle_live_evaluation)
+        select_jauswertung_file_layout.addWidget(self.live_button)
+
+        self.live_evaluation = None
+        self.live_watcher = QFileSystemWatcher(self)
+        self.live_watcher.fileChanged.connect(self.live_file_changed)
+        # Wait until JAuswertung finished writing
+        self.live_timer = QTimer(self, singleShot=True, interval=500, timeout=self.refresh_live_evaluation)
+
+        # Standings for hall displays and phones in the local network
+        live_server_layout = QHBoxLayout()
+        wwk_evaluation_layout.addLayout(live_server_layout)
+        self.live_server_checkbox = QCheckBox('Ergebnisse im lokalen Netzwerk anzeigen', toggled=self.toggle_live_server)
+        live_server_layout.addWidget(self.live_server_checkbox)
+        live_server_layout.addWidget(QLabel('Port:'))
+        self.live_server_port = QSpinBox()
+        self.live_server_port.setRange(1024, 65535)
+        self.live_server_port.setValue(self.settings.value("live_server_port", 8765, type=int))
+        live_server_layout.addWidget(self.live_server_port)
+        self.live_server_link = QLabel()
+        self.live_server_link.setOpenExternalLinks(True)
+        live_server_layout.addWidget(self.live_server_link)
+        live_server_layout.addStretch()
+
+        self.live_status = QLabel()
+        self.live_status.hide()
+        wwk_evaluation_layout.addWidget(self.live_status)
+        self.standings_tabs = QTabWidget()
+        self.standings_tabs.hide()
+        wwk_evaluation_layout.addWidget(self.standings_tabs)
+
         wwk_evaluation_layout.addStretch()
         wwk_evaluation.setLayout(wwk_evaluation_layout)
-        self.stacked_widget.addWidget(wwk_evaluation)
+        return wwk_evaluation
+
+    def toggle_live_server(self, checked):
+        if not checked:
+            if self.live_server is not None:
+                self.live_server.stop()
+                self.live_server = None
+            self.live_server_link.clear()
+            self.live_server_port.setEnabled(True)
+            return
+
+        from wettkampftools.live_server import LiveServer
+        try:
+            self.live_server = LiveServer(port=self.live_server_port.value()).start()
+        except OSError as e:
+            self.live_server_checkbox.setChecked(False)
+            self.msg_box(title='Fehler', text=f'Der Server konnte nicht gestartet werden, ist der Port schon belegt?\n{e}', icon=QMessageBox.Icon.Critical)
+            return
+        self.settings.setValue("live_server_port", self.live_server_port.value())
+        self.live_server_port.setEnabled(False)
+        url = self.live_server.url
+        self.live_server_link.setText(f'<a href="{url}">{url}</a>')
+        # Standings that are already followed are shown right away
+        if self.live_evaluation is not None and self.live_evaluation.data is not None:
+            self.jobs.start('live_publish', self.publish_job, self.live_server, self.live_evaluation,
+                            self.competition_settings.age_group_registry, background=True)
+
+    @staticmethod
+    def publish_job(job, server, live_evaluation, age_groups):
+        server.publish(live_evaluation.rankings, live_evaluation.data, live_evaluation.rules, age_groups)
+
+    def toggle_live_evaluation(self, checked):
+        if not checked:
+            if self.live_watcher.files():
+                self.live_watcher.removePaths(self.live_watcher.files())
+            self.live_timer.stop()
+            self.live_status.setText(f'{self.live_status.text()} (beendet)')
+            return
+
+        path, _ = QFileDialog.getOpenFileName(self, 'JAuswertung Export auswählen', '', 'JAuswertung Export (*.xls *.xlsx)')
+        if not path:
+            self.live_button.setChecked(False)
+            return
+
+        from wettkampftools.live import LiveEvaluation
+        from wettkampftools.scoring import ScoringRules
+        self.live_path = path
+        self.live_evaluation = LiveEvaluation(ScoringRules.from_settings(self.competition_settings))
+        self.live_watcher.addPath(path)
+
+        self.standings_tables = {}
+        self.standings_tabs.clear()
+        for name in self.live_evaluation.rules.rankings:
+            table = QTableView()
+            table.setAlternatingRowColors(True)
+            table.horizontalHeader().setStretchLastSection(True)
+            self.standings_tabs.addTab(table, name)
+            self.standings_tables[name] = table
+        self.live_status.setText('Auswertung wird geladen...')
+        self.live_status.show()
+        self.standings_tabs.show()
+        self.refresh_live_evaluation()
+
+    def live_file_changed(self, path):
+        # JAuswertung replaces the file, keep watching the new one
+        if path not in self.live_watcher.files() and os.path.exists(path):
+            self.live_watcher.addPath(path)
+        self.live_timer.start()
+
+    def refresh_live_evaluation(self):
+        if not self.live_button.isChecked():
+            return
+        if self.jobs.is_running('live'):
+            self.live_timer.start()
+            return
+        self.jobs.start('live', self.live_job, self.live_evaluation, self.live_path, self.live_server,
+                        self.competition_settings.age_group_registry, background=True,
+                        on_result=self.show_standings, on_error=self.live_evaluation_failed)
+
+    @staticmethod
+    def live_job(job, live_evaluation, path, server=None, age_groups=None):
+        changed = live_evaluation.update(live_evaluation.read(path))
+        if server is not None and len(changed):
+            # Rendered here once, the displays only get the cached pages
+            server.publish(live_evaluation.rankings, live_evaluation.data, live_evaluation.rules, age_groups)
+        return changed
+
+    def show_standings(self, changed):
+        from wettkampftools.gui.models import PandasModel
+        for name, table in self.standings_tables.items():
+            table.setModel(PandasModel(dataframe=self.live_evaluation.rankings.get(name)))
+        self.live_status.setText(f'Stand {datetime.datetime.now():%H:%M:%S}, {len(changed)} Wertungsgruppen neu berechnet')
+
+    def live_evaluation_failed(self, e):
+        # The export is probably still being written, try again
+        self.live_status.setText(f'Datei konnte nicht gelesen werden, neuer Versuch... ({e})')
+        self.live_timer.start()
 
     def setup_tools_urkunden(self):
         # Seite für "Tools" mit Inhalt
@@ -449,38 +714,257 @@ class MainApplication(QMainWindow):
 
         select_jauswertung_file_layout.addWidget(QLabel('JAuswertung Export:'))
 
-        self.jauswertung_file_entry = QLineEdit()
-        select_jauswertung_file_layout.addWidget(self.jauswertung_file_entry)
+        self.seriendruck_file_entry = QLineEdit()
+        select_jauswertung_file_layout.addWidget(self.seriendruck_file_entry)
 
-        self.folder_button_evaluation = QPushButton('Auswählen', clicked=lambda: self.select_jauswertung_export_file(False))  # type: ignore
-        select_jauswertung_file_layout.addWidget(self.folder_button_evaluation)
+        self.folder_button_seriendruck = QPushButton('Auswählen', clicked=lambda: self.select_jauswertung_export_file(False))  # type: ignore
+        select_jauswertung_file_layout.addWidget(self.folder_button_seriendruck)
+
+        certificates_group = QGroupBox('Urkunden als PDF')
+        certificates_layout = QVBoxLayout()
+        certificates_group.setLayout(certificates_layout)
+        tools_layout.addWidget(certificates_group)
+
+        template_layout = QHBoxLayout()
+        certificates_layout.addLayout(template_layout)
+        template_layout.addWidget(QLabel('Vorlage (optional):'))
+        self.certificate_template_entry = QLineEdit()
+        self.certificate_template_entry.setPlaceholderText('Standardvorlage')
+        template_layout.addWidget(self.certificate_template_entry)
+        template_layout.addWidget(QPushButton('Auswählen', clicked=self.select_certificate_template))  # type: ignore
+
+        self.certificates_split_checkbox = QCheckBox('Je Altersklasse eine Datei')
+        certificates_layout.addWidget(self.certificates_split_checkbox)
+
+        certificates_layout.addWidget(QPushButton('Urkunden erstellen', clicked=self.create_certificates))  # type: ignore
 
         tools_layout.addStretch()
         tools_page.setLayout(tools_layout)
-        self.stacked_widget.addWidget(tools_page)
+        return tools_page
+
+    def select_certificate_template(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, 'Urkunden Vorlage auswählen', '', 'Urkunden Vorlage (*.json)')
+        if file_path:
+            self.certificate_template_entry.setText(file_path)
+
+    def create_certificates(self):
+        file = self.seriendruck_file_entry.text()
+        if not os.path.exists(file):
+            self.msg_box(title='Fehler', text=f'{file}˙\nexistiert nicht!', icon=QMessageBox.Icon.Critical)
+            return
+
+        output_path, _ = QFileDialog.getSaveFileName(self, 'Speichern', f'{str(datetime.datetime.now().date()).replace("-","")}_Urkunden', 'PDF (*.pdf)')
+        if not output_path:
+            return
+        if not output_path.lower().endswith('.pdf'):
+            output_path += '.pdf'
+
+        split_by = 'Altersklasse' if self.certificates_split_checkbox.isChecked() else None
+        self.jobs.start('certificates', self.certificates_job, file, output_path, self.certificate_template_entry.text(), split_by, self.competition_settings, self.diagnostics,
+                        on_result=lambda paths: self.msg_box(title='Export erfolgreich!', text=f'{len(paths)} PDF Datei(en) erstellt!', icon=QMessageBox.Icon.Information,
+                                                             buttonText='Urkunden öffnen', buttonClick=lambda _, path=paths[0]: self.open_export_file(path)),
+                        on_error=lambda e: self.msg_box(title='Fehler', text=f'Urkunden konnten nicht erstellt werden!\n{e}', icon=QMessageBox.Icon.Critical))
+
+    @staticmethod
+    def certificates_job(job, file, path, template_path, split_by, settings, log):
+        from wettkampftools import certificates, evaluation
+        with Run('Urkunden', file, log, job.check_cancelled) as run:
+            template = certificates.CertificateTemplate.from_file(template_path) if template_path else None
+            job.progress('Urkunden sortieren...', 0)
+            result = evaluation.evaluate_file(file, settings, False, run=run)
+            job.progress('Urkunden erstellen...', 40)
+            return certificates.write_certificates(result.seriendruck, path, template, split_by, run=run)
+
+    def setup_archive_page(self):
+        archive_page = QWidget()
+        archive_layout = QVBoxLayout()
+        label = QLabel("Saisonarchiv")
+        label.setStyleSheet("font-size: 24pt;")  # Set font size to 24pt
+        archive_layout.addWidget(label)
+
+        filter_layout = QHBoxLayout()
+        archive_layout.addLayout(filter_layout)
+        filter_layout.addWidget(QLabel('Jahr:'))
+        self.archive_year_combobox = QComboBox()
+        self.archive_year_combobox.currentTextChanged.connect(self.show_archive)
+        filter_layout.addWidget(self.archive_year_combobox)
+        filter_layout.addWidget(QLabel('Altersklasse:'))
+        self.archive_age_group_combobox = QComboBox()
+        self.archive_age_group_combobox.addItems(['Alle'] + self.competition_settings.all_age_groups)
+        self.archive_age_group_combobox.currentTextChanged.connect(self.show_archive)
+        filter_layout.addWidget(self.archive_age_group_combobox)
+        filter_layout.addStretch()
+        filter_layout.addWidget(QPushButton('JAuswertung Export hinzufügen', clicked=self.add_to_archive))  # type: ignore
+
+        # Season rankings, comparison of the years and the archived events
+        self.archive_tabs = QTabWidget()
+        archive_layout.addWidget(self.archive_tabs)
+
+        archive_page.setLayout(archive_layout)
+        self.update_archive_years()
+        return archive_page
+
+    def update_archive_years(self):
+        from wettkampftools.archive import Archive
+        self.archive = Archive()
+        current = self.archive_year_combobox.currentText()
+        self.archive_year_combobox.blockSignals(True)
+        self.archive_year_combobox.clear()
+        self.archive_year_combobox.addItems([str(year) for year in self.archive.years()])
+        if current:
+            self.archive_year_combobox.setCurrentText(current)
+        self.archive_year_combobox.blockSignals(False)
+        self.show_archive()
+
+    def show_archive(self):
+        from wettkampftools.gui.models import PandasModel
+        year = self.archive_year_combobox.currentText()
+        age_group = self.archive_age_group_combobox.currentText()
+        tables = {}
+        if year:
+            for name, ranking in self.archive.season_ranking(int(year), None if age_group == 'Alle' else age_group).items():
+                tables[f'{name} {year}'] = ranking
+        for wertung in self.archive.wertungen():
+            tables[f'{wertung} Jahresvergleich'] = self.archive.club_comparison(wertung)
+        tables['Wettkämpfe'] = self.archive.events()
+
+        current = self.archive_tabs.tabText(self.archive_tabs.currentIndex())
+        self.archive_tabs.clear()
+        for name, table in tables.items():
+            view = QTableView()
+            view.setAlternatingRowColors(True)
+            view.setModel(PandasModel(dataframe=table))
+            view.resizeColumnsToContents()
+            self.archive_tabs.addTab(view, name)
+            if name == current:
+                self.archive_tabs.setCurrentWidget(view)
+
+    def add_to_archive(self):
+        file, _ = QFileDialog.getOpenFileName(self, 'JAuswertung Export auswählen', '', 'JAuswertung Export (*.xls *.xlsx)')
+        if file:
+            self.jobs.start('archive', self.archive_job, file, self.competition_settings, self.diagnostics,
+                            on_result=lambda _: self.update_archive_years(),
+                            on_error=lambda e: self.msg_box(title='Fehler', text=f'Ist die Datei\n{file}˙\nein Export aus JAuswertung?\nVerwende bitte eine andere Datei!\n{e}', icon=QMessageBox.Icon.Critical))
+
+    @staticmethod
+    def archive_job(job, file, settings, log):
+        from wettkampftools.archive import Archive
+        job.progress('JAuswertung Export archivieren...')
+        with Run('Archiv', file, log, job.check_cancelled) as run:
+            return Archive().ingest(file, settings, run=run)
 
     def select_isc_export_file_distance(self):
-        self.isc_export_file_path, _ = QFileDialog.getOpenFileName(self, 'ISC Export auswählen', '', 'ISC Export (*.csv)')
-        if self.isc_export_file_path:
-            self.isc_export_file_distance_entry.setText(self.isc_export_file_path)
-            self.generate_competition_preperation()
-            df = self.calculate_distances()
+        files, _ = QFileDialog.getOpenFileNames(self, 'ISC Exporte auswählen', '', 'ISC Export (*.csv)')
+        if files:
+            # Several exports are merged like on the preparation page
+            file = '\n'.join(files)
+            self.isc_export_file_distance_entry.setText('; '.join(files))
+            self.jobs.start('distance', self.distance_job, files, self.competition_settings, self.gazetteer, self.gazetteer.is_fresh(GLD_DATA_TTL), self.diagnostics,
+                            on_result=self.show_distances,
+                            on_error=lambda e: self.msg_box(title='Fehler', text=f'Ist die Datei\n{file}˙\nein Export aus dem ISC?\nVerwende bitte eine andere Datei!\n{e}', icon=QMessageBox.Icon.Critical))
+
+    @staticmethod
+    def distance_job(job, files, settings, gazetteer, fresh, log):
+        from wettkampftools import distance, preparation
+        with Run('Entfernungen', '; '.join(files), log, job.check_cancelled) as run:
+            job.progress('ISC Export einlesen...' if len(files) == 1 else f'{len(files)} ISC Exporte einlesen...', 0)
+            df = preparation.load_competition_preperation(files, settings, run)
+
+            offline = False
+            if not fresh:
+                job.progress('Gliederungen aktualisieren...', 30)
+                with run.stage('gliederungen_laden'):
+                    try:
+                        gazetteer.refresh()
+                    except Exception:
+                        # Use the cached Gliederungen
+                        offline = True
+
+            job.progress('Entfernungen berechnen...', 70)
+            with run.stage('entfernungen') as stage:
+                gliederungen = df['gliederung'].unique()
+                # One index for the whole calculation, a refresh in between swaps in a new one
+                index = gazetteer.index
+                distances = distance.calculate_distances(index, gliederungen, settings.venues, settings.aliases)
+                unmatched = {name: index.suggest(name) for name in index.unmatched(gliederungen, settings.aliases)}
+                stage.rows = len(distances)
+        return gliederungen, distances, unmatched, offline
+
+    def show_distances(self, result):
+        # The export stays on this page, the preparation page keeps its own teams and selection
+        self.distance_gliederungen, distances, unmatched, offline = result
+        self.show_gld_data_status(offline)
+
+        self.distances = distances
+        self.show_distance_table()
+
+        self.unmatched_gliederungen = unmatched
+        self.unmatched_list.clear()
+        self.unmatched_list.addItems(unmatched)
+        self.candidates_list.clear()
+        self.unmatched_group.setVisible(bool(unmatched))
+
+    def show_match_candidates(self):
+        self.candidates_list.clear()
+        item = self.unmatched_list.currentItem()
+        if not item:
+            return
+        for key, name, score in self.unmatched_gliederungen.get(item.text(), []):
+            candidate = QListWidgetItem(f'{name} ({score:.0%})')
+            candidate.setData(Qt.ItemDataRole.UserRole, key)
+            self.candidates_list.addItem(candidate)
+
+    def confirm_match(self):
+        item = self.unmatched_list.currentItem()
+        candidate = self.candidates_list.currentItem()
+        if not item or not candidate:
+            return
+
+        # Remember the match so the next runs find the Gliederung right away
+        gld_name = item.text()
+        self.gld_aliases[gld_name] = candidate.data(Qt.ItemDataRole.UserRole)
+        self.settings.setValue("gld_aliases", json.dumps(self.gld_aliases))
 
-            print('GUDE',df)
+        del self.unmatched_gliederungen[gld_name]
+        self.unmatched_list.takeItem(self.unmatched_list.row(item))
+        self.unmatched_group.setVisible(bool(self.unmatched_gliederungen))
 
-            # Update the table view with the DataFrame
-            model = PandasModel(dataframe=df)
-            self.table_view.setModel(model)
-            self.table_view.resizeColumnsToContents()
-            self.table_view.update()  # Refresh the view with the new data
+        # Index and venue distances are cached, recalculating is instant
+        from wettkampftools import distance
+        self.distances = distance.calculate_distances(self.gazetteer.index, self.distance_gliederungen,
+                                                      self.competition_settings.venues, self.gld_aliases)
+        self.show_distance_table()
+
+    def show_distance_table(self):
+        venue = self.venue_combobox.currentText()
+        if self.distances is None or not venue:
+            return
+
+        # Distances to all venues are already calculated, only sort by the selected one
+        from wettkampftools import distance
+        from wettkampftools.gui.models import PandasModel
+        df = self.distances
+        if distance.distance_column(venue) in df.columns:
+            df = distance.sort_distances(df, venue)
+
+        # Update the table view with the DataFrame
+        model = PandasModel(dataframe=df)
+        model.set_filter(self.distance_filter_entry.text())
+        self.table_view.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.table_view.setModel(model)
+        self.table_view.resizeColumnsToContents()
+        self.table_view.update()  # Refresh the view with the new data
 
     def setup_tools_distance(self):
         # Create the Tools page
         self.tools_page = QWidget()
         tools_layout = QVBoxLayout()
 
+        self.distances = None
+        self.distance_gliederungen = None
+
         # Add a label to the layout
-        label = QLabel("Gliederung Entfernung nach Bad Nauheim")
+        label = QLabel("Gliederung Entfernungen")
         label.setStyleSheet("font-size: 24pt;")
         tools_layout.addWidget(label)
 
@@ -489,7 +973,7 @@ class MainApplication(QMainWindow):
         tools_layout.addLayout(select_isc_file_distance_layout)
 
         # Add file selection UI elements
-        folder_label_preperation = QLabel('ISC Export:')
+        folder_label_preperation = QLabel('ISC Exporte:')
         select_isc_file_distance_layout.addWidget(folder_label_preperation)
 
         self.isc_export_file_distance_entry = QLineEdit()
@@ -498,21 +982,51 @@ class MainApplication(QMainWindow):
         self.folder_button_preperation = QPushButton('Auswählen', clicked=self.select_isc_export_file_distance)
         select_isc_file_distance_layout.addWidget(self.folder_button_preperation)
 
+        venue_layout = QHBoxLayout()
+        tools_layout.addLayout(venue_layout)
+        venue_layout.addWidget(QLabel('Sortieren nach Entfernung zu:'))
+        self.venue_combobox = QComboBox()
+        self.venue_combobox.addItems(self.venues)
+        self.venue_combobox.currentTextChanged.connect(self.show_distance_table)
+        venue_layout.addWidget(self.venue_combobox)
+        venue_layout.addStretch()
+        venue_layout.addWidget(QLabel('Suchen:'))
+        self.distance_filter_entry = QLineEdit()
+        self.distance_filter_entry.textChanged.connect(lambda text: self.table_view.model() and self.table_view.model().set_filter(text))
+        venue_layout.addWidget(self.distance_filter_entry)
+
         # Create the QTableView for displaying the DataFrame
         self.table_view = QTableView()
         self.table_view.horizontalHeader().setStretchLastSection(True)
         self.table_view.setAlternatingRowColors(True)
         self.table_view.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        # No sort column until the user clicks a header, rows come sorted by venue
+        self.table_view.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.table_view.setSortingEnabled(True)
         
         # Add the table view to the layout
         tools_layout.addWidget(self.table_view)
 
+        # Gliederungen without exact match in the gazetteer
+        self.unmatched_gliederungen = {}
+        self.unmatched_group = QGroupBox("Nicht gefundene Gliederungen")
+        unmatched_layout = QHBoxLayout()
+        self.unmatched_list = QListWidget()
+        self.unmatched_list.itemSelectionChanged.connect(self.show_match_candidates)
+        unmatched_layout.addWidget(self.unmatched_list)
+        self.candidates_list = QListWidget()
+        unmatched_layout.addWidget(self.candidates_list)
+        unmatched_layout.addWidget(QPushButton('Zuordnen', clicked=self.confirm_match))
+        self.unmatched_group.setLayout(unmatched_layout)
+        self.unmatched_group.hide()
+        tools_layout.addWidget(self.unmatched_group)
+
         # Add stretch to push everything to the top
         tools_layout.addStretch()
 
         # Set the layout and add the tools page to the stacked widget
         self.tools_page.setLayout(tools_layout)
-        self.stacked_widget.addWidget(self.tools_page)       
+        return self.tools_page
 
     def add_age_group(self, input_field: QLineEdit, listwidget: QListWidget, combobox: QComboBox = None):
         input = input_field.text()
@@ -533,59 +1047,99 @@ class MainApplication(QMainWindow):
                 if combobox and item.text() in [combobox.itemText(i) for i in range(combobox.count())]:
                     combobox.removeItem(combobox.findText(item.text()))
 
+    def add_venue_item(self, name, lat, lon):
+        item = QListWidgetItem(f'{name} ({lat}, {lon})')
+        item.setData(Qt.ItemDataRole.UserRole, [name, lat, lon])
+        self.venues_listwidget.addItem(item)
+
+    def add_venue(self):
+        name = self.new_venue_name_edit.text().strip()
+        try:
+            lat = float(self.new_venue_lat_edit.text().replace(',', '.'))
+            lon = float(self.new_venue_lon_edit.text().replace(',', '.'))
+        except ValueError:
+            self.msg_box(title='Fehler', text='Breiten- und Längengrad müssen Zahlen sein!', icon=QMessageBox.Icon.Critical)
+            return
+
+        if name:
+            self.add_venue_item(name, lat, lon)
+            for edit in (self.new_venue_name_edit, self.new_venue_lat_edit, self.new_venue_lon_edit):
+                edit.clear()
+
+    def set_venues(self, venues):
+        self.venues_listwidget.clear()
+        for name, (lat, lon) in venues.items():
+            self.add_venue_item(name, lat, lon)
+
     def load_settings(self):
         self.settings = QSettings("Joe2824", "WettkampfTools")
 
+        self.age_groups = self.settings.value("age_groups", DEFAULT_AGE_GROUPS)
+        self.age_groups_senior_team = self.settings.value("age_groups_senior_team", DEFAULT_AGE_GROUPS_SENIOR_TEAM)
+        self.age_groups_senior_individual = self.settings.value("age_groups_senior_individual", DEFAULT_AGE_GROUPS_SENIOR_INDIVIDUAL)
+        self.start_age_group_wwk = self.settings.value("start_age_group_wwk", DEFAULT_START_AGE_GROUP_WWK)
+        self.simplify_senior_groups = self.settings.value("simplify_senior_groups", True, type=bool)
+        self.drop_not_started_teams = self.settings.value("drop_not_started_teams", True, type=bool)
+        self.venues = json.loads(self.settings.value("venues", json.dumps(DEFAULT_VENUES)))
+        self.gld_aliases = json.loads(self.settings.value("gld_aliases", "{}"))
+
+        self.competition_settings = Settings(
+            age_groups=self.age_groups,
+            age_groups_senior_team=self.age_groups_senior_team,
+            age_groups_senior_individual=self.age_groups_senior_individual,
+            start_age_group_wwk=self.start_age_group_wwk,
+            simplify_senior_groups=self.simplify_senior_groups,
+            drop_not_started_teams=self.drop_not_started_teams,
+            venues=self.venues,
+            aliases=self.gld_aliases,
+        )
+
+        # Gliederungen moved to the GazetteerCache, drop the old copy from the registry
+        for key in ("gld_data", "gld_data_updated"):
+            if self.settings.contains(key):
+                self.settings.remove(key)
+
+        # Pages that are not built yet show the values when they are built
+        if self.SETTINGS_PAGE in self.built_pages:
+            self.show_settings()
+        if self.DISTANCE_PAGE in self.built_pages:
+            self.venue_combobox.clear()
+            self.venue_combobox.addItems(self.venues)
+
+    def show_settings(self):
         self.age_groups_listwidget.clear()
-        self.age_groups = self.settings.value("age_groups", ['AK 10', 'AK 12', 'AK 13/14', 'AK 15/16', 'AK 17/18', 'AK Offen'])
         self.age_groups_listwidget.addItems(self.age_groups)
 
         self.age_groups_senior_team_listwidget.clear()
-        self.age_groups_senior_team = self.settings.value("age_groups_senior_team", ['AK 100', 'AK 120', 'AK 140', 'AK 170', 'AK 200', 'AK 240', 'AK 280+'])
         self.age_groups_senior_team_listwidget.addItems(self.age_groups_senior_team)
 
         self.age_groups_senior_individual_listwidget.clear()
-        self.age_groups_senior_individual = self.settings.value("age_groups_senior_individual", ['AK 25', 'AK 30', 'AK 35', 'AK 40', 'AK 45', 'AK 50', 'AK 55', 'AK 60+'])
         self.age_groups_senior_individual_listwidget.addItems(self.age_groups_senior_individual)
 
         self.start_ak_wwk_combobox.clear()
         self.start_ak_wwk_combobox.addItems(self.age_groups)
-        self.start_age_group_wwk = self.settings.value("start_age_group_wwk", 'AK 13/14')
         self.start_ak_wwk_combobox.setCurrentText(self.start_age_group_wwk)
 
-        self.simplify_senior_groups = self.settings.value("simplify_senior_groups", True, type=bool)
         self.simplify_senior_groups_checkbox.setChecked(self.simplify_senior_groups)
-
-        self.drop_not_started_teams = self.settings.value("drop_not_started_teams", True, type=bool)
         self.drop_not_started_teams_checkbox.setChecked(self.drop_not_started_teams)
 
-        self.age_groups_wwk = self.age_groups + ['AK Senioren'] if self.simplify_senior_groups else self.age_groups + self.age_groups_senior_team
-        self.age_groups_start_permit_wwk = [ak for ak in self.age_groups_wwk if ak >= self.start_age_group_wwk]
-
-        self.age_groups_wwk = [group.replace('AK', 'AkW') for group in self.age_groups_start_permit_wwk]
-
-        self.all_age_groups = self.age_groups + self.age_groups_senior_individual + self.age_groups_senior_team + ['AK Senioren'] + self.age_groups_wwk
-
-        self.gld_data = self.settings.value("gld_data", [])
+        self.set_venues(self.venues)
 
     def restore_settings(self):
         # Restore default values for age_groups
-        default_age_groups = ['AK 10', 'AK 12', 'AK 13/14', 'AK 15/16', 'AK 17/18', 'AK Offen']
         self.age_groups_listwidget.clear()
-        self.age_groups_listwidget.addItems(default_age_groups)
+        self.age_groups_listwidget.addItems(DEFAULT_AGE_GROUPS)
         # Restore default values for age_groups_senior_team
-        default_age_groups_senior_team = ['AK 100', 'AK 120', 'AK 140', 'AK 170', 'AK 200', 'AK 240', 'AK 280+']
         self.age_groups_senior_team_listwidget.clear()
-        self.age_groups_senior_team_listwidget.addItems(default_age_groups_senior_team)
+        self.age_groups_senior_team_listwidget.addItems(DEFAULT_AGE_GROUPS_SENIOR_TEAM)
         # Restore default values for age_groups_senior_individual
-        default_age_groups_senior_individual = ['AK 25', 'AK 30', 'AK 35', 'AK 40', 'AK 45', 'AK 50', 'AK 55', 'AK 60+']
         self.age_groups_senior_individual_listwidget.clear()
-        self.age_groups_senior_individual_listwidget.addItems(default_age_groups_senior_individual)
+        self.age_groups_senior_individual_listwidget.addItems(DEFAULT_AGE_GROUPS_SENIOR_INDIVIDUAL)
 
         # Restore default value for start_ak_wwk
         self.start_ak_wwk_combobox.clear()
-        self.start_ak_wwk_combobox.addItems(default_age_groups)
-        self.start_ak_wwk_combobox.setCurrentText('AK 13/14')
+        self.start_ak_wwk_combobox.addItems(DEFAULT_AGE_GROUPS)
+        self.start_ak_wwk_combobox.setCurrentText(DEFAULT_START_AGE_GROUP_WWK)
 
         self.simplify_senior_groups = True
         self.simplify_senior_groups_checkbox.setChecked(self.simplify_senior_groups)
@@ -593,6 +1147,8 @@ class MainApplication(QMainWindow):
         self.drop_not_started_teams = True
         self.drop_not_started_teams_checkbox.setChecked(self.drop_not_started_teams)
 
+        self.set_venues(DEFAULT_VENUES)
+
         QMessageBox.information(self, "Einstellungen wiederhergestellt", "Alle Einstellungen zurückgesetzt.\nSpeichern nicht vergessen.")
 
     def save_settings(self):
@@ -608,6 +1164,8 @@ class MainApplication(QMainWindow):
         self.settings.setValue("start_age_group_wwk", self.start_ak_wwk_combobox.currentText())
         self.settings.setValue("simplify_senior_groups", self.simplify_senior_groups_checkbox.isChecked())
         self.settings.setValue("drop_not_started_teams", self.drop_not_started_teams_checkbox.isChecked())
+        venues = [self.venues_listwidget.item(i).data(Qt.ItemDataRole.UserRole) for i in range(self.venues_listwidget.count())]
+        self.settings.setValue("venues", json.dumps({name: (lat, lon) for name, lat, lon in venues}))
 
         # Display a confirmation message
         QMessageBox.information(self, "Einstellungen speichern", "Einstellungen erfolgreich gespeichert!!")
@@ -687,6 +1245,44 @@ class MainApplication(QMainWindow):
         tab3.setLayout(tab3_layout)
         tab_widget.addTab(tab3, "Altersklassen Senioren")
 
+        tab4 = QWidget()
+        tab4_layout = QVBoxLayout()
+        self.venues_listwidget = self.create_listwidget()
+        tab4_layout.addWidget(self.venues_listwidget)
+        venue_form_layout = QHBoxLayout()
+        self.new_venue_name_edit = QLineEdit()
+        self.new_venue_lat_edit = QLineEdit()
+        self.new_venue_lon_edit = QLineEdit()
+        venue_form_layout.addWidget(QLabel("Name:"))
+        venue_form_layout.addWidget(self.new_venue_name_edit)
+        venue_form_layout.addWidget(QLabel("Breitengrad:"))
+        venue_form_layout.addWidget(self.new_venue_lat_edit)
+        venue_form_layout.addWidget(QLabel("Längengrad:"))
+        venue_form_layout.addWidget(self.new_venue_lon_edit)
+        venue_form_layout.addWidget(QPushButton("Hinzufügen", clicked=self.add_venue))
+        venue_form_layout.addWidget(QPushButton("Auswahl löschen", clicked=lambda: self.delete_age_group(self.venues_listwidget)))
+        tab4_layout.addLayout(venue_form_layout)
+        tab4.setLayout(tab4_layout)
+        tab_widget.addTab(tab4, "Veranstaltungsorte")
+
+        # Stage timings of the last runs to find out what makes an evaluation slow
+        tab5 = QWidget()
+        tab5_layout = QVBoxLayout()
+        diagnostics_form_layout = QHBoxLayout()
+        diagnostics_form_layout.addWidget(QLabel("Letzte Durchläufe:"))
+        self.diagnostics_count_spinbox = QSpinBox(minimum=1, maximum=500, value=20)
+        diagnostics_form_layout.addWidget(self.diagnostics_count_spinbox)
+        diagnostics_form_layout.addWidget(QPushButton("Aktualisieren", clicked=self.show_diagnostics))
+        diagnostics_form_layout.addStretch()
+        diagnostics_form_layout.addWidget(QLabel(f"Protokoll: {self.diagnostics.path}", textInteractionFlags=Qt.TextInteractionFlag.TextSelectableByMouse))
+        tab5_layout.addLayout(diagnostics_form_layout)
+        self.diagnostics_table = QTableView()
+        self.diagnostics_table.setAlternatingRowColors(True)
+        tab5_layout.addWidget(self.diagnostics_table)
+        tab5.setLayout(tab5_layout)
+        tab_widget.addTab(tab5, "Diagnose")
+        tab_widget.currentChanged.connect(lambda index: tab_widget.widget(index) is tab5 and self.show_diagnostics())
+
         settings_layout.addWidget(tab_widget)
 
         setting_buttons_layout = QHBoxLayout()
@@ -700,121 +1296,64 @@ class MainApplication(QMainWindow):
         settings_layout.addLayout(setting_buttons_layout)
 
         settings_page.setLayout(settings_layout)
-        self.stacked_widget.addWidget(settings_page)
-
-    def check_for_update(self):
-        try:
-            response = requests.get('https://api.github.com/repos/joe2824/wettkampftools/releases')
-            if response.status_code != 200:
-                return
-
-            releases = response.json()
-            if not releases:
-                return
-
-            if releases[0]['tag_name'] != VERSION and not VERSION == 'DEV VERSION':
-                print('HIER')
-                self.msg_box(title='Eine neue Version ist verfügbar!', text='Update verfügbar', icon=QMessageBox.Icon.Information,
-                             buttonText='Update herunterladen', buttonClick=lambda: QDesktopServices.openUrl(QUrl('https://github.com/joe2824/wettkampftools/releases')))
-        except Exception:
-            pass
-
-    def clean_name(self, name):
-        pattern = re.compile(r"(ortsgruppe|bezirk|ortsverband|landesverband|e.v.)", re.IGNORECASE)
-        return pattern.sub("", name).strip()
-
-    def fetch_gliederungen_data(self):
-        try:
-            url = 'https://services.dlrg.net/service.php?doc=poi&strict=1&limit=5000'
-            response = requests.get(url)
-            response.raise_for_status()  # Check for request errors
-
-            data = response.json().get("locs", [])
-            gld_data = [entry for entry in data if isinstance(entry, dict) and entry.get('typ') == 'Gld']
-
-            self.settings.setValue("gld_data", gld_data)
-            return gld_data
-        except Exception as e:
-            return None
-
-    def calculate_distance_to_bad_nauheim(self, gld_data, gld_names):
-        if not gld_data:
-            return None
-
-        results = []
-        cleaned_gld_names = {self.clean_name(gld_name).lower(): gld_name for gld_name in gld_names}
-
-        for entry in gld_data:
-            pois = entry.get('pois', [])
-            for poi in pois:
-                clean_poi_name = self.clean_name(poi.get('name', 'Unknown')).lower()
-
-                # Check if cleaned POI name matches any cleaned Gld names
-                if clean_poi_name in cleaned_gld_names:
-                    original_name = cleaned_gld_names[clean_poi_name]
-                    lat = entry.get('lat')
-                    lon = entry.get('lon')
-
-                    if lat is not None and lon is not None:
-                        location_coords = (float(lat), float(lon))
-                        distance = geodesic(bad_nauheim_coords, location_coords).kilometers
-                        results.append({'Gliederung': original_name, 'Entfernung (km)': round(distance, 2)})
-
-        # Create DataFrame from results
-        df = pd.DataFrame(results)
-        df_sorted = df.sort_values(by='Entfernung (km)', ascending=False).reset_index(drop=True)
-        df_sorted.index = df_sorted.index + 1
-
-        return df_sorted
+        self.show_settings()
+        return settings_page
+
+    def show_diagnostics(self):
+        from wettkampftools.gui.models import PandasModel
+        model = PandasModel(dataframe=runs_table(self.diagnostics.last(self.diagnostics_count_spinbox.value())))
+        self.diagnostics_table.setModel(model)
+        self.diagnostics_table.resizeColumnsToContents()
+
+    def start_background_updates(self):
+        if self.gazetteer.is_fresh(GLD_DATA_TTL):
+            self.show_gld_data_status()
+        else:
+            self.gld_data_status.setText('Gliederungen werden aktualisiert...')
+            self.jobs.start('gld_data', lambda job: self.gazetteer.refresh(), background=True,
+                            on_result=lambda _: self.show_gld_data_status(), on_error=lambda e: self.show_gld_data_status(offline=True))
 
-    def calculate_distances(self):
-        try:
-            gld_data = self.fetch_gliederungen_data()
-        except Exception as e:
-            if not gld_data:
-                self.gld_data = self.settings.value("gld_data", [])
-            else:
-                self.gld_data = gld_data
-
-        df_results = self.calculate_distance_to_bad_nauheim(self.gld_data, self.preperation_competition_df['gliederung'].unique())
-        return df_results
-
-class PandasModel(QAbstractTableModel):
-    def __init__(self, dataframe):
-        super().__init__()
-        self._dataframe = dataframe if dataframe is not None else pd.DataFrame()
-
-    def rowCount(self, parent=QModelIndex()) -> int:
-        """Return the number of rows in the dataframe."""
-        if not self._dataframe.empty:
-            return len(self._dataframe)
-        return 0
-
-    def columnCount(self, parent=QModelIndex()) -> int:
-        """Return the number of columns in the dataframe."""
-        if not self._dataframe.empty:
-            return len(self._dataframe.columns)
-        return 0
-
-    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
-        """Return the data for the given index."""
-        if role == Qt.ItemDataRole.DisplayRole:
-            value = self._dataframe.iloc[index.row(), index.column()]
-            return str(value)
-        return None
-
-    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
-        """Provide headers for the table view."""
-        if role == Qt.ItemDataRole.DisplayRole:
-            if orientation == Qt.Orientation.Horizontal:
-                return str(self._dataframe.columns[section])
-            elif orientation == Qt.Orientation.Vertical:
-                return str(self._dataframe.index[section])
-        return None
+        if time.time() - self.settings.value("latest_release_checked", 0.0, type=float) < UPDATE_CHECK_TTL:
+            self.check_for_update(self.settings.value("latest_release", ''))
+        else:
+            self.jobs.start('update', self.update_job, background=True, on_result=self.store_latest_release)
+
+    @staticmethod
+    def update_job(job):
+        from wettkampftools import update
+        return update.fetch_latest_release()
+
+    def store_latest_release(self, latest_release):
+        self.settings.setValue("latest_release", latest_release or '')
+        self.settings.setValue("latest_release_checked", time.time())
+        self.check_for_update(latest_release)
+
+    def check_for_update(self, latest_release):
+        if latest_release and latest_release != VERSION and not VERSION == 'DEV VERSION':
+            self.msg_box(title='Eine neue Version ist verfügbar!', text='Update verfügbar', icon=QMessageBox.Icon.Information,
+                         buttonText='Update herunterladen', buttonClick=lambda: QDesktopServices.openUrl(QUrl('https://github.com/joe2824/wettkampftools/releases')))
+
+    def show_gld_data_status(self, offline=False):
+        if not self.gazetteer.count:
+            text = 'Gliederungen: keine Daten'
+        else:
+            text = f'Gliederungen: Stand {datetime.datetime.fromtimestamp(self.gazetteer.updated):%d.%m.%Y}'
+        self.gld_data_status.setText(f'{text} (offline)' if offline else text)
 
 if __name__ == "__main__":
+    # The certificates are rendered in worker processes, which start this exe again
+    multiprocessing.freeze_support()
+    profile = StartupProfile('--profile-startup' in sys.argv)
+    profile.mark('Importe')
     app = QApplication(sys.argv)
     app.setWindowIcon(QIcon(os.path.join(basedir, 'images', 'icon.ico')))
-    window = MainApplication()
+    profile.mark('QApplication')
+    window = MainApplication(profile)
     window.show()
+    profile.mark('Anzeigen')
+
+    def first_paint():
+        profile.mark('Erstes Zeichnen')
+        profile.report()
+    QTimer.singleShot(0, first_paint)
     sys.exit(app.exec())
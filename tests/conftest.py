@@ -0,0 +1,21 @@
+import pytest
+
+from wettkampftools.synthetic import SCALES
+
+
+def pytest_addoption(parser):
+    parser.addoption('--benchmarks', nargs='?', const='bezirk', choices=list(SCALES), metavar='SCALE',
+                     help='Also run the benchmarks (needs pytest-benchmark) on synthetic data of this scale (default: bezirk)')
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'benchmarks: timing of a processing step, only runs with --benchmarks')
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--benchmarks'):
+        return
+    skip = pytest.mark.skip(reason='benchmarks only run with --benchmarks')
+    for item in items:
+        if 'benchmarks' in item.keywords:
+            item.add_marker(skip)
@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from wettkampftools.settings import Settings
+
+
+@pytest.fixture
+def age_groups():
+    return Settings().age_group_registry
+
+
+def test_ranks_follow_the_settings(age_groups):
+    # As text 'AK 100' < 'AK 12' < 'AK 13/14' < 'AK 60+', in the settings it is the other way round
+    assert age_groups.rank('AK 10') < age_groups.rank('AK 12') < age_groups.rank('AK 13/14') < age_groups.rank('AK Offen')
+    assert age_groups.rank('AK Offen') < age_groups.rank('AK 60+') < age_groups.rank('AK 100') < age_groups.rank('AK Senioren')
+    assert age_groups.rank('AK Senioren') < age_groups.rank('AkW 13/14')
+    assert age_groups.rank('ak offen') == age_groups.rank('AK Offen')
+    assert age_groups.rank('AK 99') is None
+    # The dtype codes are the ranks
+    assert [age_groups.rank(label) for label in age_groups.dtype.categories] == list(range(len(age_groups.labels)))
+
+
+@pytest.mark.parametrize('label, canonical', [
+    ('ak offen', 'AK Offen'),
+    (' AK  13/14 ', 'AK 13/14'),
+    ('offen', 'AK Offen'),
+    ('13/14', 'AK 13/14'),
+    ('AKW 13/14', 'AkW 13/14'),
+    ('Mixed', None),
+])
+def test_canonical(age_groups, label, canonical):
+    assert age_groups.canonical(label) == canonical
+
+
+def test_start_permit(age_groups):
+    assert age_groups.start_permit_wwk == ('AK 13/14', 'AK 15/16', 'AK 17/18', 'AK Offen', 'AK Senioren')
+    assert age_groups.wwk == ('AkW 13/14', 'AkW 15/16', 'AkW 17/18', 'AkW Offen', 'AkW Senioren')
+    assert not age_groups.is_start_permit_wwk('AK 12')
+    assert age_groups.is_start_permit_wwk('ak 15/16')
+
+
+def test_start_permit_of_senior_teams():
+    age_groups = Settings(simplify_senior_groups=False, start_age_group_wwk='ak 17/18').age_group_registry
+    # Individual senior groups never start in the wave
+    assert age_groups.start_permit_wwk == ('AK 17/18', 'AK Offen', 'AK 100', 'AK 120', 'AK 140', 'AK 170', 'AK 200', 'AK 240', 'AK 280+')
+
+
+def test_unknown_start_age_group():
+    assert Settings(start_age_group_wwk='AK 99').age_group_registry.start_permit_wwk == ()
+
+
+def test_sort_key(age_groups):
+    labels = pd.Series(['AkW 13/14', 'AK Senioren', None, 'Mixed', 'AK 100', 'ak 12', 'AK 10', 'Bambini'])
+    ordered = labels.sort_values(key=age_groups.sort_key).tolist()
+    assert ordered == ['AK 10', 'ak 12', 'AK 100', 'AK Senioren', 'AkW 13/14', 'Bambini', 'Mixed', None]
+    assert age_groups.sort_key(labels).index.equals(labels.index)
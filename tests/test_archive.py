@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from wettkampftools.archive import Archive
+from wettkampftools.scoring import ScoringRules, score
+from wettkampftools.settings import Settings
+
+COLUMNS = ['Gliederung', 'Name', 'Altersklasse', 'Geschlecht', 'Platz']
+
+FRUEHJAHR = pd.DataFrame([
+    ['Dorheim', 'Dorheim', 'AK 12', 'männlich', 1],
+    ['Friedberg', 'Friedberg', 'AK 12', 'männlich', 2],
+    ['Butzbach', 'Butzbach', 'AK 12', 'männlich', 3],
+    ['Dorheim', 'Dorheim', 'AkW 13/14', 'weiblich', 1],
+    ['Friedberg', 'Friedberg', 'AkW 13/14', 'weiblich', 2],
+], columns=COLUMNS)
+
+HERBST = pd.DataFrame([
+    ['Friedberg', 'Friedberg', 'AK 12', 'männlich', 1],
+    ['Butzbach', 'Butzbach', 'AK 12', 'männlich', 2],
+    ['Dorheim', 'Dorheim', 'AK 12', 'männlich', 3],
+    ['Dorheim', 'Dorheim', 'AkW 13/14', 'weiblich', 1],
+    ['Friedberg', 'Friedberg', 'AkW 13/14', 'weiblich', 2],
+], columns=COLUMNS)
+
+
+def jauswertung(path, daten):
+    """JAuswertung export with the 'Seriendruck' and 'Daten' sheets."""
+    with pd.ExcelWriter(path, engine='xlsxwriter') as writer:
+        daten.to_excel(writer, sheet_name='Seriendruck', index=False)
+        daten.to_excel(writer, sheet_name='Daten', index=False)
+    return path
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = Archive(':memory:')
+    settings = Settings()
+    assert archive.ingest(jauswertung(tmp_path / 'fruehjahr.xlsx', FRUEHJAHR), settings, year=2024, event='Frühjahr') == (2024, 'Frühjahr')
+    assert archive.ingest(jauswertung(tmp_path / 'herbst.xlsx', HERBST), settings, year=2024) == (2024, 'herbst')
+    # The season before, stored from already scored results
+    quelldaten, _ = score(pd.DataFrame([['Dorheim', 'Dorheim', 'AkW 13/14', 'weiblich', 1],
+                                        ['Butzbach', 'Butzbach', 'AK 12', 'männlich', 1]], columns=COLUMNS), ScoringRules())
+    assert archive.add(quelldaten, 2023, 'Herbst') == 2
+    return archive
+
+
+def rows(ranking):
+    return ranking.reset_index().values.tolist()
+
+
+def test_events(archive):
+    assert archive.years() == [2024, 2023]
+    assert archive.wertungen() == ['Rettungswettkampf', 'Wellenwettkampf']
+    events = archive.events()
+    assert sorted(zip(events['Jahr'], events['Wettkampf'], events['Ergebnisse'])) == [(2023, 'Herbst', 2), (2024, 'Frühjahr', 5), (2024, 'herbst', 5)]
+
+
+def test_season_ranking(archive):
+    rankings = archive.season_ranking(2024)
+    assert list(rankings) == ['Rettungswettkampf', 'Wellenwettkampf']
+    # Rettungswettkampf: 4 + 1, 2 + 4, 1 + 2 / Wellenwettkampf: 3 + 3, 1 + 1
+    assert rows(rankings['Rettungswettkampf']) == [[1, 'Friedberg', 6.0, 2], [2, 'Dorheim', 5.0, 2], [3, 'Butzbach', 3.0, 2]]
+    assert rows(rankings['Wellenwettkampf']) == [[1, 'Dorheim', 6.0, 2], [2, 'Friedberg', 2.0, 2]]
+    assert rows(archive.season_ranking(2023)['Rettungswettkampf']) == [[1, 'Butzbach', 2.0, 1]]
+
+
+def test_season_ranking_of_age_group(archive):
+    rankings = archive.season_ranking(2024, 'AkW 13/14')
+    assert list(rankings) == ['Wellenwettkampf']
+    assert rows(rankings['Wellenwettkampf']) == [[1, 'Dorheim', 6.0, 2], [2, 'Friedberg', 2.0, 2]]
+
+
+def test_club_comparison(archive):
+    comparison = archive.club_comparison('Wellenwettkampf')
+    # Best clubs of the latest year first, years without results are missing
+    assert comparison.index.tolist() == ['Dorheim', 'Friedberg']
+    assert comparison.columns.tolist() == ['2023', '2024']
+    np.testing.assert_array_equal(comparison.to_numpy(), [[2.0, 6.0], [np.nan, 2.0]])
+    assert archive.club_comparison('Wellenwettkampf', ['Friedberg']).index.tolist() == ['Friedberg']
+
+
+def test_club_history(archive):
+    history = archive.club_history('Friedberg')
+    assert history[['Jahr', 'Wettkampf', 'Wertung', 'Altersklasse', 'Platz', 'Punktzahl']].values.tolist() == [
+        [2024, 'Frühjahr', 'Rettungswettkampf', 'AK 12', 2.0, 2.0],
+        [2024, 'Frühjahr', 'Wellenwettkampf', 'AkW 13/14', 2.0, 1.0],
+        [2024, 'herbst', 'Rettungswettkampf', 'AK 12', 1.0, 4.0],
+        [2024, 'herbst', 'Wellenwettkampf', 'AkW 13/14', 2.0, 1.0],
+    ]
+    assert archive.club_history('Rosbach').empty
+
+
+def test_adding_an_event_again_replaces_it(archive, tmp_path):
+    def counts():
+        return [archive.query(f'SELECT COUNT(*) AS n FROM {table}')['n'][0] for table in ('events', 'results', 'totals')]
+
+    before = counts()
+    ranking = archive.season_ranking(2024)
+    archive.ingest(jauswertung(tmp_path / 'fruehjahr.xlsx', FRUEHJAHR), Settings(), year=2024, event='Frühjahr')
+    assert counts() == before
+    for name, table in archive.season_ranking(2024).items():
+        pd.testing.assert_frame_equal(table, ranking[name])
+
+    # Corrected results replace the old ones of the event
+    archive.ingest(jauswertung(tmp_path / 'fruehjahr.xlsx', FRUEHJAHR.head(3)), Settings(), year=2024, event='Frühjahr')
+    assert counts() == [before[0], before[1] - 2, before[2] - 2]
+
+
+def test_remove(archive):
+    archive.remove(2023, 'Herbst')
+    assert archive.years() == [2024]
+    assert archive.club_comparison('Wellenwettkampf').columns.tolist() == ['2024']
+    with pytest.raises(KeyError):
+        archive.remove(2023, 'Herbst')
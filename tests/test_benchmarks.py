@@ -0,0 +1,29 @@
+"""The benchmarks of ``wettkampftools.benchmark`` as pytest-benchmark suite.
+
+Skipped unless pytest runs with ``--benchmarks [SCALE]``. Comparing with
+earlier runs is left to pytest-benchmark, e.g.::
+
+    python -m pytest tests/test_benchmarks.py --benchmarks landesverband --benchmark-autosave --benchmark-compare --benchmark-compare-fail=min:20%
+"""
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from wettkampftools import benchmark as benchmarks
+
+pytestmark = pytest.mark.benchmarks
+
+
+@pytest.fixture(scope='module')
+def data(request, tmp_path_factory):
+    return benchmarks.Data(str(tmp_path_factory.mktemp('synthetic')), request.config.getoption('--benchmarks'))
+
+
+@pytest.mark.parametrize('name', list(benchmarks.BENCHMARKS))
+def test_benchmark(benchmark, data, name):
+    fn = benchmarks.BENCHMARKS[name]
+    if name == 'tabelle_zeichnen':
+        pytest.importorskip('PyQt6.QtWidgets')
+    # Build the cached inputs of data outside of the timing, like measure() does
+    fn(data)
+    benchmark(fn, data)
@@ -0,0 +1,68 @@
+"""Vincenty distances against reference values of GeographicLib (Karney)."""
+import numpy as np
+import pytest
+
+from wettkampftools.distance import GazetteerIndex, calculate_distances, geodesic_km
+
+BAD_NAUHEIM = (50.367073, 8.740880)
+
+
+@pytest.mark.parametrize('points, km', [
+    # One degree along the equator and a quarter meridian
+    ((0, 0, 0, 1), 111.319490793),
+    ((0, 0, 90, 0), 10001.965729312),
+    # Flinders Peak to Buninyong, the example of Vincenty's paper
+    ((-37.95103342, 144.42486789, -37.65282114, 143.92649554), 54.972271),
+    ((*BAD_NAUHEIM, 50.1109, 8.6821), 28.801954),
+    ((*BAD_NAUHEIM, 53.5511, 9.9937), 364.576876),
+    # Nearly antipodal, but Vincenty still converges
+    ((0, 0, 0.5, 179.5), 19936.288579),
+])
+def test_geodesic_km(points, km):
+    assert geodesic_km(*points) == pytest.approx(km, abs=1e-6)
+
+
+def test_geodesic_km_same_point():
+    assert geodesic_km(*BAD_NAUHEIM, *BAD_NAUHEIM) == 0
+
+
+def test_geodesic_km_nearly_antipodal():
+    # Vincenty does not converge here, GeographicLib gives 19944.127421 km
+    assert geodesic_km(0, 0, 0.5, 179.7) - 19944.127421 == pytest.approx(3.7, abs=0.1)
+
+
+def test_geodesic_km_broadcasts():
+    lat = np.array([50.1109, 53.5511])
+    lon = np.array([8.6821, 9.9937])
+    np.testing.assert_allclose(geodesic_km(*BAD_NAUHEIM, lat, lon), [28.801954, 364.576876], atol=1e-6)
+    assert geodesic_km(lat[:, np.newaxis], lon[:, np.newaxis], lat, lon).shape == (2, 2)
+
+
+GLD_DATA = [
+    {'lat': 50.1109, 'lon': 8.6821, 'pois': [{'name': 'Ortsgruppe Frankfurt am Main e.V.'}]},
+    {'lat': 49.9137, 'lon': 8.4886, 'pois': [{'name': 'Groß-Gerau'}]},
+    {'lat': 53.5511, 'lon': 9.9937, 'pois': [{'name': 'Bezirk Hamburg'}]},
+    # Without coordinates
+    {'lat': None, 'lon': None, 'pois': [{'name': 'Irgendwo'}]},
+]
+
+
+def test_calculate_distances():
+    df = calculate_distances(GLD_DATA, ['DLRG Ortsgruppe Groß Gerau', 'Frankfurt am Main', 'Hamburg', 'Irgendwo'],
+                             {'Bad Nauheim': BAD_NAUHEIM, 'Hamburg': (53.5511, 9.9937)})
+    # Farthest from the first venue first
+    assert df['Gliederung'].tolist() == ['Hamburg', 'DLRG Ortsgruppe Groß Gerau', 'Frankfurt am Main']
+    assert df['Bad Nauheim (km)'].tolist() == [364.58, 53.56, 28.8]
+    assert df['Hamburg (km)'].iloc[0] == 0
+    assert df.index.tolist() == [1, 2, 3]
+
+
+def test_gazetteer_index_keys():
+    index = GazetteerIndex(GLD_DATA)
+    assert len(index) == 3
+    assert index.key('Frankfurt am Main') == 'frankfurt am main'
+    # Folded umlauts, ß and hyphens
+    assert index.key('DLRG Gross Gerau') == 'groß-gerau'
+    assert index.key('Darmstadt') is None
+    assert index.key('Darmstadt', {'Darmstadt': 'hamburg'}) == 'hamburg'
+    assert index.unmatched(['Hamburg', 'Darmstadt']) == ['Darmstadt']
@@ -0,0 +1,93 @@
+import importlib.util
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from wettkampftools import export
+from wettkampftools.export import write_tables
+
+DATEN = pd.DataFrame({
+    'Gliederung': pd.Categorical(['Dorheim', 'Gießen', None, 'Bad Nauheim'] * 6),
+    'Platz': [1.0, 2.0, np.nan, 3.0] * 6,
+    'Punktzahl': [4, 2, 0, 1] * 6,
+    'Datum': pd.to_datetime(['2025-06-14'] * 24),
+})
+RANKING = pd.DataFrame({'Gliederung': ['Dorheim', 'Gießen'], 'Punktzahl': [12, 7]}, index=[1, 2])
+TABLES = {'Daten': DATEN, 'Wellenwettkampf': RANKING}
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # Several chunks and a last one that is not full
+    monkeypatch.setattr(export, 'CHUNK_SIZE', 5)
+
+
+def test_xlsx_round_trip(tmp_path, small_chunks):
+    path = tmp_path / 'auswertung.xlsx'
+    write_tables(str(path), TABLES, index={'Wellenwettkampf'})
+    sheets = pd.read_excel(path, sheet_name=None)
+    assert list(sheets) == ['Daten', 'Wellenwettkampf']
+    pd.testing.assert_frame_equal(sheets['Daten'], DATEN.astype({'Gliederung': object}), check_dtype=False)
+    # The index is the first column without header
+    assert sheets['Wellenwettkampf'].columns.tolist() == ['Unnamed: 0', 'Gliederung', 'Punktzahl']
+    assert sheets['Wellenwettkampf'].values.tolist() == [[1, 'Dorheim', 12], [2, 'Gießen', 7]]
+
+
+def test_xlsx_more_rows_than_a_chunk(tmp_path):
+    df = pd.DataFrame({'Platz': np.arange(export.CHUNK_SIZE + 3), 'Gliederung': 'Dorheim'})
+    path = tmp_path / 'gross.xlsx'
+    write_tables(str(path), {'Quelldaten': df})
+    pd.testing.assert_frame_equal(pd.read_excel(path, sheet_name='Quelldaten'), df)
+
+
+def test_csv_round_trip(tmp_path):
+    path = tmp_path / 'auswertung.csv'
+    write_tables(str(path), TABLES, index={'Wellenwettkampf'})
+    # One file per table next to the chosen path
+    assert not path.exists()
+    daten = pd.read_csv(tmp_path / 'auswertung_Daten.csv', sep=';', encoding='utf-8-sig', parse_dates=['Datum'])
+    pd.testing.assert_frame_equal(daten, DATEN.astype({'Gliederung': object}), check_dtype=False)
+    ranking = pd.read_csv(tmp_path / 'auswertung_Wellenwettkampf.csv', sep=';', encoding='utf-8-sig', index_col=0)
+    pd.testing.assert_frame_equal(ranking, RANKING)
+
+
+def test_csv_single_table(tmp_path):
+    path = tmp_path / 'meldungen.csv'
+    write_tables(str(path), {'Meldungen': RANKING})
+    assert pd.read_csv(path, sep=';', encoding='utf-8-sig').values.tolist() == [['Dorheim', 12], ['Gießen', 7]]
+
+
+@pytest.mark.skipif('.parquet' not in export.FORMATS, reason='needs pyarrow or fastparquet')
+def test_parquet_round_trip(tmp_path):
+    path = tmp_path / 'auswertung.parquet'
+    write_tables(str(path), TABLES, index={'Wellenwettkampf'})
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / 'auswertung_Daten.parquet'), DATEN, check_categorical=False)
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / 'auswertung_Wellenwettkampf.parquet'), RANKING)
+
+
+def test_parquet_without_engine(tmp_path, monkeypatch):
+    monkeypatch.delitem(export.FORMATS, '.parquet', raising=False)
+    with pytest.raises(ValueError, match='pyarrow'):
+        write_tables(str(tmp_path / 'auswertung.parquet'), TABLES)
+    assert export.with_extension('auswertung', 'Parquet (*.parquet)') == 'auswertung.xlsx'
+
+
+def test_parquet_offered_with_engine():
+    installed = any(importlib.util.find_spec(engine) for engine in export.PARQUET_ENGINES)
+    assert ('.parquet' in export.FORMATS) == installed
+
+
+def test_unknown_extension(tmp_path):
+    with pytest.raises(ValueError, match='Unbekanntes Dateiformat'):
+        write_tables(str(tmp_path / 'auswertung.ods'), TABLES)
+
+
+@pytest.mark.parametrize('path, file_filter, expected', [
+    ('auswertung.csv', None, 'auswertung.csv'),
+    ('auswertung.XLSX', 'CSV (*.csv)', 'auswertung.XLSX'),
+    ('auswertung', 'CSV (*.csv)', 'auswertung.csv'),
+    ('auswertung', None, 'auswertung.xlsx'),
+])
+def test_with_extension(path, file_filter, expected):
+    assert export.with_extension(path, file_filter) == expected
@@ -0,0 +1,58 @@
+import threading
+import time
+
+from wettkampftools.gazetteer import GazetteerCache
+
+
+def entries(*names):
+    return [{'typ': 'Gld', 'lat': 52.0 + i, 'lon': 13.0, 'pois': [{'name': name}]} for i, name in enumerate(names)]
+
+
+def test_store_and_reload(tmp_path):
+    cache = GazetteerCache(str(tmp_path))
+    assert cache.data == [] and not cache.count
+    cache.store(entries('OG Alpha', 'OG Beta') + [{'typ': 'Bezirk', 'lat': 0, 'lon': 0}], etag='"1"')
+    assert cache.count == 2
+
+    reloaded = GazetteerCache(str(tmp_path))
+    assert reloaded.meta['etag'] == '"1"'
+    assert [entry['pois'][0]['name'] for entry in reloaded.data] == ['OG Alpha', 'OG Beta']
+    assert len(reloaded.index.lat) == 2
+
+
+class GatedLock:
+    """Lock that holds the reader thread before it takes the lock a second time."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reader = None
+        self.acquired = 0
+        self.waiting, self.release = threading.Event(), threading.Event()
+
+    def __enter__(self):
+        if threading.current_thread() is self.reader:
+            self.acquired += 1
+            if self.acquired == 2:
+                self.waiting.set()
+                self.release.wait(5)
+        return self.lock.__enter__()
+
+    def __exit__(self, *args):
+        return self.lock.__exit__(*args)
+
+
+def test_index_of_refreshed_data(tmp_path):
+    # A refresh stores new data while the index is requested on another thread
+    cache = GazetteerCache(str(tmp_path))
+    cache.store(entries('OG Alpha'))
+    cache._data = None
+    cache._lock = lock = GatedLock()
+    lock.reader = reader = threading.Thread(target=lambda: cache.index)
+    reader.start()
+    while reader.is_alive() and not lock.waiting.is_set():
+        time.sleep(0.001)
+    cache.store(entries('OG Alpha', 'OG Beta'))
+    lock.release.set()
+    reader.join(5)
+
+    assert len(cache.data) == 2
+    assert len(cache.index.lat) == 2
@@ -0,0 +1,76 @@
+"""The incremental live evaluation against scoring the whole sheet."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from wettkampftools.live import LiveEvaluation
+from wettkampftools.scoring import ScoringRules, score
+
+COLUMNS = ['Gliederung', 'Altersklasse', 'Geschlecht', 'Platz']
+
+FIRST = pd.DataFrame([
+    ['Dorheim', 'AK 12', 'männlich', 1],
+    ['Friedberg', 'AK 12', 'männlich', 2],
+    ['Butzbach', 'AK 12', 'männlich', np.nan],
+    ['Friedberg', 'AK 13/14', 'weiblich', 1],
+    ['Dorheim', 'AK 13/14', 'weiblich', 2],
+    ['Dorheim', 'AkW 13/14', 'weiblich', 1],
+], columns=COLUMNS)
+
+# Butzbach finished its heat in AK 12
+CHANGED = FIRST.assign(Platz=[2, 3, 1, 1, 2, 1])
+
+# A new group, AK 15/16 weiblich
+ADDED = pd.concat([CHANGED, pd.DataFrame([
+    ['Butzbach', 'AK 15/16', 'weiblich', 1],
+    ['Rosbach', 'AK 15/16', 'weiblich', 2],
+    ['Friedberg', 'AkW 15/16', 'weiblich', 1],
+], columns=COLUMNS)], ignore_index=True)
+
+# The AK 13/14 results were withdrawn
+REMOVED = ADDED[ADDED['Altersklasse'] != 'AK 13/14'].reset_index(drop=True)
+
+
+def sorted_rows(df):
+    return df.sort_values(COLUMNS).reset_index(drop=True)
+
+
+def assert_matches_full_scoring(live, daten, rules):
+    df, rankings = score(daten, rules)
+    # Groups that were scored while a place was missing keep float places
+    pd.testing.assert_frame_equal(sorted_rows(live.data), sorted_rows(df), check_dtype=False)
+    assert list(live.rankings) == list(rankings)
+    for name, ranking in rankings.items():
+        live_ranking = live.rankings[name]
+        # Clubs with the same points may be in any order
+        assert dict(zip(live_ranking[rules.club], live_ranking[rules.result])) == dict(zip(ranking[rules.club], ranking[rules.result]))
+        assert live_ranking[rules.result].tolist() == ranking[rules.result].tolist()
+        assert live_ranking.index.tolist() == ranking.index.tolist()
+
+
+@pytest.mark.parametrize('not_started', ['drop', 'keep', 'zero'])
+def test_update_matches_score(not_started):
+    rules = ScoringRules(not_started=not_started)
+    live = LiveEvaluation(rules)
+    expected_changes = [
+        (FIRST, 3),
+        (CHANGED, 1),
+        (ADDED, 2),
+        (REMOVED, 1),
+        # Nothing changed since the last version
+        (REMOVED.copy(), 0),
+    ]
+    for daten, changes in expected_changes:
+        changed = live.update(daten)
+        assert len(changed) == changes
+        assert_matches_full_scoring(live, daten, rules)
+
+
+def test_update_reports_changed_groups():
+    live = LiveEvaluation(ScoringRules())
+    live.update(FIRST)
+    assert live.update(CHANGED).tolist() == [('AK 12', 'männlich')]
+    assert sorted(live.update(ADDED).tolist()) == [('AK 15/16', 'weiblich'), ('AkW 15/16', 'weiblich')]
+    assert live.update(REMOVED).tolist() == [('AK 13/14', 'weiblich')]
+    # Rows in a different order are the same version
+    assert not len(live.update(REMOVED.iloc[::-1]))
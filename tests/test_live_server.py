@@ -0,0 +1,44 @@
+import json
+
+import pandas as pd
+
+from wettkampftools import live_server
+from wettkampftools.scoring import ScoringRules
+from wettkampftools.settings import Settings
+
+
+def results(labels):
+    return pd.DataFrame({
+        'Altersklasse': [label for label in labels for _ in range(2)],
+        'Geschlecht': ['weiblich', 'männlich'] * len(labels),
+        'Gliederung': [f'OG {i}' for i in range(2 * len(labels))],
+        'Platz': [1.0, 1.0] * len(labels),
+        'Punktzahl': [10.0, 8.0] * len(labels),
+    })
+
+
+def age_group_pages(data, age_groups=None):
+    pages = live_server.render('v1', '12:00:00', {}, data, ScoringRules(), age_groups)
+    return json.loads(pages['/api/ak'][1])['altersklassen'], pages
+
+
+def test_age_groups_in_registry_order():
+    # As text 'AK 100' < 'AK 12' < 'AK 13/14' < 'AK Offen' < 'AkW 13/14'
+    labels, pages = age_group_pages(results(['AkW 13/14', 'AK 100', 'AK Offen', 'AK 13/14', 'AK 12']))
+    assert labels == ['AK 12', 'AK 13/14', 'AK Offen', 'AK 100', 'AkW 13/14']
+    nav = pages['/'][1].decode()
+    assert [nav.index(f'>{label}</a>') for label in labels] == sorted(nav.index(f'>{label}</a>') for label in labels)
+
+
+def test_unknown_age_groups_last():
+    labels, _ = age_group_pages(results(['Mixed', 'AK Offen', 'Bambini', 'AK 12']), Settings().age_group_registry)
+    assert labels == ['AK 12', 'AK Offen', 'Bambini', 'Mixed']
+
+
+def test_places_within_a_group():
+    data = results(['AK 12'])
+    data = pd.concat([data, data.assign(Platz=[None, 2.0], Gliederung=['OG x', 'OG y'])], ignore_index=True)
+    _, pages = age_group_pages(data)
+    result = json.loads(pages['/api/ak/AK 12'][1])['ergebnisse']
+    assert result['weiblich'] == [[1, 'OG 0', 10], [None, 'OG x', 10]]
+    assert result['männlich'] == [[1, 'OG 1', 8], [2, 'OG y', 8]]
@@ -0,0 +1,55 @@
+import pytest
+
+from wettkampftools.matching import TrigramIndex, fold, trigrams
+
+NAMES = ['Groß-Gerau', 'Gießen', 'Bad Nauheim', 'Mörfelden-Walldorf', 'Büdingen', 'Friedberg', 'Bad Homburg v.d.H.']
+
+
+@pytest.mark.parametrize('name, folded', [
+    ('Groß-Gerau', 'gross gerau'),
+    ('Mörfelden-Walldorf', 'moerfelden walldorf'),
+    ('Büdingen / Hessen', 'buedingen hessen'),
+    ('Bad-Homburg v.d.H.', 'bad homburg v d h'),
+    # DLRG and e.V. do not tell Gliederungen apart
+    ('DLRG Gießen e.V.', 'giessen'),
+    ('Gießen e. V.', 'giessen'),
+])
+def test_fold(name, folded):
+    assert fold(name) == folded
+
+
+def test_trigrams_ignore_spelling():
+    assert trigrams('Groß-Gerau') == trigrams('GROSS GERAU') == trigrams('gross-gerau')
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('Gross Gerau', 'Groß-Gerau'),
+    ('Giessen', 'Gießen'),
+    ('Moerfelden Walldorf', 'Mörfelden-Walldorf'),
+    ('Buedingen', 'Büdingen'),
+])
+def test_search_umlauts_and_sharp_s(query, expected):
+    assert TrigramIndex(NAMES).search(query)[0] == (expected, 1.0)
+
+
+def test_search_typos():
+    index = TrigramIndex(NAMES)
+    name, score = index.search('Bad Nauhiem')[0]
+    assert name == 'Bad Nauheim' and 0.4 <= score < 1
+    assert index.search('Mörfelden')[0][0] == 'Mörfelden-Walldorf'
+
+
+def test_search_limit_and_order():
+    index = TrigramIndex(NAMES)
+    results = index.search('Bad', limit=2, min_score=0)
+    assert len(results) == 2
+    assert {name for name, _ in results} == {'Bad Nauheim', 'Bad Homburg v.d.H.'}
+    scores = [score for _, score in index.search('Bad Homburg', min_score=0)]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_search_without_match():
+    index = TrigramIndex(NAMES)
+    assert index.search('xyz') == []
+    assert index.search('Hamburg', min_score=0.9) == []
+    assert TrigramIndex([]).search('Gießen') == []
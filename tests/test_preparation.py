@@ -0,0 +1,258 @@
+"""The vectorized preparation against the row-wise implementation it replaced."""
+import io
+from dataclasses import asdict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from wettkampftools import preparation
+from wettkampftools.labels import ISC_LABELS
+from wettkampftools.settings import Settings
+
+# Small ISC export: whitespace and spelling of 'AK', several teams per club,
+# senior teams, both sides of the start age group of the wave competition
+ISC_EXPORT = """gliederung;ak;geschlecht;
+Bad Nauheim;AK 12;männlich;
+Bad Nauheim ;ak 12;männlich;
+Bad Nauheim;AK 13/14;männlich;
+Friedberg;AK 13/14;weiblich;
+Friedberg;AK 13/14;weiblich;
+Butzbach;AK offen;weiblich;
+Dorheim;AK 100;männlich;
+Dorheim;AK 120;männlich;
+Dorheim;AK 280+;weiblich;
+Ober-Mörlen;AK 10;weiblich;
+Ober-Mörlen;AK 15/16;männlich;
+Ober-Mörlen;AK 15/16;männlich;
+Ober-Mörlen;AK 15/16;männlich;
+"""
+
+# The same export with teams whose AK is blank
+ISC_EXPORT_BLANK_AK = ISC_EXPORT + """Dorheim;;weiblich;
+Dorheim;;weiblich;
+Rosbach;;männlich;
+"""
+
+
+def legacy_age_groups(settings):
+    """Permitted and all age groups as computed from the settings before the age group registry."""
+    age_groups_wwk = settings.age_groups + ['AK Senioren'] if settings.simplify_senior_groups else settings.age_groups + settings.age_groups_senior_team
+    # Compared as text, 'AK 100' sorts before 'AK 13/14'
+    permitted = [ak for ak in age_groups_wwk if ak >= settings.start_age_group_wwk]
+    permitted = permitted[permitted.index(settings.start_age_group_wwk):]
+    wwk = [group.replace('AK', 'AkW') for group in permitted]
+    all_age_groups = settings.age_groups + settings.age_groups_senior_individual + settings.age_groups_senior_team + ['AK Senioren'] + wwk
+    return permitted, all_age_groups
+
+
+def legacy_prepare(df, settings):
+    """``prepare`` before it was vectorized, with the row-wise ``apply``."""
+    df = df.copy()
+    df['gliederung'] = df['gliederung'].str.strip()
+    df['ak'] = df['ak'].str.replace(r'\bAK\b', 'AK', case=False, regex=True)
+
+    df['ctn'] = df.groupby(['gliederung', 'ak', 'geschlecht'])['gliederung'].transform('count')
+    df['cc'] = df.groupby(['gliederung', 'ak', 'geschlecht'])['gliederung'].cumcount(ascending=False)
+    df['name'] = df.apply(lambda x: x["gliederung"] if x["ctn"] < 2 else f'{x["gliederung"]} {x["ctn"] - x["cc"]}', axis=1)
+    df.drop(columns=['ctn', 'cc'], inplace=True)
+
+    df.replace('AK offen', 'AK Offen', inplace=True)
+    if settings.simplify_senior_groups:
+        df.replace(settings.age_groups_senior_team, 'AK Senioren', inplace=True)
+
+    permitted, _ = legacy_age_groups(settings)
+    df['start_as_akw'] = df['ak'].str.upper().isin(ak.upper() for ak in permitted)
+    return df
+
+
+def legacy_registrations(df, settings):
+    """``registrations`` before the label columns were categoricals."""
+    filtered_df = df[df['start_as_akw']].copy()
+    filtered_df['ak'] = filtered_df['ak'].str.replace(r'\bAK\b', 'AkW', case=False, regex=True)
+
+    result_df = pd.concat([df, filtered_df])
+    result_df.reset_index(drop=True, inplace=True)
+    result_df.drop(['start_as_akw'], axis=1, inplace=True)
+
+    _, all_age_groups = legacy_age_groups(settings)
+    result_df['ak'] = pd.Categorical(result_df['ak'], all_age_groups)
+    result_df.sort_values(by=['ak', 'geschlecht', 'gliederung'], ascending=[True, False, False], inplace=True)
+    return result_df
+
+
+def read(tmp_path, content):
+    path = tmp_path / 'isc.csv'
+    path.write_text(content, encoding='utf-8')
+    return preparation.read_isc_export(path)
+
+
+def as_objects(df):
+    """Label columns as plain strings, the categorical dtype is not part of the comparison."""
+    return df.astype({column: object for column in ISC_LABELS})
+
+
+def test_prepare_matches_row_wise_implementation(tmp_path):
+    settings = Settings()
+    expected = legacy_prepare(as_objects(read(tmp_path, ISC_EXPORT)), settings)
+    pd.testing.assert_frame_equal(as_objects(preparation.prepare(read(tmp_path, ISC_EXPORT), settings)), expected)
+
+
+def test_prepare_frozen_result(tmp_path):
+    df = preparation.prepare(read(tmp_path, ISC_EXPORT_BLANK_AK), Settings())
+    expected = pd.DataFrame([
+        ['Bad Nauheim', 'AK 12', 'männlich', 'Bad Nauheim 1', False],
+        ['Bad Nauheim', 'AK 12', 'männlich', 'Bad Nauheim 2', False],
+        ['Bad Nauheim', 'AK 13/14', 'männlich', 'Bad Nauheim', True],
+        ['Friedberg', 'AK 13/14', 'weiblich', 'Friedberg 1', True],
+        ['Friedberg', 'AK 13/14', 'weiblich', 'Friedberg 2', True],
+        ['Butzbach', 'AK Offen', 'weiblich', 'Butzbach', True],
+        # Senior teams are numbered per AK before they are merged
+        ['Dorheim', 'AK Senioren', 'männlich', 'Dorheim', True],
+        ['Dorheim', 'AK Senioren', 'männlich', 'Dorheim', True],
+        ['Dorheim', 'AK Senioren', 'weiblich', 'Dorheim', True],
+        ['Ober-Mörlen', 'AK 10', 'weiblich', 'Ober-Mörlen', False],
+        ['Ober-Mörlen', 'AK 15/16', 'männlich', 'Ober-Mörlen 1', True],
+        ['Ober-Mörlen', 'AK 15/16', 'männlich', 'Ober-Mörlen 2', True],
+        ['Ober-Mörlen', 'AK 15/16', 'männlich', 'Ober-Mörlen 3', True],
+        # The row-wise version named these 'Dorheim nan' and the numbered
+        # teams above 'Bad Nauheim 1.0', teams without AK are numbered as well
+        ['Dorheim', np.nan, 'weiblich', 'Dorheim 1', False],
+        ['Dorheim', np.nan, 'weiblich', 'Dorheim 2', False],
+        ['Rosbach', np.nan, 'männlich', 'Rosbach', False],
+    ], columns=['gliederung', 'ak', 'geschlecht', 'name', 'start_as_akw'])
+    pd.testing.assert_frame_equal(as_objects(df), expected)
+
+
+@pytest.mark.parametrize('start, permitted', [
+    ('AK 12', {'AK 12', 'AK 13/14', 'AK 15/16', 'AK Offen', 'AK Senioren'}),
+    ('AK 13/14', {'AK 13/14', 'AK 15/16', 'AK Offen', 'AK Senioren'}),
+    ('AK 15/16', {'AK 15/16', 'AK Offen', 'AK Senioren'}),
+])
+def test_prepare_start_age_group_boundary(tmp_path, start, permitted):
+    df = preparation.prepare(read(tmp_path, ISC_EXPORT), Settings(start_age_group_wwk=start))
+    assert set(df.loc[df['start_as_akw'], 'ak'].astype(str)) == permitted
+    assert not df.loc[~df['start_as_akw'], 'ak'].astype(str).isin(permitted).any()
+
+
+def test_prepare_senior_groups_not_merged(tmp_path):
+    df = preparation.prepare(read(tmp_path, ISC_EXPORT), Settings(simplify_senior_groups=False))
+    seniors = df[df['gliederung'] == 'Dorheim']
+    assert seniors['ak'].astype(str).tolist() == ['AK 100', 'AK 120', 'AK 280+']
+    # The row-wise version compared AK as text, 'AK 100' and 'AK 120' sort before 'AK 13/14'
+    assert seniors['start_as_akw'].all()
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_read_isc_exports(tmp_path, workers):
+    paths = []
+    for number, content in enumerate([ISC_EXPORT, ISC_EXPORT_BLANK_AK]):
+        path = tmp_path / f'isc_{number}.csv'
+        path.write_text(content, encoding='utf-8')
+        paths.append(path)
+
+    frames = preparation.read_isc_exports(paths, workers=workers)
+    assert [len(df) for df in frames] == [13, 16]
+    for df in frames:
+        # The trailing ';' of the ISC export is no column
+        assert list(df.columns) == ['gliederung', 'ak', 'geschlecht']
+        assert all(isinstance(df[column].dtype, pd.CategoricalDtype) for column in ISC_LABELS)
+    assert frames[0]['gliederung'].tolist()[:2] == ['Bad Nauheim', 'Bad Nauheim ']
+    assert frames[1]['ak'].isna().sum() == 3
+
+
+def test_registrations_match_row_wise_implementation(tmp_path):
+    settings = Settings()
+    df = preparation.prepare(read(tmp_path, ISC_EXPORT), settings)
+    expected = legacy_registrations(legacy_prepare(as_objects(read(tmp_path, ISC_EXPORT)), settings), settings)
+    result = preparation.registrations(df, settings)
+    pd.testing.assert_frame_equal(as_objects(result), as_objects(expected))
+
+
+def test_registrations_add_wave_copies_in_settings_order(tmp_path):
+    settings = Settings()
+    df = preparation.prepare(read(tmp_path, ISC_EXPORT), settings)
+    # Deselect one team, it is registered in its AK only
+    df.loc[df['name'] == 'Friedberg 2', 'start_as_akw'] = False
+    result = preparation.registrations(df, settings)
+
+    assert 'start_as_akw' not in result
+    assert len(result) == len(df) + df['start_as_akw'].sum()
+    assert result.loc[result['name'] == 'Friedberg 2', 'ak'].astype(str).tolist() == ['AK 13/14']
+    assert result.loc[result['name'] == 'Friedberg 1', 'ak'].astype(str).tolist() == ['AK 13/14', 'AkW 13/14']
+    assert result['ak'].astype(str).drop_duplicates().tolist() == [
+        'AK 10', 'AK 12', 'AK 13/14', 'AK 15/16', 'AK Offen', 'AK Senioren', 'AkW 13/14', 'AkW 15/16', 'AkW Offen', 'AkW Senioren']
+
+
+def frame(content):
+    return preparation.read_isc_export(io.StringIO(content))
+
+
+def test_merge_same_export_twice():
+    df, duplicates = preparation.merge_isc_exports([frame(ISC_EXPORT), frame(ISC_EXPORT)])
+    assert duplicates == 13
+    pd.testing.assert_frame_equal(as_objects(df), as_objects(preparation.clean_labels(frame(ISC_EXPORT))))
+
+
+def test_merge_keeps_identical_rows_of_an_export():
+    # Two AK 15/16 teams of Ober-Mörlen are identical rows, the late export repeats them and adds a third
+    first = frame('gliederung;ak;geschlecht;\nOber-Mörlen;AK 15/16;männlich;\nOber-Mörlen;AK 15/16;männlich;\nDorheim;AK 12;weiblich;\n')
+    late = frame('gliederung;ak;geschlecht;\nOber-Mörlen ;ak 15/16;männlich;\nOber-Mörlen;AK 15/16;männlich;\nOber-Mörlen;AK 15/16;männlich;\n')
+    df, duplicates = preparation.merge_isc_exports([first, late])
+    assert duplicates == 2
+    assert df.astype(str).values.tolist() == [
+        ['Ober-Mörlen', 'AK 15/16', 'männlich'],
+        ['Ober-Mörlen', 'AK 15/16', 'männlich'],
+        ['Dorheim', 'AK 12', 'weiblich'],
+        ['Ober-Mörlen', 'AK 15/16', 'männlich'],
+    ]
+    assert preparation.prepare(df, Settings())['name'].tolist() == ['Ober-Mörlen 1', 'Ober-Mörlen 2', 'Dorheim', 'Ober-Mörlen 3']
+
+
+def test_merge_uses_common_columns():
+    first = frame('gliederung;ak;geschlecht;verein;\nDorheim;AK 12;weiblich;1;\n')
+    second = frame('gliederung;ak;geschlecht;\nDorheim;AK 12;weiblich;\nRosbach;AK 12;weiblich;\n')
+    df, duplicates = preparation.merge_isc_exports([first, second])
+    assert duplicates == 1
+    assert list(df.columns) == ['gliederung', 'ak', 'geschlecht']
+    assert df['gliederung'].astype(str).tolist() == ['Dorheim', 'Rosbach']
+
+
+def test_selection_survives_reload(tmp_path):
+    settings = Settings()
+    previous = preparation.prepare(read(tmp_path, ISC_EXPORT), settings)
+    # Friedberg 1 does not start in the wave, Bad Nauheim 2 in AK 12 does
+    previous.loc[previous['name'] == 'Friedberg 1', 'start_as_akw'] = False
+    previous.loc[previous['name'] == 'Bad Nauheim 2', 'start_as_akw'] = True
+
+    # Late registrations: a second Butzbach team, one Ober-Mörlen team less
+    late = ISC_EXPORT.replace('Ober-Mörlen;AK 15/16;männlich;\n', '', 1) + 'Butzbach;AK offen;weiblich;\n'
+    path = tmp_path / 'isc_late.csv'
+    path.write_text(late, encoding='utf-8')
+    df, added, removed = preparation.reload_competition_preperation(previous, [path], settings, workers=1)
+
+    assert (added, removed) == (1, 1)
+    selected = dict(zip(df['name'], df['start_as_akw'].tolist()))
+    assert {name: selected[name] for name in ['Friedberg 1', 'Friedberg 2', 'Bad Nauheim 1', 'Bad Nauheim 2']} == {
+        'Friedberg 1': False, 'Friedberg 2': True, 'Bad Nauheim 1': False, 'Bad Nauheim 2': True}
+    # 'Butzbach' became 'Butzbach 1', the new team gets the preselection of its AK
+    assert selected['Butzbach 1'] and selected['Butzbach 2']
+    assert df['start_as_akw'].dtype == bool
+
+
+def test_carry_selection_of_unchanged_export(tmp_path):
+    settings = Settings()
+    previous = preparation.prepare(read(tmp_path, ISC_EXPORT_BLANK_AK), settings)
+    previous['start_as_akw'] = ~previous['start_as_akw']
+    df, added, removed = preparation.carry_selection(previous, preparation.prepare(read(tmp_path, ISC_EXPORT_BLANK_AK), settings))
+    assert (added, removed) == (0, 0)
+    assert df['start_as_akw'].tolist() == previous['start_as_akw'].tolist()
+
+
+def test_settings_changed():
+    settings = Settings()
+    saved = asdict(settings)
+    assert not preparation.settings_changed(saved, Settings(aliases={'DLRG Dorheim': 'Dorheim'}, venues={}, drop_not_started_teams=False))
+    assert preparation.settings_changed(saved, Settings(start_age_group_wwk='AK 15/16'))
+    assert preparation.settings_changed(saved, Settings(simplify_senior_groups=False))
+    assert preparation.settings_changed(saved, Settings(age_groups_senior_team=['AK 100']))
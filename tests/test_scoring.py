@@ -0,0 +1,141 @@
+"""The scoring rules against the hard-coded Wellenwettkampf scoring they replaced."""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from wettkampftools.scoring import ScoringRules, award_points, club_totals, ranking_labels, rankings_from_totals, score
+
+# 'Daten' sheet of a small JAuswertung export, Friedberg did not start in AK 12
+DATEN = pd.DataFrame([
+    ['Dorheim', 'AK 12', 'männlich', 1],
+    ['Friedberg', 'AK 12', 'männlich', 2],
+    ['Butzbach', 'AK 12', 'männlich', 3],
+    ['Friedberg', 'AK 12', 'männlich', np.nan],
+    ['Dorheim', 'AK 12', 'weiblich', 1],
+    ['Friedberg', 'AK 13/14', 'weiblich', 1],
+    ['Dorheim', 'AK 13/14', 'weiblich', 2],
+    ['Dorheim', 'AkW 13/14', 'weiblich', 1],
+    ['Friedberg', 'AkW 13/14', 'weiblich', 2],
+    ['Butzbach', 'AkW 13/14', 'weiblich', 3],
+    ['Butzbach', 'AkW Offen', 'männlich', 1],
+], columns=['Gliederung', 'Altersklasse', 'Geschlecht', 'Platz'])
+
+
+def legacy_score(df, drop_not_started_teams=True):
+    """Scoring of the Wellenwettkampf before the rules were declarative."""
+    if drop_not_started_teams:
+        df = df.dropna(subset=['Platz'])
+    df = df.copy()
+
+    df['Punktzahl'] = df.groupby(['Altersklasse', 'Geschlecht'])['Platz'].transform(lambda x: len(x) + 1 - x)
+    df['Punktzahl'] = df.apply(lambda row: row['Punktzahl'] + 1 if row['Platz'] == 1 else row['Punktzahl'], axis=1)
+
+    rankings = {}
+    for name, pattern in {'Rettungswettkampf': r'\bAK\b', 'Wellenwettkampf': r'\bAkW\b'}.items():
+        ergebnis = df[df['Altersklasse'].str.contains(pattern)].groupby('Gliederung')['Punktzahl'].sum().reset_index()
+        ergebnis = ergebnis.sort_values(by='Punktzahl', ascending=False).reset_index(drop=True)
+        ergebnis.index += 1
+        rankings[name] = ergebnis
+    return df, rankings
+
+
+@pytest.mark.parametrize('drop', [True, False])
+def test_score_matches_hard_coded_rules(drop):
+    df, rankings = score(DATEN, ScoringRules(not_started='drop' if drop else 'keep'))
+    expected, expected_rankings = legacy_score(DATEN, drop)
+    pd.testing.assert_frame_equal(df, expected)
+    assert list(rankings) == list(expected_rankings)
+    for name, ranking in rankings.items():
+        pd.testing.assert_frame_equal(ranking, expected_rankings[name])
+
+
+def test_score_rankings():
+    _, rankings = score(DATEN, ScoringRules())
+    # AK 12 männlich: 4, 2, 1 / AK 12 weiblich: 2 / AK 13/14: 3, 1 / AkW 13/14: 4, 2, 1 / AkW Offen: 2
+    assert rankings['Rettungswettkampf'].to_dict('list') == {'Gliederung': ['Dorheim', 'Friedberg', 'Butzbach'], 'Punktzahl': [7.0, 5.0, 1.0]}
+    assert rankings['Rettungswettkampf'].index.tolist() == [1, 2, 3]
+    assert rankings['Wellenwettkampf'].to_dict('list') == {'Gliederung': ['Dorheim', 'Butzbach', 'Friedberg'], 'Punktzahl': [4.0, 3.0, 2.0]}
+
+
+def points(rules, data=DATEN):
+    return award_points(data, rules)['Punktzahl'].tolist()
+
+
+def test_reverse_place_points():
+    # Last place one point, the winner one bonus point
+    assert points(ScoringRules(), DATEN.head(3)) == [4, 2, 1]
+    assert points(ScoringRules(bonus={}), DATEN.head(3)) == [3, 2, 1]
+
+
+def test_place_points():
+    assert points(ScoringRules(points='place', bonus={}), DATEN.head(3)) == [1, 2, 3]
+
+
+def test_table_points():
+    rules = ScoringRules(points='table', points_table={'1': 10, '2': 8}, bonus={})
+    # Places not in the table get no points
+    assert points(rules, DATEN.head(3)) == [10, 8, pytest.approx(np.nan, nan_ok=True)]
+
+
+def test_bonus_table():
+    rules = ScoringRules(bonus={'1': 3, '2': 1})
+    assert rules.bonus == {1: 3, 2: 1}
+    assert points(rules, DATEN.head(3)) == [6, 3, 1]
+
+
+def test_not_started_drop():
+    df = award_points(DATEN.head(4), ScoringRules(not_started='drop'))
+    assert df['Platz'].notna().all()
+    assert df['Punktzahl'].tolist() == [4, 2, 1]
+
+
+def test_not_started_keep():
+    df = award_points(DATEN.head(4), ScoringRules(not_started='keep'))
+    # The team without place counts as starter but gets no points
+    assert df['Punktzahl'].tolist()[:3] == [5, 3, 2]
+    assert np.isnan(df['Punktzahl'].iloc[3])
+
+
+def test_not_started_zero():
+    df = award_points(DATEN.head(4), ScoringRules(not_started='zero'))
+    assert df['Punktzahl'].tolist() == [5, 3, 2, 0]
+
+
+def test_ranking_labels():
+    labels = pd.Series(['AK 12', 'AkW 13/14', 'AKW 13/14', 'Mixed', None])
+    assert list(ranking_labels(labels, ScoringRules())) == ['Rettungswettkampf', 'Wellenwettkampf', np.nan, np.nan, np.nan]
+    # The first matching pattern wins
+    rules = ScoringRules(rankings={'Welle': r'\bAkW\b', 'Gesamt': r'.'})
+    assert list(ranking_labels(labels, rules)) == ['Gesamt', 'Welle', 'Gesamt', 'Gesamt', np.nan]
+
+
+def test_club_totals_by_key():
+    df = award_points(DATEN, ScoringRules())
+    totals = club_totals(df, ScoringRules(), by=['Geschlecht'])
+    assert totals[('weiblich', 'Wellenwettkampf', 'Dorheim')] == 4
+    assert totals[('männlich', 'Rettungswettkampf', 'Dorheim')] == 4
+    assert totals[('weiblich', 'Rettungswettkampf', 'Dorheim')] == 3
+    assert ('männlich', 'Wellenwettkampf', 'Dorheim') not in totals.index
+
+
+def test_rankings_without_results():
+    rules = ScoringRules()
+    df = award_points(DATEN[DATEN['Altersklasse'].str.startswith('AK ')], rules)
+    rankings = rankings_from_totals(club_totals(df, rules), rules)
+    assert rankings['Wellenwettkampf'].empty
+    assert list(rankings['Wellenwettkampf'].columns) == ['Gliederung', 'Punktzahl']
+
+
+def test_rules_from_file(tmp_path):
+    path = tmp_path / 'wertung.json'
+    path.write_text(json.dumps({'points': 'table', 'points_table': {'1': 10}, 'bonus': {}, 'not_started': 'zero', 'unbekannt': 1}), encoding='utf-8')
+    rules = ScoringRules.from_file(path)
+    assert (rules.points, rules.points_table, rules.bonus, rules.not_started) == ('table', {1: 10}, {}, 'zero')
+
+
+@pytest.mark.parametrize('kwargs', [{'points': 'zeit'}, {'not_started': 'ignore'}])
+def test_rules_reject_unknown_options(kwargs):
+    with pytest.raises(ValueError):
+        ScoringRules(**kwargs)
@@ -0,0 +1,12 @@
+"""GUI-free core of the Wettkampftools.
+
+Everything in this package except ``wettkampftools.gui`` works without PyQt6
+so it can be used from the command line (``python -m wettkampftools``) as
+well as from ``app.py``.
+"""
+
+try:
+    from wettkampftools._version import __version__
+except ImportError:
+    # Source checkout, release builds write _version.py from the git tag
+    __version__ = None
@@ -0,0 +1,129 @@
+"""Registry of the configured age groups.
+
+The age groups of the settings are compiled once per distinct settings into
+an :class:`AgeGroups` registry: the canonical labels in sort order, their
+ordinal rank and the spellings that mean the same label::
+
+    age_groups = settings.age_group_registry
+    age_groups.canonical('ak offen')   # 'AK Offen'
+    age_groups.canonical('AKW 13/14')  # 'AkW 13/14'
+    age_groups.rank('AK 10') < age_groups.rank('AK 13/14')
+
+Labels are compared by their rank, never as text: 'AK 100' sorts before
+'AK 13/14' as text but comes after it in the settings. The codes of
+``dtype`` are the ranks, columns of that dtype sort by rank already; other
+columns sort with ``sort_values(key=age_groups.sort_key)``.
+"""
+import functools
+import re
+
+SENIORS = 'AK Senioren'
+
+AK = re.compile(r'\bAK\b', re.IGNORECASE)
+AKW = re.compile(r'\bAkW\b', re.IGNORECASE)
+
+
+def alias_key(label):
+    """Spelling independent key of a label: case and whitespace do not matter."""
+    return ' '.join(str(label).split()).casefold()
+
+
+def wwk_label(label):
+    """Wave competition label of an age group: 'AK 13/14' -> 'AkW 13/14'."""
+    return AK.sub('AkW', label)
+
+
+class AgeGroups:
+    """Canonical age group labels with O(1) lookups by any known spelling."""
+    def __init__(self, age_groups, senior_team, senior_individual, start_wwk, simplify_senior_groups):
+        self.age_groups = tuple(age_groups)
+        self.simplify_senior_groups = simplify_senior_groups
+        team_groups = self.age_groups + ((SENIORS,) if simplify_senior_groups else tuple(senior_team))
+
+        # Every known age group in sort order, the AkW labels follow once the permitted groups are known
+        self.labels = tuple(dict.fromkeys(self.age_groups + tuple(senior_individual) + tuple(senior_team) + (SENIORS,)))
+        self.ranks = {label: rank for rank, label in enumerate(self.labels)}
+
+        # The start age group is looked up by spelling, the team groups ranked after it may start
+        keys = [alias_key(ak) for ak in self.age_groups]
+        start = self.ranks[self.age_groups[keys.index(alias_key(start_wwk))]] if alias_key(start_wwk) in keys else len(self.labels)
+        self.start_permit_wwk = tuple(ak for ak in team_groups if self.ranks[ak] >= start)
+        self.wwk = tuple(wwk_label(ak) for ak in self.start_permit_wwk)
+
+        self.labels = tuple(dict.fromkeys(self.labels + self.wwk))
+        self.ranks = {label: rank for rank, label in enumerate(self.labels)}
+
+        self.aliases = {}
+        for label in self.labels:
+            self.aliases.setdefault(alias_key(label), label)
+        # 'offen' or '13/14' without 'AK' mean the regular age group, not the wave one
+        for label in self.labels:
+            if AK.match(label):
+                self.aliases.setdefault(alias_key(AK.sub('', label, count=1)), label)
+
+        self._permitted = frozenset(self.start_permit_wwk)
+        self._wwk = frozenset(self.wwk)
+        self._wwk_of = dict(zip(self.start_permit_wwk, self.wwk))
+        # Senior team groups that are registered as one
+        self._team_group = dict.fromkeys(senior_team, SENIORS) if simplify_senior_groups else {}
+
+    @classmethod
+    def from_settings(cls, settings):
+        return compile_age_groups(tuple(settings.age_groups), tuple(settings.age_groups_senior_team),
+                                  tuple(settings.age_groups_senior_individual), settings.start_age_group_wwk,
+                                  settings.simplify_senior_groups)
+
+    def canonical(self, label, default=None):
+        """The configured spelling of ``label``, ``default`` if it is no known age group."""
+        return self.aliases.get(alias_key(label), default)
+
+    def rank(self, label):
+        """Position of ``label`` in the sort order, None if it is no known age group."""
+        return self.ranks.get(self.canonical(label))
+
+    def sort_key(self, labels):
+        """Ranks of a column of labels to sort by, once per distinct label.
+
+        Unknown labels come after the known ones in text order, missing
+        labels last. Use it as ``key`` of ``sort_values``.
+        """
+        import numpy as np
+        import pandas as pd
+        from wettkampftools.labels import as_categorical
+
+        labels = as_categorical(labels)
+        ranks = [self.rank(label) for label in labels.cat.categories]
+        unknown = sorted(str(label) for label, rank in zip(labels.cat.categories, ranks) if rank is None)
+        keys = [len(self.labels) + unknown.index(str(label)) if rank is None else rank for label, rank in zip(labels.cat.categories, ranks)]
+        # Code -1 (missing label) picks the trailing key
+        keys = np.array(keys + [len(self.labels) + len(unknown)], dtype=int)
+        return pd.Series(keys[labels.cat.codes.to_numpy()], index=labels.index, name=labels.name)
+
+    def team_group(self, label):
+        """Age group a team is registered in, the senior team groups are merged if configured."""
+        label = self.canonical(label, label)
+        return self._team_group.get(label, label)
+
+    def is_start_permit_wwk(self, label):
+        return self.canonical(label) in self._permitted
+
+    def is_wwk(self, label):
+        canonical = self.canonical(label)
+        return canonical in self._wwk if canonical is not None else bool(AKW.search(str(label)))
+
+    def wwk_group(self, label):
+        """Wave competition label of ``label``, unknown labels get 'AkW' instead of 'AK' too."""
+        canonical = self.canonical(label)
+        return self._wwk_of.get(canonical) or wwk_label(canonical or str(label))
+
+    @functools.cached_property
+    def dtype(self):
+        """Categorical dtype of ``labels``, shared by every registry with the same labels."""
+        # pandas is only loaded once the dtype is needed
+        from wettkampftools.labels import age_group_dtype
+        return age_group_dtype(self.labels)
+
+
+@functools.lru_cache(maxsize=8)
+def compile_age_groups(age_groups, senior_team, senior_individual, start_wwk, simplify_senior_groups):
+    return AgeGroups(age_groups, senior_team, senior_individual, start_wwk, simplify_senior_groups)
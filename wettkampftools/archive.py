@@ -0,0 +1,313 @@
+"""Archive of evaluated competitions over several seasons.
+
+Every evaluated JAuswertung export is stored as one event of a year in a
+local SQLite database, so season rankings and comparisons of the clubs over
+the years are answered without opening the old workbooks again::
+
+    archive = Archive()
+    archive.ingest('2025_Wellenwettkampf.xlsx', settings)
+    archive.season_ranking(2025)['Wellenwettkampf']
+
+The results of an event form a partition keyed by year and event, storing an
+event again replaces its partition. Indexes on the club and the age group
+keep the queries in the milliseconds even with many seasons in the archive.
+
+Run ``python -m wettkampftools.archive --help`` for the command line.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from contextlib import closing, contextmanager
+
+import pandas as pd
+
+from wettkampftools.diagnostics import Run
+from wettkampftools.gazetteer import default_cache_dir
+from wettkampftools.scoring import ScoringRules, ranking_labels
+
+ARCHIVE_FILE = 'archiv.sqlite'
+MEMORY = ':memory:'
+SCHEMA_VERSION = 1
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    year INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    source TEXT,
+    imported REAL NOT NULL,
+    UNIQUE (year, name)
+);
+CREATE TABLE IF NOT EXISTS results (
+    event_id INTEGER NOT NULL REFERENCES events (id),
+    year INTEGER NOT NULL,
+    wertung TEXT,
+    gliederung TEXT NOT NULL,
+    altersklasse TEXT,
+    geschlecht TEXT,
+    name TEXT,
+    platz REAL,
+    punkte REAL
+);
+-- Points per club, Wertung and event, season rankings and comparisons only read these
+CREATE TABLE IF NOT EXISTS totals (
+    event_id INTEGER NOT NULL REFERENCES events (id),
+    year INTEGER NOT NULL,
+    wertung TEXT NOT NULL,
+    gliederung TEXT NOT NULL,
+    punkte REAL NOT NULL
+);
+-- Partition of an event, used when it is replaced or removed
+CREATE INDEX IF NOT EXISTS results_event ON results (year, event_id);
+CREATE INDEX IF NOT EXISTS results_gliederung ON results (gliederung, year);
+CREATE INDEX IF NOT EXISTS results_altersklasse ON results (altersklasse, year, wertung, gliederung, event_id, punkte);
+CREATE INDEX IF NOT EXISTS totals_event ON totals (year, event_id);
+CREATE INDEX IF NOT EXISTS totals_season ON totals (year, wertung, gliederung, punkte);
+CREATE INDEX IF NOT EXISTS totals_gliederung ON totals (wertung, gliederung, year, punkte);
+'''
+
+
+def default_archive_path():
+    return os.path.join(default_cache_dir(), ARCHIVE_FILE)
+
+
+def sql_values(column):
+    """Values of a column as Python objects with None for missing values."""
+    values = column.astype(object)
+    return values.where(values.notna(), None).to_numpy()
+
+
+class Archive:
+    def __init__(self, path=None):
+        self.path = path or default_archive_path()
+        # An in-memory archive (path ':memory:') only lives as long as its one connection
+        self._memory = sqlite3.connect(MEMORY, check_same_thread=False) if self.path == MEMORY else None
+        if self._memory is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self.connect() as connection:
+            version = connection.execute('PRAGMA user_version').fetchone()[0]
+            if version > SCHEMA_VERSION:
+                raise ValueError(f'{self.path} stammt von einer neueren Version der Wettkampftools')
+            connection.executescript(SCHEMA)
+            connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    @contextmanager
+    def connect(self):
+        """Connection that commits when the block succeeds and is closed afterwards."""
+        if self._memory is not None:
+            with self._memory:
+                yield self._memory
+            return
+        # Several CLI processes may write at the same time, wait for the lock
+        with closing(sqlite3.connect(self.path, timeout=30)) as connection:
+            with connection:
+                yield connection
+
+    def add(self, quelldaten, year, event, rules=None, source=None):
+        """Store the scored results of one event, replacing an event of the same year and name.
+
+        ``quelldaten`` are the results with points as returned by the
+        evaluation. Returns the number of stored results.
+        """
+        rules = rules or ScoringRules()
+        wertung = pd.Series(ranking_labels(quelldaten[rules.ranking_column], rules), index=quelldaten.index)
+        gliederung = quelldaten[rules.club].astype(str).str.strip()
+        punkte = pd.to_numeric(quelldaten[rules.result], errors='coerce').fillna(0)
+        rows = zip(
+            sql_values(wertung),
+            gliederung.to_numpy(),
+            sql_values(quelldaten[rules.ranking_column]),
+            sql_values(quelldaten.get('Geschlecht', pd.Series(index=quelldaten.index))),
+            sql_values(quelldaten.get('Name', pd.Series(index=quelldaten.index))),
+            sql_values(pd.to_numeric(quelldaten[rules.place], errors='coerce')),
+            punkte.to_numpy(dtype=float),
+        )
+        totals = punkte.groupby([wertung, gliederung], observed=True).sum()
+
+        with self.connect() as connection:
+            connection.execute('INSERT INTO events (year, name, source, imported) VALUES (?, ?, ?, ?) '
+                               'ON CONFLICT (year, name) DO UPDATE SET source = excluded.source, imported = excluded.imported',
+                               (int(year), event, source, time.time()))
+            event_id = connection.execute('SELECT id FROM events WHERE year = ? AND name = ?', (int(year), event)).fetchone()[0]
+            self._delete_partition(connection, year, event_id)
+            connection.executemany('INSERT INTO results (event_id, year, wertung, gliederung, altersklasse, geschlecht, name, platz, punkte) '
+                                   'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                   ((event_id, int(year), *row) for row in rows))
+            connection.executemany('INSERT INTO totals (event_id, year, wertung, gliederung, punkte) VALUES (?, ?, ?, ?, ?)',
+                                   ((event_id, int(year), *key, float(value)) for key, value in totals.items()))
+        return len(quelldaten)
+
+    def ingest(self, path, settings, rules=None, year=None, event=None, run=None):
+        """Evaluate a JAuswertung export and store it.
+
+        The year defaults to the creation year of the file and the event to
+        the file name. Returns year and event the results were stored under.
+        """
+        from wettkampftools.evaluation import creation_year, evaluate_file
+
+        rules = rules or ScoringRules.from_settings(settings)
+        run = run or Run()
+        year = year or creation_year(path)
+        event = event or os.path.splitext(os.path.basename(path))[0]
+        evaluation = evaluate_file(path, settings, rules=rules, run=run)
+        with run.stage('archivieren') as stage:
+            stage.rows = self.add(evaluation.quelldaten, year, event, rules, source=os.path.abspath(path))
+        return year, event
+
+    @staticmethod
+    def _delete_partition(connection, year, event_id):
+        for table in ('results', 'totals'):
+            connection.execute(f'DELETE FROM {table} WHERE year = ? AND event_id = ?', (int(year), event_id))
+
+    def remove(self, year, event):
+        with self.connect() as connection:
+            row = connection.execute('SELECT id FROM events WHERE year = ? AND name = ?', (int(year), event)).fetchone()
+            if row is None:
+                raise KeyError(f'{event} ({year}) ist nicht im Archiv')
+            self._delete_partition(connection, year, row[0])
+            connection.execute('DELETE FROM events WHERE id = ?', row)
+
+    def query(self, sql, params=()):
+        with self.connect() as connection:
+            return pd.read_sql_query(sql, connection, params=params)
+
+    def years(self):
+        return [year for year in self.query('SELECT DISTINCT year FROM events ORDER BY year DESC')['year']]
+
+    def wertungen(self):
+        return [name for name in self.query('SELECT DISTINCT wertung FROM totals ORDER BY wertung')['wertung']]
+
+    def events(self):
+        """Stored events with their number of results, newest first."""
+        return self.query('SELECT e.year AS Jahr, e.name AS Wettkampf, '
+                          '(SELECT COUNT(*) FROM results r WHERE r.year = e.year AND r.event_id = e.id) AS Ergebnisse, '
+                          "datetime(e.imported, 'unixepoch', 'localtime') AS Importiert, e.source AS Datei "
+                          'FROM events e ORDER BY e.year DESC, e.imported DESC')
+
+    def season_ranking(self, year, age_group=None):
+        """Points of the clubs summed over all events of ``year``, one ranking per Wertung.
+
+        Returns a dict like the rankings of a single evaluation, with the
+        number of events a club took part in as extra column.
+        """
+        if age_group:
+            sql = ('SELECT wertung, gliederung AS Gliederung, SUM(punkte) AS Punktzahl, COUNT(DISTINCT event_id) AS Wettkämpfe '
+                   'FROM results WHERE altersklasse = ? AND year = ? AND wertung IS NOT NULL GROUP BY wertung, gliederung')
+            params = (age_group, int(year))
+        else:
+            # One row per club and event in totals
+            sql = ('SELECT wertung, gliederung AS Gliederung, SUM(punkte) AS Punktzahl, COUNT(*) AS Wettkämpfe '
+                   'FROM totals WHERE year = ? GROUP BY wertung, gliederung')
+            params = (int(year),)
+        df = self.query(sql, params)
+
+        rankings = {}
+        for name, ranking in df.groupby('wertung', sort=False):
+            ranking = ranking.drop(columns='wertung').sort_values(by='Punktzahl', ascending=False).reset_index(drop=True)
+            ranking.index += 1
+            rankings[name] = ranking
+        return rankings
+
+    def club_comparison(self, wertung, clubs=None):
+        """Points of the clubs per year in one Wertung, clubs as rows and years as columns."""
+        sql = 'SELECT gliederung AS Gliederung, year AS Jahr, SUM(punkte) AS Punktzahl FROM totals WHERE '
+        params = []
+        if clubs:
+            sql += f'gliederung IN ({", ".join("?" * len(clubs))}) AND '
+            params += list(clubs)
+        sql += 'wertung = ? GROUP BY gliederung, year'
+        params.append(wertung)
+        df = self.query(sql, params)
+        comparison = df.pivot(index='Gliederung', columns='Jahr', values='Punktzahl')
+        comparison.columns = [str(year) for year in comparison.columns]
+        # Best clubs of the latest year first
+        return comparison.sort_values(by=list(reversed(comparison.columns)), ascending=False, na_position='last')
+
+    def club_history(self, club):
+        """Results of one club in every archived event."""
+        return self.query('SELECT r.year AS Jahr, e.name AS Wettkampf, r.wertung AS Wertung, r.altersklasse AS Altersklasse, '
+                          'r.geschlecht AS Geschlecht, r.name AS Name, r.platz AS Platz, r.punkte AS Punktzahl '
+                          'FROM results r JOIN events e ON e.id = r.event_id WHERE r.gliederung = ? '
+                          'ORDER BY r.year DESC, e.name, r.wertung, r.altersklasse', (club,))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='wettkampftools.archive', description='Saisonarchiv der ausgewerteten Wettkämpfe.')
+    parser.add_argument('-a', '--archiv', metavar='DATEI', help=f'Archivdatei (Standard: {default_archive_path()})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    add = commands.add_parser('importieren', help='JAuswertung Exporte auswerten und ins Archiv aufnehmen')
+    add.add_argument('paths', nargs='+', metavar='EXPORT', help='JAuswertung Exporte (*.xls, *.xlsx)')
+    add.add_argument('--jahr', type=int, help='Jahr der Wettkämpfe (Standard: Erstellungsjahr der Datei)')
+    add.add_argument('--wettkampf', help='Name des Wettkampfs, nur bei einem einzelnen Export (Standard: Dateiname)')
+    add.add_argument('-s', '--settings', metavar='JSON', help='Einstellungen aus einer JSON Datei laden')
+    add.add_argument('-w', '--wertung', metavar='JSON', help='Wertungsregeln aus einer JSON Datei laden (Standard: Wellenwettkampf)')
+
+    commands.add_parser('wettkaempfe', help='Wettkämpfe im Archiv anzeigen')
+
+    remove = commands.add_parser('entfernen', help='Einen Wettkampf aus dem Archiv entfernen')
+    remove.add_argument('jahr', type=int)
+    remove.add_argument('wettkampf')
+
+    season = commands.add_parser('saison', help='Saisonwertung eines Jahres')
+    season.add_argument('jahr', type=int)
+    season.add_argument('--altersklasse', help='Nur diese Altersklasse werten')
+
+    comparison = commands.add_parser('vergleich', help='Punkte der Gliederungen über die Jahre vergleichen')
+    comparison.add_argument('wertung', help='z.B. Wellenwettkampf')
+    comparison.add_argument('gliederungen', nargs='*', metavar='GLIEDERUNG', help='Nur diese Gliederungen')
+
+    history = commands.add_parser('gliederung', help='Alle Ergebnisse einer Gliederung')
+    history.add_argument('gliederung')
+    return parser
+
+
+def main(argv=None):
+    from wettkampftools.settings import Settings
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'importieren' and args.wettkampf and len(args.paths) > 1:
+        # Every file would replace the previous one under the same name
+        parser.error('--wettkampf geht nur mit einem einzelnen Export')
+    archive = Archive(args.archiv)
+
+    if args.command == 'importieren':
+        settings = Settings.from_file(args.settings) if args.settings else Settings()
+        rules = ScoringRules.from_file(args.wertung) if args.wertung else None
+        failed = 0
+        for path in args.paths:
+            try:
+                year, event = archive.ingest(path, settings, rules, args.jahr, args.wettkampf)
+                print(f'{path}: {event} ({year})')
+            except Exception as e:
+                failed += 1
+                print(f'{path}: Fehler: {e}', file=sys.stderr)
+        return 1 if failed else 0
+
+    if args.command == 'entfernen':
+        try:
+            archive.remove(args.jahr, args.wettkampf)
+        except KeyError as e:
+            print(e.args[0], file=sys.stderr)
+            return 1
+        return 0
+
+    if args.command == 'saison':
+        tables = archive.season_ranking(args.jahr, args.altersklasse)
+    elif args.command == 'vergleich':
+        tables = {args.wertung: archive.club_comparison(args.wertung, args.gliederungen)}
+    elif args.command == 'gliederung':
+        tables = {args.gliederung: archive.club_history(args.gliederung)}
+    else:
+        tables = {'Wettkämpfe': archive.events()}
+
+    for name, table in tables.items():
+        print(f'{name}\n{table.to_string() if not table.empty else "Keine Einträge"}\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
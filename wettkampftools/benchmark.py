@@ -0,0 +1,289 @@
+"""Benchmarks of the processing steps on synthetic data.
+
+Run with::
+
+    python -m wettkampftools.benchmark --scale landesverband
+
+Every run is appended to a JSON file (default ``benchmarks.json``) and
+compared with the previous run of the same scale, steps that got slower by
+more than ``--threshold`` are reported as regressions. The same benchmarks
+run as pytest-benchmark suite in ``tests/test_benchmarks.py``, this runner
+only needs the packages of the application.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from functools import cached_property
+
+import pandas as pd
+
+from wettkampftools import __version__, archive, certificates, distance, evaluation, live_server, preparation, scoring, synthetic, workbook
+from wettkampftools.settings import Settings
+
+# Name -> function(data) running the step once
+BENCHMARKS = {}
+
+# Differences below this are noise, never a regression
+MIN_DIFFERENCE_MS = 1.0
+
+
+def benchmark(name):
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+
+class Data:
+    """Synthetic input files and the intermediate results the benchmarks start from."""
+    def __init__(self, directory, scale, seed=0):
+        self.directory = directory
+        self.settings = Settings()
+        self.rules = scoring.ScoringRules.from_settings(self.settings)
+        self.files = synthetic.generate(directory, scale, seed, self.settings)
+
+    @cached_property
+    def gld_data(self):
+        with open(self.files['gazetteer'], encoding='utf-8') as file:
+            return json.load(file)
+
+    @cached_property
+    def gazetteer(self):
+        return distance.GazetteerIndex(self.gld_data)
+
+    @cached_property
+    def isc(self):
+        return preparation.load_competition_preperation(self.files['isc'], self.settings)
+
+    @cached_property
+    def isc_exports(self):
+        # A full export and a later one with the same registrations plus a few late ones
+        df = preparation.read_isc_export(self.files['isc'])
+        return [df, pd.concat([df, df.head(10)])]
+
+    @cached_property
+    def gliederungen(self):
+        return self.isc['gliederung'].unique()
+
+    @cached_property
+    def evaluation(self):
+        return evaluation.evaluate_file(self.files['jauswertung'], self.settings)
+
+    @cached_property
+    def archive(self):
+        # The same event in several seasons
+        season_archive = archive.Archive(os.path.join(self.directory, 'archiv.sqlite'))
+        for year in range(2015, 2025):
+            season_archive.add(self.evaluation.quelldaten, year, 'Wellenwettkampf', self.rules)
+        return season_archive
+
+
+@benchmark('import')
+def import_modules(data):
+    # Fresh interpreter, the modules are cached in this one
+    subprocess.run([sys.executable, '-c', 'import wettkampftools.evaluation, wettkampftools.preparation, wettkampftools.distance'],
+                   check=True)
+
+
+@benchmark('isc_einlesen')
+def read_isc(data):
+    preparation.load_competition_preperation(data.files['isc'], data.settings)
+
+
+@benchmark('isc_zusammenfuehren')
+def merge_isc(data):
+    preparation.merge_isc_exports(data.isc_exports)
+
+
+@benchmark('meldungen')
+def registrations(data):
+    preparation.registrations(data.isc, data.settings)
+
+
+@benchmark('jauswertung_einlesen')
+def read_jauswertung(data):
+    workbook.read_jauswertung(data.files['jauswertung'])
+
+
+@benchmark('wertung')
+def score(data):
+    scoring.score(data.evaluation.quelldaten, data.rules)
+
+
+@benchmark('seriendruck')
+def sort_seriendruck(data):
+    evaluation.sort_seriendruck(data.evaluation.seriendruck, data.settings)
+
+
+@benchmark('urkunden')
+def render_certificates(data):
+    certificates.write_certificates(data.evaluation.seriendruck, os.path.join(data.directory, 'urkunden.pdf'))
+
+
+@benchmark('live_seiten')
+def render_live_pages(data):
+    live_server.render(1, '', data.evaluation.rankings, data.evaluation.quelldaten, data.rules, data.settings.age_group_registry)
+
+
+@benchmark('archiv_saison')
+def season_ranking(data):
+    data.archive.season_ranking(2024)
+
+
+@benchmark('archiv_vergleich')
+def club_comparison(data):
+    data.archive.club_comparison('Wellenwettkampf')
+
+
+@benchmark('gliederungen_index')
+def gazetteer_index(data):
+    distance.GazetteerIndex(data.gld_data)
+
+
+@benchmark('gliederungen_zuordnen')
+def match_gliederungen(data):
+    data.gazetteer.match(data.gliederungen)
+
+
+@benchmark('entfernungen')
+def venue_distances(data):
+    lat, lon = next(iter(data.settings.venues.values()))
+    distance.geodesic_km(data.gazetteer.lat, data.gazetteer.lon, lat, lon)
+
+
+@benchmark('vorschlaege')
+def suggest(data):
+    for name in data.gazetteer.unmatched(data.gliederungen):
+        data.gazetteer.suggest(name)
+
+
+@benchmark('tabelle_zeichnen')
+def paint_table(data):
+    from PyQt6.QtWidgets import QApplication, QTableView
+    from wettkampftools.gui.models import PandasModel
+
+    app = QApplication.instance() or QApplication(['benchmark', '-platform', 'offscreen'])
+    view = QTableView()
+    view.resize(1000, 600)
+    view.setModel(PandasModel(dataframe=data.evaluation.quelldaten))
+    view.grab()
+    app.processEvents()
+
+
+@benchmark('export_xlsx')
+def export_xlsx(data):
+    evaluation.write_evaluation(data.evaluation, os.path.join(data.directory, 'auswertung.xlsx'))
+
+
+@benchmark('export_csv')
+def export_csv(data):
+    evaluation.write_evaluation(data.evaluation, os.path.join(data.directory, 'auswertung.csv'))
+
+
+def measure(fn, data, repeat):
+    """Milliseconds of ``repeat`` runs of ``fn``.
+
+    One untimed run first builds the cached inputs of ``data`` (e.g. the
+    evaluation or the archive), so they do not end up in the first timing.
+    """
+    fn(data)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(data)
+        times.append((time.perf_counter() - start) * 1000)
+    return {'min_ms': round(min(times), 3), 'median_ms': round(statistics.median(times), 3)}
+
+
+def load_runs(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def previous_results(runs, scale):
+    """Latest result of every benchmark at ``scale``, runs may have measured only some of them."""
+    previous = {}
+    for run in runs:
+        if run['scale'] == scale:
+            previous.update(run['results'])
+    return previous
+
+
+def regressions(results, previous, threshold):
+    """Benchmarks whose best time got worse by more than ``threshold`` compared to ``previous``."""
+    slower = {}
+    for name, result in results.items():
+        before = previous.get(name)
+        if not before:
+            continue
+        difference = result['min_ms'] - before['min_ms']
+        if difference > MIN_DIFFERENCE_MS and result['min_ms'] > before['min_ms'] * (1 + threshold):
+            slower[name] = result['min_ms'] / before['min_ms']
+    return slower
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='wettkampftools.benchmark', description='Laufzeiten der Verarbeitungsschritte mit synthetischen Daten messen.')
+    parser.add_argument('--scale', choices=list(synthetic.SCALES), default='bezirk', help='Größe des Wettkampfs (Standard: bezirk)')
+    parser.add_argument('-n', '--repeat', type=int, default=5, help='Wiederholungen je Messung (Standard: 5)')
+    parser.add_argument('-k', '--select', nargs='+', metavar='NAME', help=f'Nur diese Messungen: {", ".join(BENCHMARKS)}')
+    parser.add_argument('-o', '--output', default='benchmarks.json', metavar='JSON', help='Ergebnisse an diese Datei anhängen (Standard: benchmarks.json)')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Ab welchem Anteil langsamer eine Messung als Verschlechterung gilt (Standard: 0.2 = 20 %%)')
+    parser.add_argument('--seed', type=int, default=0, help='Startwert für die synthetischen Daten')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    names = args.select or list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        print(f'Unbekannte Messungen: {", ".join(sorted(unknown))}', file=sys.stderr)
+        return 2
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        data = Data(directory, args.scale, args.seed)
+        for name in names:
+            try:
+                results[name] = measure(BENCHMARKS[name], data, args.repeat)
+            except ImportError as e:
+                # The table benchmark needs PyQt6
+                print(f'{name}: übersprungen ({e})', file=sys.stderr)
+
+    runs = load_runs(args.output)
+    slower = regressions(results, previous_results(runs, args.scale), args.threshold)
+
+    for name, result in results.items():
+        note = f'  {slower[name]:.0%} der letzten Messung' if name in slower else ''
+        print(f'{name:<24} {result["min_ms"]:10.1f} ms  (Median {result["median_ms"]:.1f} ms){note}')
+
+    runs.append({
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'version': __version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'scale': args.scale,
+        'repeat': args.repeat,
+        'results': results,
+    })
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(runs, file, indent=2)
+
+    if slower:
+        print(f'{len(slower)} Messung(en) mehr als {args.threshold:.0%} langsamer als beim letzten Lauf', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
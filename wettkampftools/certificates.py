@@ -0,0 +1,240 @@
+"""Certificates (Urkunden) as print-ready PDF, straight from the sorted Seriendruck sheet.
+
+The text is printed onto the pre-printed certificate paper, so a page only
+holds text fields. A template places the fields; their text is a format
+string with the columns of the Seriendruck sheet as placeholders, e.g.::
+
+    {
+        "page_size": [210, 297],
+        "fields": [
+            {"text": "{Name}", "y": 120, "size": 26, "bold": true},
+            {"text": "{Platz}. Platz", "y": 160, "size": 22, "bold": true},
+            {"text": "Wellenwettkampf", "y": 185, "size": 14, "if": "WWK"}
+        ]
+    }
+
+Positions are millimeters from the top left corner. Without ``x`` a field is
+centered on the page, ``align`` can be 'left', 'center' or 'right'. A field
+with ``if`` is only printed when that column is not empty, a field whose
+placeholders are all empty (e.g. no place) is left out.
+
+The page content streams are rendered in a process pool in chunks and
+written into one PDF in print order. Only the standard PDF fonts Helvetica
+and Helvetica-Bold are used, they need not be embedded.
+"""
+import json
+import math
+import os
+import re
+import string
+import unicodedata
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import cached_property
+from itertools import repeat
+
+MM = 72 / 25.4
+
+# Rows rendered per task in the process pool
+CHUNK_SIZE = 1000
+
+# Glyph widths (1/1000 em) of the standard fonts for the printable ASCII characters
+_ASCII = ''.join(chr(code) for code in range(32, 127))
+_WIDTHS = {
+    'Helvetica': [
+        278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+        556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+        1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+        667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+        333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+        556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584],
+    'Helvetica-Bold': [
+        278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+        556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+        975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+        667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+        333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+        611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584],
+}
+WIDTHS = {font: dict(zip(_ASCII, widths)) for font, widths in _WIDTHS.items()}
+for _widths in WIDTHS.values():
+    _widths['ß'] = 611
+FONTS = {'Helvetica': 'F1', 'Helvetica-Bold': 'F2'}
+
+UNSAFE_FILENAME = re.compile(r'[^\w.-]+')
+FORMATTER = string.Formatter()
+
+
+@dataclass
+class CertificateTemplate:
+    # Width and height in millimeters
+    page_size: list = field(default_factory=lambda: [210, 297])
+    fields: list = field(default_factory=lambda: [
+        {'text': '{Name}', 'y': 115, 'size': 26, 'bold': True},
+        {'text': '{Gliederung}', 'y': 130, 'size': 16},
+        {'text': '{Platz}. Platz', 'y': 160, 'size': 22, 'bold': True},
+        {'text': '{Altersklasse} {Geschlecht}', 'y': 172, 'size': 16},
+        {'text': 'Wellenwettkampf', 'y': 185, 'size': 14, 'if': 'WWK'},
+    ])
+
+    def __post_init__(self):
+        for text_field in self.fields:
+            if text_field.get('align', 'center') not in ('left', 'center', 'right'):
+                raise ValueError(f"Unbekannte Ausrichtung: {text_field['align']}")
+
+    @cached_property
+    def field_placeholders(self):
+        """Placeholders of every field, in the order of the fields."""
+        return [[name for _, name, _, _ in FORMATTER.parse(text_field['text']) if name] for text_field in self.fields]
+
+    @property
+    def placeholders(self):
+        """Columns the template needs."""
+        names = set()
+        for text_field, field_names in zip(self.fields, self.field_placeholders):
+            names.update(field_names)
+            if text_field.get('if'):
+                names.add(text_field['if'])
+        return names
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as file:
+            data = json.load(file)
+        return cls(**{key: value for key, value in data.items() if key in ('page_size', 'fields')})
+
+
+def text_width(text, font, size):
+    """Width of ``text`` in points; accented letters are as wide as their base letter."""
+    widths = WIDTHS[font]
+    total = 0
+    for char in text:
+        width = widths.get(char)
+        if width is None:
+            base = unicodedata.normalize('NFD', char)[0]
+            width = widths.get(base, 556)
+        total += width
+    return total * size / 1000
+
+
+def pdf_string(text):
+    """Text as PDF string literal in WinAnsiEncoding."""
+    encoded = text.encode('cp1252', errors='replace')
+    return b'(' + encoded.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def cell_text(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        # Places come as float because of teams without a place
+        return str(int(value))
+    return str(value).strip()
+
+
+def render_page(values, template):
+    """Content stream of one certificate, ``values`` maps column -> text."""
+    width, height = template.page_size
+    commands = [b'BT']
+    for text_field, names in zip(template.fields, template.field_placeholders):
+        if text_field.get('if') and not values.get(text_field['if']):
+            continue
+        if names and not any(values[name] for name in names):
+            continue
+        text = text_field['text'].format_map(values)
+        font = 'Helvetica-Bold' if text_field.get('bold') else 'Helvetica'
+        size = text_field.get('size', 12)
+        align = text_field.get('align', 'center')
+        x = text_field.get('x', width / 2 if align == 'center' else 0) * MM
+        if align == 'center':
+            x -= text_width(text, font, size) / 2
+        elif align == 'right':
+            x -= text_width(text, font, size)
+        y = (height - text_field['y']) * MM
+        commands.append(f'/{FONTS[font]} {size} Tf 1 0 0 1 {x:.2f} {y:.2f} Tm '.encode() + pdf_string(text) + b' Tj')
+    commands.append(b'ET')
+    return zlib.compress(b'\n'.join(commands))
+
+
+def render_pages(rows, template):
+    return [render_page(values, template) for values in rows]
+
+
+def write_pdf(path, pages, page_size):
+    """Write compressed content streams as pages of one PDF."""
+    width, height = (value * MM for value in page_size)
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        None,
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+    ]
+    kids = []
+    for content in pages:
+        objects.append(b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(content) + content + b'\nendstream')
+        objects.append(b'<< /Type /Page /Parent 2 0 R /Contents %d 0 R >>' % len(objects))
+        kids.append(f'{len(objects)} 0 R')
+    objects[1] = (f'<< /Type /Pages /Count {len(kids)} /Kids [{" ".join(kids)}] '
+                  f'/MediaBox [0 0 {width:.2f} {height:.2f}] '
+                  f'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> >>').encode()
+
+    with open(path, 'wb') as file:
+        file.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(file.tell())
+            file.write(b'%d 0 obj\n' % number + body + b'\nendobj\n')
+        xref = file.tell()
+        file.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+        file.writelines(b'%010d 00000 n \n' % offset for offset in offsets)
+        file.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref))
+
+
+def certificate_rows(seriendruck, template):
+    """Rows of the Seriendruck sheet as dicts of display text, in print order."""
+    missing = template.placeholders - set(seriendruck.columns)
+    if missing:
+        raise ValueError(f'Unbekannte Platzhalter in der Vorlage: {", ".join(sorted(missing))}')
+    columns = sorted(template.placeholders)
+    texts = {column: [cell_text(value) for value in seriendruck[column].tolist()] for column in columns}
+    return [dict(zip(columns, values)) for values in zip(*texts.values())] if columns else [{}] * len(seriendruck)
+
+
+def render(rows, template, workers=None):
+    """Content streams of all rows in order, in a process pool if there are enough rows."""
+    chunks = [rows[start:start + CHUNK_SIZE] for start in range(0, len(rows), CHUNK_SIZE)]
+    if workers == 1 or len(chunks) < 2:
+        return [page for chunk in chunks for page in render_pages(chunk, template)]
+    with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(chunks))) as executor:
+        # map keeps the order of the chunks, so the pages stay in print order
+        return [page for pages in executor.map(render_pages, chunks, repeat(template)) for page in pages]
+
+
+def write_certificates(seriendruck, path, template=None, split_by=None, workers=None, run=None):
+    """Render the certificates of the sorted Seriendruck sheet into ``path``.
+
+    With ``split_by`` (e.g. 'Altersklasse') every value of that column gets
+    its own file next to ``path``. Returns the paths written.
+    """
+    from wettkampftools.diagnostics import Run
+
+    template = template or CertificateTemplate()
+    run = run or Run()
+    with run.stage('urkunden') as stage:
+        pages = render(certificate_rows(seriendruck, template), template, workers)
+        stage.rows = len(pages)
+
+    with run.stage('schreiben'):
+        if not split_by:
+            write_pdf(path, pages, template.page_size)
+            return [path]
+
+        stem, extension = os.path.splitext(path)
+        paths = []
+        # Positions per group, groups in print order
+        for value, positions in seriendruck.reset_index(drop=True).groupby(split_by, sort=False, observed=True, dropna=False).indices.items():
+            group_path = f'{stem}_{UNSAFE_FILENAME.sub("_", str(value)).strip("_")}{extension}'
+            write_pdf(group_path, [pages[position] for position in positions], template.page_size)
+            paths.append(group_path)
+        return paths
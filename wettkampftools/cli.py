@@ -0,0 +1,219 @@
+"""Batch processing without the GUI.
+
+    python -m wettkampftools EXPORTS... [-o AUSGABE] [-j JOBS]
+
+ISC exports (``*.csv``) are turned into the Wellenwettkampf registration
+list, JAuswertung exports (``*.xls``/``*.xlsx``) are evaluated. Folders are
+searched for both kinds of files and every file is handled by its own worker
+process.
+"""
+import argparse
+import datetime
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from wettkampftools.diagnostics import DiagnosticsLog, Run
+from wettkampftools.scoring import ScoringRules
+from wettkampftools.settings import Settings
+
+ISC_EXTENSIONS = ('.csv',)
+JAUSWERTUNG_EXTENSIONS = ('.xls', '.xlsx')
+
+
+def collect_files(paths):
+    """Expand folders into the ISC and JAuswertung exports they contain."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                # Skip Excel lock files
+                if name.lower().endswith(ISC_EXTENSIONS + JAUSWERTUNG_EXTENSIONS) and not name.startswith('~$'):
+                    files.append(os.path.join(path, name))
+        else:
+            files.append(path)
+    return files
+
+
+def output_path(file, output_dir, suffix, extension='.xlsx'):
+    stem = os.path.splitext(os.path.basename(file))[0]
+    return os.path.join(output_dir or os.path.dirname(os.path.abspath(file)), f'{stem}_{suffix}{extension}')
+
+
+def process_file(file, settings, output_dir=None, evaluate=True, gazetteer=None, rules=None, quelldaten=True, extension='.xlsx',
+                 certificates=None, split_certificates=False, archive=None, run=None):
+    """Process a single export and return a list of status lines.
+
+    ``file`` can also be a list of ISC exports, they are merged into one
+    registration list named after the first one. ``certificates`` is a
+    CertificateTemplate, JAuswertung exports then also get their certificates
+    as PDF. With the path of an ``archive`` evaluated exports are stored in
+    the season archive. The stages are timed in ``run``.
+    """
+    from wettkampftools import distance, evaluation, preparation
+    from wettkampftools.export import write_tables
+
+    run = run or Run()
+    messages = []
+    files = [file] if isinstance(file, str) else list(file)
+    for path in files:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f'{path} existiert nicht!')
+    file = files[0]
+    merged = '_gesamt' if len(files) > 1 else ''
+
+    if all(path.lower().endswith(ISC_EXTENSIONS) for path in files):
+        # Single files already run in parallel, merged ones may read their files in parallel as well
+        df = preparation.load_competition_preperation(files, settings, run, workers=None if merged else 1)
+        messages.extend(f'Unbekannte Altersklasse: {ak}' for ak in preparation.unknown_age_groups(df, settings))
+        path = output_path(file, output_dir, f'WWK_Meldungen{merged}', extension)
+        preparation.export_registrations(df, path, settings, run)
+        messages.append(path)
+
+        if gazetteer:
+            with run.stage('entfernungen') as stage:
+                gliederungen = df['gliederung'].unique()
+                distances = distance.calculate_distances(gazetteer, gliederungen, settings.venues, settings.aliases)
+                stage.rows = len(distances)
+            path = output_path(file, output_dir, f'Entfernungen{merged}', extension)
+            with run.stage('schreiben'):
+                write_tables(path, {'Entfernungen': distances}, index={'Entfernungen'})
+            messages.append(path)
+
+            for name in gazetteer.unmatched(gliederungen, settings.aliases):
+                candidates = gazetteer.suggest(name, limit=1)
+                hint = f' (Vorschlag: {candidates[0][1]}, {candidates[0][2]:.0%})' if candidates else ''
+                messages.append(f'Gliederung nicht gefunden: {name}{hint}')
+
+    elif len(files) == 1 and file.lower().endswith(JAUSWERTUNG_EXTENSIONS):
+        file_year = evaluation.creation_year(file)
+        if file_year != datetime.date.today().year:
+            messages.append(f'ACHTUNG: {file} ist aus dem Jahr {file_year}')
+
+        # The archive needs the scored results even if they are not written
+        result = evaluation.evaluate_file(file, settings, evaluate, rules, quelldaten or bool(archive), run)
+        messages.extend(f'Unbekannte Altersklasse: {ak}' for ak in result.unknown_age_groups)
+        if evaluate and archive:
+            from wettkampftools.archive import Archive
+            event = os.path.splitext(os.path.basename(file))[0]
+            with run.stage('archivieren') as stage:
+                stage.rows = Archive(archive).add(result.quelldaten, file_year, event, rules or ScoringRules.from_settings(settings), os.path.abspath(file))
+            messages.append(f'Archiviert als {event} ({file_year})')
+            if not quelldaten:
+                result.quelldaten = None
+        path = output_path(file, output_dir, 'WWK_Auswertung' if evaluate else 'Seriendruck', extension)
+        evaluation.write_evaluation(result, path, run)
+        messages.append(path)
+
+        if certificates:
+            from wettkampftools.certificates import write_certificates
+            # The files already run in parallel, one process per file is enough
+            messages += write_certificates(result.seriendruck, output_path(file, output_dir, 'Urkunden', '.pdf'), certificates,
+                                           'Altersklasse' if split_certificates else None, workers=1, run=run)
+
+    else:
+        raise ValueError(f'{file} ist weder eine CSV noch eine Excel Datei!')
+
+    return messages
+
+
+def process_task(task, *args):
+    """``process_file`` in a worker process.
+
+    Returns the status lines or the error, and the record of the run. The
+    main process writes the records, the log is not shared between processes.
+    """
+    files = [task] if isinstance(task, str) else task
+    run = Run('Kommandozeile', '; '.join(files))
+    try:
+        return process_file(task, *args, run=run), None, run.as_dict()
+    except Exception as e:
+        run.error = f'{type(e).__name__}: {e}'
+        return None, e, run.as_dict()
+
+
+def build_parser():
+    from wettkampftools.export import FORMATS
+
+    parser = argparse.ArgumentParser(prog='wettkampftools', description='Wettkampftools ohne Oberfläche ausführen.')
+    parser.add_argument('paths', nargs='+', metavar='EXPORT', help='ISC Exporte (*.csv), JAuswertung Exporte (*.xls, *.xlsx) oder Ordner')
+    parser.add_argument('-o', '--output', metavar='ORDNER', help='Ausgabeordner (Standard: neben der Eingabedatei)')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Anzahl paralleler Prozesse (Standard: Anzahl CPU Kerne)')
+    # Parquet is only offered if pyarrow or fastparquet is installed
+    parser.add_argument('-f', '--format', choices=[extension[1:] for extension in FORMATS], default='xlsx',
+                        help='Ausgabeformat, CSV und Parquet (benötigt pyarrow) schreiben eine Datei pro Tabelle (Standard: xlsx)')
+    parser.add_argument('-s', '--settings', metavar='JSON', help='Einstellungen aus einer JSON Datei laden')
+    parser.add_argument('-w', '--wertung', metavar='JSON', help='Wertungsregeln aus einer JSON Datei laden (Standard: Wellenwettkampf)')
+    parser.add_argument('--seriendruck', action='store_true', help='JAuswertung Exporte nur für den Urkunden Druck sortieren')
+    parser.add_argument('--urkunden', action='store_true', help='Urkunden der JAuswertung Exporte als PDF erstellen')
+    parser.add_argument('--urkunden-vorlage', metavar='JSON', help='Urkunden Vorlage aus einer JSON Datei laden (setzt --urkunden)')
+    parser.add_argument('--je-altersklasse', action='store_true', help='Urkunden je Altersklasse in eine eigene PDF schreiben')
+    parser.add_argument('--archiv', nargs='?', const='', metavar='DATEI',
+                        help='Auswertungen im Saisonarchiv speichern, optional in dieser Archivdatei (Abfragen: python -m wettkampftools.archive)')
+    parser.add_argument('--ohne-quelldaten', action='store_true', help='Quelldaten nicht mit in die Auswertung schreiben')
+    parser.add_argument('--zusammenfuehren', action='store_true',
+                        help='Alle ISC Exporte zu einer Meldeliste zusammenführen, doppelte Meldungen werden nur einmal gezählt')
+    parser.add_argument('--entfernungen', action='store_true', help='Entfernungen der Gliederungen zu den Veranstaltungsorten berechnen')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    settings = Settings.from_file(args.settings) if args.settings else Settings()
+    rules = ScoringRules.from_file(args.wertung) if args.wertung else None
+    certificates = None
+    if args.urkunden or args.urkunden_vorlage:
+        from wettkampftools.certificates import CertificateTemplate
+        certificates = CertificateTemplate.from_file(args.urkunden_vorlage) if args.urkunden_vorlage else CertificateTemplate()
+
+    files = collect_files(args.paths)
+    if not files:
+        print('Keine Exporte gefunden.', file=sys.stderr)
+        return 1
+
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+
+    archive = None
+    if args.archiv is not None:
+        from wettkampftools.archive import Archive
+        # Create the archive once before the workers write to it
+        archive = Archive(args.archiv or None).path
+
+    gazetteer_index = None
+    if args.entfernungen:
+        from wettkampftools.gazetteer import GazetteerCache
+        gazetteer = GazetteerCache()
+        try:
+            gazetteer.refresh()
+        except Exception as e:
+            print(f'Gliederungen konnten nicht aktualisiert werden, verwende Zwischenspeicher: {e}', file=sys.stderr)
+        gazetteer_index = gazetteer.index
+
+    tasks = files
+    if args.zusammenfuehren:
+        isc_files = [file for file in files if file.lower().endswith(ISC_EXTENSIONS)]
+        if len(isc_files) > 1:
+            tasks = [isc_files] + [file for file in files if file not in isc_files]
+
+    log = DiagnosticsLog()
+    failed = 0
+    # One file per worker, no need for more workers than files
+    max_workers = min(args.jobs or os.cpu_count() or 1, len(tasks))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(process_task, task, settings, args.output, not args.seriendruck, gazetteer_index, rules, not args.ohne_quelldaten, f'.{args.format}',
+                                   certificates, args.je_altersklasse, archive): task for task in tasks}
+        for future in as_completed(futures):
+            file = futures[future] if isinstance(futures[future], str) else ', '.join(futures[future])
+            try:
+                messages, error, record = future.result()
+                log.write(record)
+                if error is not None:
+                    raise error
+                for message in messages:
+                    print(f'{file}: {message}')
+            except Exception as e:
+                failed += 1
+                print(f'{file}: Fehler: {e}', file=sys.stderr)
+
+    return 1 if failed else 0
@@ -0,0 +1,216 @@
+"""Stage timings of the processing pipelines.
+
+A :class:`Run` collects how long each stage took and how many rows it
+produced::
+
+    with Run('Auswertung', source=path, log=DiagnosticsLog()) as run:
+        with run.stage('einlesen') as stage:
+            df = read(path)
+            stage.rows = len(df)
+
+A ``checkpoint`` is called before every stage, e.g. to stop a cancelled
+job between reading and scoring. Finished runs, failed ones included, are
+appended as one JSON object per line to a log that is rotated once it gets
+too big.
+
+The memory of a run is the largest resident set sampled before and after
+each of its stages, tracemalloc would slow pandas down too much. The peak
+of the whole process is logged as well, in the long running GUI it only
+says something about the largest run so far.
+"""
+import ctypes
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+from wettkampftools.gazetteer import default_cache_dir
+
+LOG_FILE = 'diagnostics.jsonl'
+MAX_BYTES = 256 * 1024
+BACKUPS = 2
+
+
+def memory_mb():
+    """Current and peak resident memory of the process in MB, None if unknown."""
+    if sys.platform == 'win32':
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + \
+                       [(name, ctypes.c_size_t) for name in ('PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage',
+                                                             'QuotaPagedPoolUsage', 'QuotaPeakNonPagedPoolUsage',
+                                                             'QuotaNonPagedPoolUsage', 'PagefileUsage', 'PeakPagefileUsage')]
+
+        kernel32 = ctypes.windll.kernel32
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        kernel32.K32GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(ProcessMemoryCounters), wintypes.DWORD]
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        if not kernel32.K32GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+            return None, None
+        return counters.WorkingSetSize / 2 ** 20, counters.PeakWorkingSetSize / 2 ** 20
+
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    peak = peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+    try:
+        with open('/proc/self/statm') as file:
+            current = int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        current = None
+    return current, peak
+
+
+@dataclass
+class Stage:
+    name: str
+    ms: float = 0.0
+    rows: int = None
+    # Resident memory at the end of the stage
+    memory_mb: float = None
+
+
+class Run:
+    """Timings of one run of a pipeline, e.g. evaluating a JAuswertung export."""
+    def __init__(self, name=None, source=None, log=None, checkpoint=None):
+        self.name = name
+        self.source = source
+        self.log = log
+        self.checkpoint = checkpoint
+        self.error = None
+        self.stages = []
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self.peak_memory_mb = memory_mb()[0]
+
+    def sample_memory(self):
+        """Current resident memory, it also raises the peak of this run."""
+        current = memory_mb()[0]
+        if current is not None:
+            self.peak_memory_mb = max(self.peak_memory_mb or 0, current)
+        return current
+
+    @contextmanager
+    def stage(self, name):
+        if self.checkpoint is not None:
+            self.checkpoint()
+        stage = Stage(name)
+        self.sample_memory()
+        start = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage.ms = round((time.perf_counter() - start) * 1000, 1)
+            current = self.sample_memory()
+            stage.memory_mb = None if current is None else round(current, 1)
+            self.stages.append(stage)
+
+    def as_dict(self):
+        current = self.sample_memory()
+        process_peak = memory_mb()[1]
+        peak = self.peak_memory_mb
+        # Both are measured differently, the run can not exceed the process
+        if peak is not None and process_peak is not None:
+            peak = min(peak, process_peak)
+        return {
+            'started': self.started,
+            'name': self.name,
+            'source': self.source,
+            'ms': round((time.perf_counter() - self._start) * 1000, 1),
+            'memory_mb': None if current is None else round(current, 1),
+            'peak_memory_mb': None if peak is None else round(peak, 1),
+            'process_peak_memory_mb': None if process_peak is None else round(process_peak, 1),
+            'stages': [asdict(stage) for stage in self.stages],
+            'error': self.error,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc is not None:
+            self.error = f'{exc_type.__name__}: {exc}'
+        if self.log is not None:
+            self.log.write(self.as_dict())
+
+
+class DiagnosticsLog:
+    """JSON lines log of finished runs, rotated to ``.1``, ``.2``, ... after ``max_bytes``."""
+    def __init__(self, directory=None, max_bytes=MAX_BYTES, backups=BACKUPS):
+        self.path = os.path.join(directory or default_cache_dir(), LOG_FILE)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+
+    def files(self):
+        """Log files, newest first."""
+        return [self.path] + [f'{self.path}.{number}' for number in range(1, self.backups + 1)]
+
+    def _rotate(self):
+        files = self.files()
+        for older, newer in zip(reversed(files), reversed(files[:-1])):
+            if os.path.exists(newer):
+                os.replace(newer, older)
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if os.path.exists(self.path) and os.path.getsize(self.path) + len(line) > self.max_bytes:
+                self._rotate()
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.write(line)
+
+    def last(self, count=20):
+        """The last ``count`` runs, newest first."""
+        records = []
+        with self._lock:
+            for path in self.files():
+                if not os.path.exists(path):
+                    break
+                with open(path, encoding='utf-8') as file:
+                    lines = file.readlines()
+                for line in reversed(lines):
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # Line cut off by a crash
+                        continue
+                    if len(records) == count:
+                        return records
+        return records
+
+
+def runs_table(records):
+    """One row per run with the milliseconds of every stage as columns."""
+    import pandas as pd
+
+    rows = []
+    for record in records:
+        row = {
+            'Zeitpunkt': time.strftime('%d.%m.%Y %H:%M:%S', time.localtime(record['started'])),
+            'Ablauf': record['name'],
+            # Several files are joined by '; '
+            'Datei': '; '.join(os.path.basename(source) for source in (record['source'] or '').split('; ')),
+            'Gesamt (ms)': record['ms'],
+        }
+        for stage in record['stages']:
+            row[f"{stage['name']} (ms)"] = stage['ms']
+        row['Zeilen'] = max((stage['rows'] for stage in record['stages'] if stage['rows'] is not None), default='')
+        # Runs logged before the memory was sampled per run only have the process peak
+        row['Speicher (MB)'] = (record['peak_memory_mb'] or '') if 'process_peak_memory_mb' in record else ''
+        row['Prozessspitze (MB)'] = record.get('process_peak_memory_mb', record['peak_memory_mb']) or ''
+        row['Fehler'] = record.get('error') or ''
+        rows.append(row)
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+    # Stage columns between the total and the row count
+    stages = [column for column in df.columns if column.endswith('(ms)') and column != 'Gesamt (ms)']
+    # Stages a pipeline does not have stay empty
+    return df[['Zeitpunkt', 'Ablauf', 'Datei', 'Gesamt (ms)', *stages, 'Zeilen', 'Speicher (MB)', 'Prozessspitze (MB)', 'Fehler']].fillna('')
@@ -0,0 +1,97 @@
+import datetime
+import os
+import platform
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from wettkampftools.diagnostics import Run
+from wettkampftools.export import write_tables
+from wettkampftools.labels import category_mask, map_categories, unknown_labels
+from wettkampftools.scoring import ScoringRules, score
+from wettkampftools.workbook import read_jauswertung
+
+
+@dataclass
+class Evaluation:
+    """Result of evaluating a JAuswertung export."""
+    seriendruck: pd.DataFrame
+    # Ranking name (e.g. 'Rettungswettkampf') -> club ranking
+    rankings: dict = field(default_factory=dict)
+    quelldaten: pd.DataFrame = None
+    # Age groups of the Seriendruck sheet that are not in the settings
+    unknown_age_groups: list = field(default_factory=list)
+
+
+def creation_year(path_to_file):
+    '''
+    Try to get the year that a file was created, falling back to when it was
+    last modified if that isn't possible.
+    See http://stackoverflow.com/a/39501288/1709587 for explanation.
+    '''
+    if platform.system() == 'Windows':
+        creation_year = datetime.date.fromtimestamp(os.path.getctime(path_to_file)).year
+        last_change_year = datetime.date.fromtimestamp(os.path.getmtime(path_to_file)).year
+        return min(creation_year, last_change_year)
+    else:
+        stat = os.stat(path_to_file)
+        try:
+            date = stat.st_birthtime
+        except AttributeError:
+            # We're probably on Linux. No easy way to get creation dates here,
+            # so we'll settle for when its content was last modified.
+            date = stat.st_mtime
+
+        return datetime.date.fromtimestamp(date).year
+
+
+def sort_seriendruck(seriendruck, settings):
+    """Normalize the age groups of the Seriendruck sheet and sort it for printing the certificates."""
+    seriendruck = seriendruck.copy()
+    age_groups = settings.age_group_registry
+    # Fix names when something is wrong and predefine the category sort, once per distinct age group
+    seriendruck['Altersklasse'] = map_categories(seriendruck['Altersklasse'], lambda labels: labels.map(age_groups.canonical).fillna(labels),
+                                                 age_groups.dtype)
+
+    seriendruck['WWK'] = np.where(category_mask(seriendruck['Altersklasse'], lambda labels: labels.map(age_groups.is_wwk)), 'x', '')
+    # Sort values
+    seriendruck.sort_values(by=['Altersklasse', 'Geschlecht', 'Platz'], ascending=[True, False, False], inplace=True)
+    return seriendruck
+
+
+def evaluate_file(path, settings, evaluate=True, rules=None, quelldaten=True, run=None):
+    """Sort the certificates of a JAuswertung export and, if requested, evaluate the competition.
+
+    Without explicit ``rules`` the Wellenwettkampf rules are used. Without
+    ``quelldaten`` only the columns needed for scoring are read from the
+    'Daten' sheet and the source data is not part of the result.
+    """
+    rules = rules or ScoringRules.from_settings(settings)
+    run = run or Run()
+    with run.stage('einlesen') as stage:
+        sheets = read_jauswertung(path, daten_columns=None if quelldaten else rules.columns, daten=evaluate)
+        stage.rows = sum(len(sheet) for sheet in sheets.values())
+
+    with run.stage('seriendruck') as stage:
+        seriendruck = sort_seriendruck(sheets['Seriendruck'], settings)
+        stage.rows = len(seriendruck)
+    unknown = unknown_labels(seriendruck['Altersklasse'], settings.age_group_dtype)
+    if not evaluate:
+        return Evaluation(seriendruck, unknown_age_groups=unknown)
+
+    with run.stage('wertung') as stage:
+        df, rankings = score(sheets['Daten'], rules)
+        stage.rows = len(df)
+    return Evaluation(seriendruck, rankings, df if quelldaten else None, unknown)
+
+
+def write_evaluation(evaluation, path, run=None):
+    """Write the evaluation as Excel workbook, or as one CSV/Parquet file per table."""
+    run = run or Run()
+    tables = {'Seriendruck': evaluation.seriendruck, **evaluation.rankings}
+    if evaluation.quelldaten is not None:
+        tables['Quelldaten'] = evaluation.quelldaten
+    with run.stage('schreiben') as stage:
+        write_tables(path, tables, index=evaluation.rankings)
+        stage.rows = sum(len(table) for table in tables.values())
@@ -0,0 +1,114 @@
+"""Writing tables to Excel, CSV or Parquet.
+
+Excel workbooks are written with XlsxWriter in ``constant_memory`` mode: every
+row is flushed to disk right after it was written, so exporting large source
+data does not keep the whole workbook in memory. Column widths and formats
+are set once per column before the first row.
+
+Parquet needs pyarrow or fastparquet, it is only offered if one of them is
+installed.
+"""
+import importlib.util
+import os
+
+import pandas as pd
+import xlsxwriter
+
+PARQUET_ENGINES = ('pyarrow', 'fastparquet')
+
+FORMATS = {
+    '.xlsx': 'Excel (*.xlsx)',
+    '.csv': 'CSV (*.csv)',
+}
+if any(importlib.util.find_spec(engine) for engine in PARQUET_ENGINES):
+    FORMATS['.parquet'] = 'Parquet (*.parquet)'
+
+# Rows converted to Python objects at a time
+CHUNK_SIZE = 10000
+# Rows looked at to guess the width of a column
+WIDTH_SAMPLE = 1000
+MAX_WIDTH = 50
+
+
+def file_filter():
+    """Filter string for file dialogs, Excel first."""
+    return ';;'.join(FORMATS.values())
+
+
+def with_extension(path, file_filter=None):
+    """Append the extension of the selected dialog filter if the path has none we know."""
+    if os.path.splitext(path)[1].lower() in FORMATS:
+        return path
+    extension = next((ext for ext, name in FORMATS.items() if name == file_filter), '.xlsx')
+    return path + extension
+
+
+def table_path(path, name, count):
+    """CSV and Parquet files hold one table, further tables get their own file next to it."""
+    if count == 1:
+        return path
+    stem, extension = os.path.splitext(path)
+    return f'{stem}_{name}{extension}'
+
+
+def column_width(header, values):
+    sample = values.iloc[:WIDTH_SAMPLE].dropna().astype(str)
+    width = max([len(str(header)), *sample.str.len()]) if len(sample) else len(str(header))
+    return min(width + 2, MAX_WIDTH)
+
+
+def write_sheet(workbook, name, df, index, formats):
+    if index:
+        df = df.reset_index()
+        header = ['' if df.columns[0] == 'index' else df.columns[0], *df.columns[1:]]
+    else:
+        header = list(df.columns)
+
+    worksheet = workbook.add_worksheet(name)
+    for col, column in enumerate(df.columns):
+        values = df[column]
+        cell_format = formats['date'] if pd.api.types.is_datetime64_any_dtype(values) else None
+        worksheet.set_column(col, col, column_width(header[col], values), cell_format)
+    worksheet.write_row(0, 0, header, formats['header'])
+
+    row = 1
+    for start in range(0, len(df), CHUNK_SIZE):
+        chunk = df.iloc[start:start + CHUNK_SIZE].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        for values in chunk.itertuples(index=False, name=None):
+            worksheet.write_row(row, 0, values)
+            row += 1
+
+
+def write_excel(path, tables, index=()):
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'nan_inf_to_errors': True})
+    formats = {
+        'header': workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}),
+        'date': workbook.add_format({'num_format': 'dd.mm.yyyy'}),
+    }
+    try:
+        for name, df in tables.items():
+            write_sheet(workbook, name, df, name in index, formats)
+    finally:
+        workbook.close()
+
+
+def write_tables(path, tables, index=()):
+    """Write ``tables`` (name -> DataFrame) to ``path``, the format is taken from the extension.
+
+    ``index`` names the tables whose index is written as first column.
+    Excel gets one sheet per table, CSV and Parquet one file per table.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.parquet' and extension not in FORMATS:
+        raise ValueError('Parquet Dateien benötigen pyarrow, bitte mit "pip install pyarrow" installieren oder Excel/CSV wählen')
+    if extension == '.xlsx':
+        write_excel(path, tables, index)
+    elif extension == '.csv':
+        for name, df in tables.items():
+            df.to_csv(table_path(path, name, len(tables)), sep=';', index=name in index, encoding='utf-8-sig')
+    elif extension == '.parquet':
+        for name, df in tables.items():
+            df.to_parquet(table_path(path, name, len(tables)), index=name in index)
+    else:
+        raise ValueError(f'Unbekanntes Dateiformat: {extension or path}')
@@ -0,0 +1,150 @@
+"""On-disk cache of the DLRG Gliederungen (gazetteer).
+
+The data lives in a gzip compressed JSON file next to a small metadata file
+holding the ETag/Last-Modified of the last download and its timestamp.
+Checking whether the cache is fresh only reads the metadata, the data itself
+is loaded on first access.
+"""
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+
+GLIEDERUNGEN_URL = 'https://services.dlrg.net/service.php?doc=poi&strict=1&limit=5000'
+
+CACHE_VERSION = 1
+DATA_FILE = 'gliederungen.json.gz'
+META_FILE = 'gliederungen.meta.json'
+
+
+def default_cache_dir():
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+        return os.path.join(base, 'Wettkampftools')
+    return os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'wettkampftools')
+
+
+def compact(entries):
+    """Keep only what the distance calculation needs of the Gld entries."""
+    return [{'lat': entry.get('lat'), 'lon': entry.get('lon'),
+             'pois': [{'name': poi.get('name')} for poi in entry.get('pois', []) if isinstance(poi, dict)]}
+            for entry in entries if isinstance(entry, dict) and entry.get('typ') == 'Gld']
+
+
+class GazetteerCache:
+    def __init__(self, directory=None):
+        self.directory = directory or default_cache_dir()
+        self._lock = threading.Lock()
+        self._data = None
+        self._index = None
+        self.meta = self._read_meta()
+
+    @property
+    def data_path(self):
+        return os.path.join(self.directory, DATA_FILE)
+
+    @property
+    def meta_path(self):
+        return os.path.join(self.directory, META_FILE)
+
+    def _read_meta(self):
+        try:
+            with open(self.meta_path, encoding='utf-8') as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        # Metadata of an older cache layout is ignored and the data downloaded again
+        return meta if meta.get('version') == CACHE_VERSION and os.path.exists(self.data_path) else {}
+
+    def _write_meta(self):
+        with open(self.meta_path, 'w', encoding='utf-8') as file:
+            json.dump(self.meta, file)
+
+    @property
+    def updated(self):
+        """Timestamp of the last successful check against the server."""
+        return self.meta.get('updated', 0.0)
+
+    @property
+    def count(self):
+        return self.meta.get('count', 0)
+
+    def is_fresh(self, ttl):
+        return bool(self.count) and time.time() - self.updated < ttl
+
+    @property
+    def data(self):
+        """The Gld entries, loaded from disk on first access."""
+        with self._lock:
+            return self._loaded()
+
+    @property
+    def index(self):
+        """Name index over the data, built once per downloaded version."""
+        # Built under the lock store() swaps the data with, a refresh on a worker
+        # thread never leaves an index of the previous data behind
+        with self._lock:
+            if self._index is None:
+                # pandas is only needed once distances are calculated
+                from wettkampftools.distance import GazetteerIndex
+                self._index = GazetteerIndex(self._loaded())
+            return self._index
+
+    def _loaded(self):
+        if self._data is None:
+            self._data = self._load()
+        return self._data
+
+    def _load(self):
+        if not self.meta:
+            return []
+        try:
+            with gzip.open(self.data_path, 'rt', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return []
+
+    def store(self, entries, etag=None, last_modified=None):
+        entries = compact(entries)
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            # Write to a temporary file first so a crash never leaves half a cache
+            tmp_path = f'{self.data_path}.tmp'
+            with gzip.open(tmp_path, 'wt', encoding='utf-8') as file:
+                json.dump(entries, file, separators=(',', ':'), ensure_ascii=False)
+            os.replace(tmp_path, self.data_path)
+
+            self._data = entries
+            self._index = None
+            self.meta = {'version': CACHE_VERSION, 'etag': etag, 'last_modified': last_modified,
+                         'updated': time.time(), 'count': len(entries)}
+            self._write_meta()
+
+    def refresh(self, timeout=(5, 30)):
+        """Download the Gliederungen if they changed on the server.
+
+        Returns True if new data was stored, False if the cached data is
+        still current (HTTP 304).
+        """
+        import requests
+
+        with self._lock:
+            meta = dict(self.meta)
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+        response = requests.get(GLIEDERUNGEN_URL, headers=headers, timeout=timeout)
+        if response.status_code == 304:
+            with self._lock:
+                self.meta['updated'] = time.time()
+                self._write_meta()
+            return False
+        response.raise_for_status()  # Check for request errors
+
+        self.store(response.json().get("locs", []), response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return True
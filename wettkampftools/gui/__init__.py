@@ -0,0 +1 @@
+"""Qt building blocks of the desktop application (requires PyQt6)."""
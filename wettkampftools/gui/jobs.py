@@ -0,0 +1,141 @@
+"""Background jobs so parsing, scoring and exporting never block the GUI thread.
+
+A job is a plain function that receives the running :class:`Job` as first
+argument. It can report progress with ``job.progress('Text', 50)``, which
+also raises :class:`JobCancelled` once the user cancelled the job, just like
+``job.check_cancelled()`` between longer steps. Results, errors and progress
+are delivered to the GUI thread through Qt signals.
+
+A cancelled job is released at once, the pages are usable again while it
+runs on to its next checkpoint. Its result and errors are dropped.
+"""
+import threading
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobSignals(QObject):
+    # Text and percent, -1 if the progress is unknown
+    progress = pyqtSignal(str, int)
+    result = pyqtSignal(object)
+    error = pyqtSignal(Exception)
+    finished = pyqtSignal()
+
+
+class Job(QRunnable):
+    def __init__(self, name, fn, *args, background=False, **kwargs):
+        super().__init__()
+        # The JobManager keeps the reference until the job is finished
+        self.setAutoDelete(False)
+        self.name = name
+        # Background jobs (e.g. network updates) do not block the pages
+        self.background = background
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = JobSignals()
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+    def progress(self, text, percent=-1):
+        self.check_cancelled()
+        self.signals.progress.emit(text, percent)
+
+    def run(self):
+        try:
+            result = self.fn(self, *self.args, **self.kwargs)
+            self.check_cancelled()
+        except JobCancelled:
+            pass
+        except Exception as e:
+            if not self.cancelled:
+                self.signals.error.emit(e)
+        else:
+            self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()
+
+
+class JobManager(QObject):
+    """Runs jobs on a thread pool, at most one job per name at a time.
+
+    ``busy`` and ``busy_changed`` only consider foreground jobs.
+    """
+    busy_changed = pyqtSignal(bool)
+    progress = pyqtSignal(str, int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.jobs = {}
+        # Cancelled jobs that are still running, kept alive until they finish
+        self.stopping = set()
+
+    @property
+    def busy(self):
+        return any(not job.background for job in self.jobs.values())
+
+    def is_running(self, name):
+        return name in self.jobs
+
+    def start(self, name, fn, *args, on_result=None, on_error=None, background=False, **kwargs):
+        """Queue ``fn`` as job ``name``. Returns None if that job is already running."""
+        if name in self.jobs:
+            return None
+
+        job = Job(name, fn, *args, background=background, **kwargs)
+        if not background:
+            job.signals.progress.connect(self.progress)
+        # A job cancelled after it emitted is already released, the queued signal is ignored
+        if on_result:
+            job.signals.result.connect(lambda result: job.cancelled or on_result(result))
+        if on_error:
+            job.signals.error.connect(lambda e: job.cancelled or on_error(e))
+        job.signals.finished.connect(lambda: self._finished(job))
+
+        was_busy = self.busy
+        self.jobs[name] = job
+        if self.busy != was_busy:
+            self.busy_changed.emit(True)
+        self.pool.start(job)
+        return job
+
+    def cancel(self, name=None):
+        """Cancel the job ``name`` or all foreground jobs."""
+        if name is None:
+            jobs = [job for job in self.jobs.values() if not job.background]
+        else:
+            jobs = [self.jobs[name]] if name in self.jobs else []
+
+        for job in jobs:
+            job.cancel()
+            # Jobs still waiting in the queue never run, running ones stop at their next checkpoint
+            if not self.pool.tryTake(job):
+                self.stopping.add(job)
+            self._release(job)
+
+    def _finished(self, job):
+        self.stopping.discard(job)
+        self._release(job)
+
+    def _release(self, job):
+        # A newer job with the same name is not touched by a late finished signal
+        if self.jobs.get(job.name) is job:
+            was_busy = self.busy
+            del self.jobs[job.name]
+            if self.busy != was_busy:
+                self.busy_changed.emit(False)
@@ -0,0 +1,163 @@
+"""Qt item models for pandas data."""
+import numpy as np
+import pandas as pd
+from PyQt6.QtCore import QAbstractListModel, QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+
+
+class PandasModel(QAbstractTableModel):
+    """Read-only table model for a DataFrame.
+
+    Display strings are formatted once per column when the model is created.
+    Sorting and filtering only reorder an array of row positions, the
+    DataFrame itself is never copied. Rows are handed to the view in batches
+    through ``canFetchMore``/``fetchMore`` so large frames open instantly.
+    """
+    def __init__(self, dataframe, batch_size=500):
+        super().__init__()
+        self._dataframe = dataframe if dataframe is not None else pd.DataFrame()
+        self._batch_size = batch_size
+
+        self._columns = [column.astype(str).to_numpy(dtype=object) for _, column in self._dataframe.items()]
+        self._headers = [str(column) for column in self._dataframe.columns]
+        self._index = self._dataframe.index.astype(str).to_numpy(dtype=object)
+        # Lower-cased copies for filtering, created on first use
+        self._search_columns = None
+
+        self._order = np.arange(len(self._dataframe))
+        self._mask = None
+        self._rows = self._order
+        self._loaded = min(len(self._rows), batch_size)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        """Return the number of rows handed to the view so far."""
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        """Return the number of columns in the dataframe."""
+        return 0 if parent.isValid() else len(self._columns)
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and self._loaded < len(self._rows)
+
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(self._batch_size, len(self._rows) - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        """Return the data for the given index."""
+        if role == Qt.ItemDataRole.DisplayRole and index.isValid():
+            return self._columns[index.column()][self._rows[index.row()]]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        """Provide headers for the table view."""
+        if role == Qt.ItemDataRole.DisplayRole:
+            if orientation == Qt.Orientation.Horizontal:
+                return self._headers[section]
+            elif orientation == Qt.Orientation.Vertical:
+                return self._index[self._rows[section]]
+        return None
+
+    def source_row(self, row):
+        """Position in the DataFrame of a row of the view."""
+        return int(self._rows[row])
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        if not 0 <= column < len(self._columns):
+            return
+        series = self._dataframe.iloc[:, column].reset_index(drop=True)
+        ascending = order == Qt.SortOrder.AscendingOrder
+        self._order = series.sort_values(ascending=ascending, kind='stable', na_position='last').index.to_numpy()
+        self._update_rows()
+
+    def set_filter(self, text):
+        """Show only rows where any column contains ``text`` (case-insensitive)."""
+        if not text:
+            self._mask = None
+        else:
+            if self._search_columns is None:
+                self._search_columns = [pd.Series(column).str.lower() for column in self._columns]
+            text = text.lower()
+            mask = np.zeros(len(self._dataframe), dtype=bool)
+            for column in self._search_columns:
+                mask |= column.str.contains(text, regex=False).to_numpy(dtype=bool)
+            self._mask = mask
+        self._update_rows()
+
+    def _update_rows(self):
+        self.beginResetModel()
+        self._rows = self._order if self._mask is None else self._order[self._mask[self._order]]
+        self._loaded = min(len(self._rows), self._batch_size)
+        self.endResetModel()
+
+
+class TeamSelectionModel(QAbstractListModel):
+    """Checkable list of the teams of one Gliederung.
+
+    The check state is read from and written straight to the ``start_as_akw``
+    column of the preparation frame. Rows of every Gliederung are looked up
+    once when the model is created, switching the Gliederung only swaps an
+    array of row positions.
+    """
+    # Emitted whenever the selection in the frame changed, shown or not
+    selection_changed = pyqtSignal()
+
+    def __init__(self, dataframe, parent=None):
+        super().__init__(parent)
+        self._dataframe = dataframe
+        self._column = dataframe.columns.get_loc('start_as_akw')
+        self._labels = (dataframe['name'].astype(str) + ' ' + dataframe['ak'].astype(str) + ' ' + dataframe['geschlecht'].astype(str)).to_numpy(dtype=object)
+        self._clubs = dataframe.groupby('gliederung', sort=False, observed=True).indices
+        self._rows = np.empty(0, dtype=int)
+
+    @property
+    def clubs(self):
+        return list(self._clubs)
+
+    def set_club(self, club):
+        self.beginResetModel()
+        self._rows = self._clubs.get(club, np.empty(0, dtype=int))
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._labels[row]
+        if role == Qt.ItemDataRole.CheckStateRole:
+            return Qt.CheckState.Checked if self._dataframe.iat[row, self._column] else Qt.CheckState.Unchecked
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if role != Qt.ItemDataRole.CheckStateRole or not index.isValid():
+            return False
+        self._dataframe.iat[self._rows[index.row()], self._column] = Qt.CheckState(value) == Qt.CheckState.Checked
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.CheckStateRole])
+        self.selection_changed.emit()
+        return True
+
+    def flags(self, index):
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsUserCheckable
+
+    def set_checked(self, positions, checked):
+        """Set the check state of many rows (DataFrame positions) at once."""
+        self._dataframe.iloc[positions, self._column] = checked
+        if len(self._rows):
+            self.dataChanged.emit(self.index(0), self.index(len(self._rows) - 1), [Qt.ItemDataRole.CheckStateRole])
+        self.selection_changed.emit()
+
+    def set_club_checked(self, checked):
+        """Select or deselect every team of the shown Gliederung."""
+        self.set_checked(self._rows, checked)
+
+    def set_age_group_checked(self, age_group, checked):
+        """Select or deselect the teams of an age group in all Gliederungen."""
+        self.set_checked(np.flatnonzero((self._dataframe['ak'] == age_group).to_numpy(dtype=bool)), checked)
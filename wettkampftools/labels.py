@@ -0,0 +1,97 @@
+"""Label columns (Gliederung, Altersklasse, Geschlecht) as categoricals.
+
+The label columns of the ISC and JAuswertung exports repeat a few hundred
+distinct values over thousands of rows. They are loaded as categoricals, so
+cleaning them up only touches the distinct values and grouping and sorting
+work on the integer codes::
+
+    df['ak'] = map_categories(df['ak'], lambda labels: labels.str.upper())
+
+Categories that are not part of the age group dtype are kept after the known
+ones instead of turning into missing values, :func:`unknown_labels` reports
+them.
+"""
+import functools
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+ISC_LABELS = ('gliederung', 'ak', 'geschlecht')
+JAUSWERTUNG_LABELS = ('Gliederung', 'Altersklasse', 'Geschlecht')
+
+
+@functools.lru_cache(maxsize=8)
+def age_group_dtype(age_groups):
+    """Categorical dtype of the age groups in sort order, built once per tuple of labels."""
+    return pd.CategoricalDtype(list(dict.fromkeys(age_groups)))
+
+
+def as_categorical(series):
+    return series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype('category')
+
+
+def categorize(df, columns):
+    """Convert the ``columns`` of ``df`` that exist to categoricals, in place."""
+    for column in columns:
+        if column in df:
+            df[column] = as_categorical(df[column])
+    return df
+
+
+def concat(frames, columns):
+    """Concatenate frames, the label ``columns`` stay categoricals even if their categories differ."""
+    df = pd.concat(frames, ignore_index=True)
+    for column in columns:
+        if column in df:
+            df[column] = pd.Series(union_categoricals([as_categorical(frame[column]) for frame in frames], sort_categories=True),
+                                   index=df.index, name=column)
+    return df
+
+
+def map_categories(series, fn, dtype=None):
+    """Apply ``fn`` to the distinct values of a categorical column only.
+
+    ``fn`` gets the categories as a Series of strings and returns the new
+    labels, categories that end up equal are merged. The new categories are
+    sorted, so sorting by the column still sorts by text. With ``dtype`` the
+    column is recoded to its categories in the same step, new labels that
+    it does not know are appended after them.
+    """
+    series = as_categorical(series)
+    labels = pd.Index(np.asarray(fn(pd.Series(series.cat.categories, dtype=object)), dtype=object))
+    if dtype is None:
+        dtype = pd.CategoricalDtype(labels.unique().sort_values())
+    else:
+        unknown = labels.unique().difference(dtype.categories)
+        dtype = pd.CategoricalDtype([*dtype.categories, *unknown]) if len(unknown) else dtype
+    # Code -1 (missing value) picks the trailing -1, the rows are only touched by this one take
+    codes = np.append(dtype.categories.get_indexer(labels), -1)[series.cat.codes.to_numpy()]
+    return pd.Series(pd.Categorical.from_codes(codes, dtype=dtype), index=series.index, name=series.name)
+
+
+def category_mask(series, predicate):
+    """Boolean mask of the rows whose label fulfills ``predicate``, evaluated once per category."""
+    series = as_categorical(series)
+    matches = np.asarray(predicate(pd.Series(series.cat.categories, dtype=object)), dtype=bool)
+    return pd.Series(np.append(matches, False)[series.cat.codes.to_numpy()], index=series.index)
+
+
+def common_dtype(dtype, *columns):
+    """``dtype`` extended by the labels of ``columns`` it does not know, in sorted order after the known ones."""
+    unknown = pd.Index([], dtype=object)
+    for column in columns:
+        unknown = unknown.union(as_categorical(column).cat.categories.difference(dtype.categories))
+    return pd.CategoricalDtype([*dtype.categories, *unknown]) if len(unknown) else dtype
+
+
+def with_categories(series, dtype):
+    """Recode to the categories of ``dtype``, unknown labels are appended after them."""
+    return series.astype(common_dtype(dtype, series))
+
+
+def unknown_labels(series, dtype):
+    """Labels of ``series`` that are not categories of ``dtype``, only those that occur."""
+    series = as_categorical(series)
+    counts = np.bincount(series.cat.codes.to_numpy() + 1, minlength=len(series.cat.categories) + 1)[1:]
+    return sorted(series.cat.categories[counts > 0].difference(dtype.categories))
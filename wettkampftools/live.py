@@ -0,0 +1,63 @@
+"""Incremental evaluation while a competition is running.
+
+JAuswertung rewrites its export after every heat. :class:`LiveEvaluation`
+compares each new version of the 'Daten' sheet with the previous one group
+by group (age group and gender) and only scores the groups that changed.
+The club rankings are then summed up from the stored points per group.
+"""
+import pandas as pd
+
+from wettkampftools.scoring import award_points, club_totals, rankings_from_totals
+from wettkampftools.workbook import read_sheets
+
+
+def as_multiindex(index):
+    return index if isinstance(index, pd.MultiIndex) else pd.MultiIndex.from_arrays([index])
+
+
+class LiveEvaluation:
+    def __init__(self, rules):
+        self.rules = rules
+        # Group key -> (sum of row hashes, number of rows) of the last version
+        self.signatures = pd.DataFrame(columns=['sum', 'size'])
+        self.data = None
+        # Points per (*group key, ranking, club)
+        self.totals_by_group = None
+        self.rankings = rankings_from_totals(pd.Series(dtype=float, index=pd.MultiIndex.from_arrays([[], []])), rules)
+
+    def read(self, path):
+        """Read the columns needed for scoring from the 'Daten' sheet."""
+        return read_sheets(path, {'Daten': set(self.rules.columns)})['Daten']
+
+    def update(self, daten):
+        """Apply a new version of the 'Daten' sheet and return the changed groups."""
+        keys = pd.MultiIndex.from_frame(daten[self.rules.group_by])
+        # Places are integers once every team has one, the same value must keep its hash
+        numeric = daten.select_dtypes('number').columns
+        hashes = pd.Series(pd.util.hash_pandas_object(daten.astype(dict.fromkeys(numeric, float)), index=False).to_numpy(), index=keys)
+        signatures = hashes.groupby(level=list(range(keys.nlevels))).agg(['sum', 'size'])
+        signatures.index = as_multiindex(signatures.index)
+
+        previous = self.signatures.reindex(signatures.index)
+        changed = signatures.index[(previous['sum'] != signatures['sum']) | (previous['size'] != signatures['size'])]
+        removed = self.signatures.index.difference(signatures.index)
+        changed = changed.append(removed) if len(removed) else changed
+        self.signatures = signatures
+        if not len(changed):
+            return changed
+
+        scored = award_points(daten[keys.isin(changed)], self.rules)
+        totals = club_totals(scored, self.rules, by=self.rules.group_by)
+
+        if self.data is None:
+            self.data = scored
+            self.totals_by_group = totals
+        else:
+            # Replace the rows and points of the changed groups
+            kept = ~pd.MultiIndex.from_frame(self.data[self.rules.group_by]).isin(changed)
+            self.data = pd.concat([self.data[kept], scored])
+            groups = as_multiindex(self.totals_by_group.index.droplevel(['ranking', self.rules.club]))
+            self.totals_by_group = pd.concat([self.totals_by_group[~groups.isin(changed)], totals])
+
+        self.rankings = rankings_from_totals(self.totals_by_group.groupby(level=['ranking', self.rules.club], observed=True).sum(), self.rules)
+        return changed
@@ -0,0 +1,339 @@
+"""Live results for hall displays and phones in the local network.
+
+A small HTTP server that shows the current standings while a competition is
+running::
+
+    python -m wettkampftools.live_server JAuswertung.xlsx --port 8765
+
+======================  ==================================================
+``/``                   Standings of all rankings, links to the age groups
+``/ak/<Altersklasse>``  Results of one age group
+``/api/standings``      Standings as JSON
+``/api/ak``             Age groups with results as JSON
+``/api/ak/<...>``       Results of one age group as JSON
+``/events``             Server-sent events, ``update`` after every evaluation
+======================  ==================================================
+
+Every response is rendered once when an evaluation is published and then
+served from memory, clients revalidate with the ETag. Requests never touch
+the scoring, a dozen displays cost next to nothing. Only clients from
+private, loopback and link-local addresses are answered.
+"""
+import argparse
+import datetime
+import html
+import ipaddress
+import json
+import os
+import secrets
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote, urlsplit
+
+DEFAULT_PORT = 8765
+# Seconds between keep-alive comments on the event stream
+KEEPALIVE = 15
+
+STYLE = '''
+body { font-family: sans-serif; background: #111; color: #eee; margin: 1em 2em; }
+h1 { font-size: 2em; margin: 0 0 .2em; } h2 { margin: 1em 0 .3em; }
+.stand { color: #aaa; margin-bottom: 1em; }
+.rankings { display: flex; flex-wrap: wrap; gap: 3em; }
+table { border-collapse: collapse; font-size: 1.4em; min-width: 20em; }
+th, td { padding: .2em .6em; text-align: left; } td.n { text-align: right; }
+tr:nth-child(even) { background: #222; }
+a { color: #fc0; } nav a { margin-right: 1em; font-size: 1.2em; }
+'''
+
+# Reload once the server serves another version than the one shown, also after a restart of the server
+SCRIPT = '''
+const events = new EventSource('/events');
+events.addEventListener('update', e => { if (JSON.parse(e.data).version !== VERSION) location.reload(); });
+'''
+
+
+def is_local(address):
+    """Whether a client address is in the local network."""
+    try:
+        ip = ipaddress.ip_address(address.split('%')[0])
+    except ValueError:
+        return False
+    ip = getattr(ip, 'ipv4_mapped', None) or ip
+    return ip.is_private or ip.is_loopback or ip.is_link_local
+
+
+def local_address():
+    """Address of this computer in the local network, to show the displays where to go."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp:
+        try:
+            # Connecting a UDP socket only picks the interface, nothing is sent
+            udp.connect(('10.255.255.255', 1))
+            return udp.getsockname()[0]
+        except OSError:
+            return '127.0.0.1'
+
+
+def plain(series):
+    """JSON compatible values of a column: whole numbers as int, missing values as None.
+
+    Places and points come as float because of teams without a place.
+    """
+    if series.dtype.kind == 'f' and (series.dropna() % 1 == 0).all():
+        series = series.astype('Int64')
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def html_cells(values, numeric):
+    """Table cells of a column, numbers right aligned; every distinct text is escaped once."""
+    if numeric:
+        return ['<td></td>' if value is None else f'<td class="n">{value}</td>' for value in values]
+    escaped = {value: f'<td>{html.escape(str(value))}</td>' for value in set(values)}
+    escaped[None] = '<td></td>'
+    return [escaped[value] for value in values]
+
+
+def html_table(header, columns):
+    """HTML table of the columns (lists of plain values): place, club and points."""
+    head = ''.join(f'<th>{html.escape(name)}</th>' for name in header)
+    cells = [html_cells(values, numeric) for values, numeric in zip(columns, (True, False, True))]
+    body = ''.join(f'<tr>{"".join(row)}</tr>' for row in zip(*cells))
+    return f'<table><tr>{head}</tr>{body}</table>'
+
+
+def html_page(title, stand, version, body):
+    return (f'<!DOCTYPE html><html lang="de"><head><meta charset="utf-8">'
+            f'<meta name="viewport" content="width=device-width, initial-scale=1">'
+            f'<title>{html.escape(title)}</title><style>{STYLE}</style></head><body>'
+            f'<h1>{html.escape(title)}</h1><div class="stand">Stand {stand}</div>{body}'
+            f'<script>const VERSION = {json.dumps(version)};{SCRIPT}</script></body></html>').encode()
+
+
+def render(version, stand, rankings, results, rules, age_groups=None):
+    """All responses of one evaluation: path -> (content type, body), ``version`` is the tag of the evaluation.
+
+    Age groups are listed in the order of ``age_groups`` (an :class:`~wettkampftools.age_groups.AgeGroups`
+    registry, the default settings if not given), not as text.
+    """
+    # Tables as lists of columns, JSON gets them as rows
+    standings = {name: [list(range(1, len(ranking) + 1)), plain(ranking[rules.club]), plain(ranking[rules.result])]
+                 for name, ranking in rankings.items()}
+
+    groups = {}
+    if results is not None and len(results):
+        if age_groups is None:
+            from wettkampftools.settings import Settings
+            age_groups = Settings().age_group_registry
+        age_group, gender = rules.group_by[0], rules.group_by[-1]
+        results = results.sort_values([*rules.group_by, rules.place], na_position='last',
+                                      key=lambda column: age_groups.sort_key(column) if column.name == age_group else column)
+        results = results.reset_index(drop=True)
+        # Converted once, the groups are consecutive slices after sorting
+        columns = [plain(results[column]) for column in (rules.place, rules.club, rules.result)]
+        for (label, gender_label), positions in results.groupby([age_group, gender], sort=False, observed=True).indices.items():
+            start, end = positions[0], positions[-1] + 1
+            groups.setdefault(str(label), {})[str(gender_label)] = [values[start:end] for values in columns]
+
+    pages = {}
+
+    def add_json(path, data):
+        pages[path] = ('application/json', json.dumps({'version': version, 'stand': stand, **data}, ensure_ascii=False).encode())
+
+    add_json('/api/standings', {'rankings': {name: list(map(list, zip(*columns))) for name, columns in standings.items()}})
+    add_json('/api/ak', {'altersklassen': list(groups)})
+    header = ['Platz', 'Gliederung', 'Punkte']
+    nav = '<nav>' + ''.join(f'<a href="/ak/{quote(label)}">{html.escape(label)}</a>' for label in groups) + '</nav>'
+    for label, genders in groups.items():
+        add_json(f'/api/ak/{label}', {'altersklasse': label, 'ergebnisse': {gender: list(map(list, zip(*columns))) for gender, columns in genders.items()}})
+        body = '<p><a href="/">Gesamtwertung</a></p>' + ''.join(f'<h2>{html.escape(gender)}</h2>{html_table(header, columns)}'
+                                                              for gender, columns in genders.items())
+        pages[f'/ak/{label}'] = ('text/html; charset=utf-8', html_page(label, stand, version, body))
+
+    body = nav + '<div class="rankings">' + ''.join(f'<div><h2>{html.escape(name)}</h2>{html_table(header, columns)}</div>'
+                                                     for name, columns in standings.items()) + '</div>'
+    pages['/'] = ('text/html; charset=utf-8', html_page('Live Ergebnisse', stand, version, body))
+    return pages
+
+
+class LiveServer:
+    """Serves the published evaluation in a background thread until :meth:`stop`."""
+    def __init__(self, host='0.0.0.0', port=DEFAULT_PORT):
+        # Versions are tagged with a token of this server, a restarted server never
+        # confirms the ETag or version a display got from the previous one
+        self.token = secrets.token_hex(8)
+        self.count = 0
+        # Version tag and its pages, replaced together. Empty pages until the first evaluation, they reload once it is published
+        self.current = (self.tag(0), render(self.tag(0), '-', {}, None, None))
+        self._changed = threading.Condition()
+        self._publishing = threading.Lock()
+        self._stopped = False
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    def tag(self, count):
+        return f'{self.token}-{count}'
+
+    @property
+    def version(self):
+        """Tag of the version currently served."""
+        return self.current[0]
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    @property
+    def url(self):
+        return f'http://{local_address()}:{self.port}/'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='live-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._changed:
+            self._stopped = True
+            self._changed.notify_all()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def publish(self, rankings, results=None, rules=None, age_groups=None):
+        """Render a new evaluation, ``results`` are the scored results of every team."""
+        if rules is None:
+            from wettkampftools.scoring import ScoringRules
+            rules = ScoringRules()
+        with self._publishing:
+            version = self.tag(self.count + 1)
+            # Requests keep getting the previous version while the new one is rendered
+            pages = render(version, f'{datetime.datetime.now():%H:%M:%S}', rankings, results, rules, age_groups)
+            with self._changed:
+                self.count += 1
+                self.current = (version, pages)
+                self._changed.notify_all()
+
+    def wait(self, version, timeout):
+        """Wait until a version other than ``version`` is published, returns the current version or None once stopped."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version or self._stopped, timeout)
+            return None if self._stopped else self.version
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                # Displays poll all day long, nothing worth logging
+                pass
+
+            def do_GET(self):
+                if not is_local(self.client_address[0]):
+                    self.send_error(403, 'Nur im lokalen Netzwerk')
+                    return
+                path = unquote(urlsplit(self.path).path).rstrip('/') or '/'
+                if path == '/events':
+                    self.stream_events()
+                    return
+                version, pages = server.current
+                if path not in pages:
+                    self.send_error(404, 'Nicht gefunden')
+                    return
+                etag = f'"{version}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                content_type, body = pages[path]
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def stream_events(self):
+                self.close_connection = True
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                version = server.version
+                message = f'retry: 3000\nevent: update\ndata: {json.dumps({"version": version})}\n\n'
+                try:
+                    while True:
+                        self.wfile.write(message.encode())
+                        self.wfile.flush()
+                        current = server.wait(version, KEEPALIVE)
+                        if current is None:
+                            return
+                        if current == version:
+                            message = ': ping\n\n'
+                        else:
+                            version = current
+                            message = f'event: update\ndata: {json.dumps({"version": version})}\n\n'
+                except (BrokenPipeError, ConnectionResetError):
+                    # The display was switched off or reloaded
+                    return
+
+        return Handler
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='wettkampftools.live_server',
+                                     description='Live Ergebnisse eines JAuswertung Exports im lokalen Netzwerk anzeigen.')
+    parser.add_argument('path', metavar='EXPORT', help='JAuswertung Export, der während des Wettkampfs aktualisiert wird')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port des Servers (Standard: {DEFAULT_PORT})')
+    parser.add_argument('--host', default='0.0.0.0', help='Adresse, an die der Server gebunden wird (Standard: alle)')
+    parser.add_argument('--einstellungen', dest='settings', metavar='JSON', help='Einstellungen aus dieser Datei laden')
+    parser.add_argument('--wertung', metavar='JSON', help='Wertungsregeln aus dieser Datei laden')
+    parser.add_argument('--intervall', type=float, default=2.0, help='Sekunden zwischen zwei Prüfungen des Exports (Standard: 2)')
+    return parser
+
+
+def main(argv=None):
+    from wettkampftools.live import LiveEvaluation
+    from wettkampftools.scoring import ScoringRules
+    from wettkampftools.settings import Settings
+
+    args = build_parser().parse_args(argv)
+    settings = Settings.from_file(args.settings) if args.settings else Settings()
+    rules = ScoringRules.from_file(args.wertung) if args.wertung else ScoringRules.from_settings(settings)
+    live = LiveEvaluation(rules)
+    try:
+        server = LiveServer(args.host, args.port).start()
+    except OSError as e:
+        print(f'Server konnte nicht gestartet werden: {e}', file=sys.stderr)
+        return 1
+    print(f'Live Ergebnisse unter {server.url} (beenden mit Strg+C)')
+
+    modified = None
+    try:
+        while True:
+            try:
+                current = os.path.getmtime(args.path)
+                if current != modified:
+                    if len(live.update(live.read(args.path))) or modified is None:
+                        server.publish(live.rankings, live.data, rules, settings.age_group_registry)
+                    modified = current
+            except Exception as e:
+                # JAuswertung is probably still writing, the next check reads it again
+                print(f'{args.path}: {e}', file=sys.stderr)
+            time.sleep(args.intervall)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
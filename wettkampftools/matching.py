@@ -0,0 +1,57 @@
+"""Approximate matching of Gliederung names.
+
+Names are folded (umlauts, ß, hyphens, punctuation) and split into
+trigrams. A :class:`TrigramIndex` keeps a posting list per trigram so the
+candidates for a name are scored with one ``bincount`` over the postings of
+its trigrams instead of comparing it with every known name.
+"""
+import re
+
+import numpy as np
+
+FOLDING = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss', 'é': 'e', 'è': 'e'})
+SEPARATORS = re.compile(r'[^a-z0-9]+')
+# 'e.V.' as a whole, a single 'v' is part of names like 'v.d.H.'
+LEGAL_FORM = re.compile(r'\be\s*\.\s*v\b')
+# Tokens that do not help telling Gliederungen apart
+STOPWORDS = {'dlrg', 'ev'}
+
+
+def fold(name):
+    """Spelling independent form of a name: 'Bad-Homburg v.d.H.' -> 'bad homburg v d h'."""
+    tokens = SEPARATORS.split(LEGAL_FORM.sub(' ', name.lower()).translate(FOLDING))
+    return ' '.join(token for token in tokens if token and token not in STOPWORDS)
+
+
+def trigrams(name):
+    padded = f'  {fold(name)} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    def __init__(self, names):
+        self.names = list(names)
+        self.sizes = np.zeros(len(self.names), dtype=int)
+        postings = {}
+        for position, name in enumerate(self.names):
+            grams = trigrams(name)
+            self.sizes[position] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(position)
+        self.postings = {gram: np.array(positions, dtype=int) for gram, positions in postings.items()}
+
+    def search(self, name, limit=5, min_score=0.4):
+        """Best matching names with their Dice score (0..1), best first."""
+        grams = trigrams(name)
+        hits = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not hits:
+            return []
+
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.names))
+        scores = 2 * shared / (self.sizes + len(grams))
+        if len(scores) > limit:
+            best = np.argpartition(-scores, limit)[:limit]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return [(self.names[position], float(scores[position])) for position in best if scores[position] >= min_score]
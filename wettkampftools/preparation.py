@@ -0,0 +1,235 @@
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+
+import pandas as pd
+
+from wettkampftools.diagnostics import Run
+from wettkampftools.export import write_tables
+from wettkampftools.gazetteer import default_cache_dir
+from wettkampftools.labels import ISC_LABELS, as_categorical, category_mask, common_dtype, concat, map_categories, unknown_labels
+
+# Exports smaller than this in total are read one after the other
+PARALLEL_MIN_BYTES = 8 * 2 ** 20
+
+# A team is identified by these columns and its position among the teams with the same values
+TEAM_KEY = ['gliederung', 'ak', 'geschlecht']
+SNAPSHOT_FILE = 'vorbereitung.pkl'
+SNAPSHOT_VERSION = 1
+# Settings the prepared registrations depend on, others like the venues or aliases need no new import
+PREPARATION_SETTINGS = ('age_groups', 'age_groups_senior_team', 'age_groups_senior_individual', 'start_age_group_wwk', 'simplify_senior_groups')
+
+
+def read_isc_export(path):
+    """Read an ISC registration export (semicolon separated CSV), the label columns as categoricals."""
+    df = pd.read_csv(path, sep=';', encoding='utf-8', dtype=dict.fromkeys(ISC_LABELS, 'category'))
+    # Remove Unnamed columns
+    return df.loc[:, ~df.columns.str.contains('^Unnamed')]
+
+
+def read_isc_exports(paths, workers=None):
+    """Read several ISC exports, in worker processes if there is enough to read.
+
+    Starting a worker costs more than reading a typical export, without
+    explicit ``workers`` the pool is only used from PARALLEL_MIN_BYTES on.
+    """
+    if workers is None and sum(os.path.getsize(path) for path in paths) < PARALLEL_MIN_BYTES:
+        workers = 1
+    if workers == 1 or len(paths) < 2:
+        return [read_isc_export(path) for path in paths]
+    with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(paths))) as executor:
+        return list(executor.map(read_isc_export, paths))
+
+
+def clean_labels(df, age_groups=None):
+    """Remove whitespace around the Gliederung and fix the spelling of 'AK', once per distinct value.
+
+    With the ``age_groups`` registry the AK get their configured spelling and
+    are recoded to its dtype in the same step, unknown AK keep their label.
+    """
+    df = df.copy()
+    # Remove unessesary whitespaces
+    df['gliederung'] = map_categories(df['gliederung'], lambda labels: labels.str.strip())
+    spelling = lambda labels: labels.str.replace(r'\bAK\b', 'AK', case=False, regex=True)
+    if age_groups is None:
+        df['ak'] = map_categories(df['ak'], spelling)
+    else:
+        df['ak'] = map_categories(df['ak'], lambda labels: labels.map(age_groups.canonical).fillna(spelling(labels)), age_groups.dtype)
+    df['geschlecht'] = as_categorical(df['geschlecht'])
+    return df
+
+
+def registration_keys(df):
+    """Hash of every registration together with how often the same row came before it in this export.
+
+    Two teams of a club in the same age group are identical rows, they stay
+    two registrations. The same team in two exports, e.g. in a later export
+    with the late registrations, gets the same key in both.
+    """
+    hashes = pd.util.hash_pandas_object(df[sorted(df.columns)], index=False).to_numpy()
+    occurrence = pd.Series(hashes).groupby(hashes).cumcount().to_numpy()
+    return pd.MultiIndex.from_arrays([hashes, occurrence])
+
+
+def merge_isc_exports(frames):
+    """Concatenate ISC exports and drop the registrations that are in more than one of them.
+
+    Returns the merged registrations and the number of duplicates dropped.
+    """
+    # Columns an export does not have can not tell registrations apart
+    columns = [column for column in frames[0].columns if all(column in frame for frame in frames[1:])]
+    frames = [clean_labels(frame[columns]) for frame in frames]
+    keys = registration_keys(frames[0]).append([registration_keys(frame) for frame in frames[1:]])
+    unique = ~keys.duplicated()
+    df = concat(frames, ISC_LABELS)[unique].reset_index(drop=True)
+    return df, int((~unique).sum())
+
+
+def prepare(df, settings):
+    """Add team names and preselect the teams that start in the wave competition.
+
+    Every step works on whole columns, no row-wise ``apply``. The label
+    columns are categoricals, they are cleaned up once per distinct value.
+    """
+    age_groups = settings.age_group_registry
+    df = clean_labels(df, age_groups)
+
+    # Number teams from same organization, age group and gender: 'Dorheim 1', 'Dorheim 2', ...
+    teams = df.groupby(['gliederung', 'ak', 'geschlecht'], sort=False, observed=True, dropna=False)['gliederung']
+    count = teams.transform('size')
+    number = teams.cumcount() + 1
+    gliederung = df['gliederung'].astype(object)
+    df['name'] = gliederung.where(count < 2, gliederung + ' ' + number.astype(str))
+
+    if settings.simplify_senior_groups:
+        # The senior teams are numbered per group but registered as one, the dtype stays the same
+        df['ak'] = map_categories(df['ak'], lambda labels: labels.map(age_groups.team_group), age_groups.dtype)
+
+    # Preselect AK that are allowed to start in wave
+    df['start_as_akw'] = category_mask(df['ak'], lambda labels: labels.map(age_groups.is_start_permit_wwk))
+    return df
+
+
+def unknown_age_groups(df, settings):
+    """AK of the prepared registrations that are not in the settings."""
+    return unknown_labels(df['ak'], settings.age_group_dtype)
+
+
+def load_competition_preperation(paths, settings, run=None, workers=None):
+    """Read one or several ISC exports and prepare them for the wave competition.
+
+    Several exports are read in parallel and merged, registrations that are
+    in more than one export are only kept once before the teams are numbered.
+    """
+    paths = [paths] if isinstance(paths, (str, os.PathLike)) else list(paths)
+    run = run or Run()
+    with run.stage('einlesen') as stage:
+        frames = read_isc_exports(paths, workers)
+        stage.rows = sum(len(frame) for frame in frames)
+    if len(frames) > 1:
+        with run.stage('zusammenfuehren') as stage:
+            df, _ = merge_isc_exports(frames)
+            stage.rows = len(df)
+    else:
+        df = frames[0]
+    with run.stage('aufbereiten') as stage:
+        df = prepare(df, settings)
+        stage.rows = len(df)
+    return df
+
+
+def team_keys(df):
+    """Stable key of every team: Gliederung, AK, gender and its position among the teams of that group.
+
+    The key does not depend on the team names, so 'Dorheim' stays the same
+    team when a late registration turns it into 'Dorheim 1' and 'Dorheim 2'.
+    """
+    position = df.groupby(TEAM_KEY, sort=False, observed=True, dropna=False).cumcount()
+    return pd.MultiIndex.from_arrays([*(df[column].astype(object) for column in TEAM_KEY), position.to_numpy()])
+
+
+def carry_selection(previous, df):
+    """Take over ``start_as_akw`` of the teams that are already in ``previous``.
+
+    Returns the frame with the selection, the number of new teams and the
+    number of teams that are not registered anymore.
+    """
+    selected = pd.Series(previous['start_as_akw'].to_numpy(), index=team_keys(previous))
+    keys = team_keys(df)
+    known = keys.isin(selected.index)
+    df = df.copy()
+    df.loc[known, 'start_as_akw'] = selected.reindex(keys[known]).to_numpy(dtype=bool)
+    return df, int((~known).sum()), int((~selected.index.isin(keys)).sum())
+
+
+def reload_competition_preperation(previous, paths, settings, run=None, workers=None):
+    """Read the ISC exports again and keep the wave selection of the teams that were already registered.
+
+    Returns the frame, the number of new teams and the number of teams that
+    are not registered anymore.
+    """
+    run = run or Run()
+    df = load_competition_preperation(paths, settings, run, workers)
+    with run.stage('auswahl_uebernehmen') as stage:
+        df, added, removed = carry_selection(previous, df)
+        stage.rows = len(df)
+    return df, added, removed
+
+
+def snapshot_path():
+    return os.path.join(default_cache_dir(), SNAPSHOT_FILE)
+
+
+def save_snapshot(df, paths, settings, path=None):
+    """Store the prepared registrations with the selection, so the next start needs no import."""
+    path = path or snapshot_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    snapshot = {'version': SNAPSHOT_VERSION, 'paths': list(paths), 'settings': asdict(settings), 'df': df}
+    # Write next to it first, a crash must not leave half a snapshot behind
+    with open(f'{path}.tmp', 'wb') as file:
+        pickle.dump(snapshot, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(f'{path}.tmp', path)
+
+
+def load_snapshot(path=None):
+    """The last snapshot as dict with 'paths', 'settings' and 'df', None if there is none."""
+    try:
+        with open(path or snapshot_path(), 'rb') as file:
+            snapshot = pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    return snapshot if snapshot.get('version') == SNAPSHOT_VERSION else None
+
+
+def settings_changed(saved, settings):
+    """Whether ``settings`` prepare the registrations differently than the ``saved`` settings of a snapshot."""
+    return any(saved.get(name) != getattr(settings, name) for name in PREPARATION_SETTINGS)
+
+
+def registrations(df, settings):
+    """Build the registration list: every team plus its AkW copy if it starts in the wave."""
+    age_groups = settings.age_group_registry
+    filtered_df = df[df['start_as_akw']].copy()
+    filtered_df['ak'] = map_categories(filtered_df['ak'], lambda labels: labels.map(age_groups.wwk_group), age_groups.dtype)
+
+    # Both parts need the same categories to stay categorical in the concatenation
+    dtype = common_dtype(filtered_df['ak'].dtype, df['ak'])
+    result_df = pd.concat([df.astype({'ak': dtype}), filtered_df.astype({'ak': dtype})])
+
+    # Reset the index of the result DataFrame
+    result_df.reset_index(drop=True, inplace=True)
+    result_df.drop(['start_as_akw'], axis=1, inplace=True)
+
+    # Sort values, ak in the order of the settings
+    result_df.sort_values(by=['ak', 'geschlecht', 'gliederung'], ascending=[True, False, False], inplace=True)
+    return result_df
+
+
+def export_registrations(df, path, settings, run=None):
+    run = run or Run()
+    with run.stage('meldungen') as stage:
+        meldungen = registrations(df, settings)
+        stage.rows = len(meldungen)
+    with run.stage('schreiben'):
+        write_tables(path, {'Meldungen': meldungen})
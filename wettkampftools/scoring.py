@@ -0,0 +1,136 @@
+"""Declarative scoring of competition results.
+
+A :class:`ScoringRules` instance describes how places are turned into points
+and how the points are summed up into club rankings. The defaults are the
+rules of the Wellenwettkampf; other competitions can load their own rules
+from a JSON file, e.g.::
+
+    {
+        "points": "table",
+        "points_table": {"1": 10, "2": 8, "3": 6, "4": 5, "5": 4},
+        "bonus": {},
+        "not_started": "zero",
+        "rankings": {"Gesamt": "\\\\bAK\\\\b"}
+    }
+"""
+import json
+import re
+from dataclasses import dataclass, field, fields
+
+import numpy as np
+import pandas as pd
+
+# Points for a place, given the place and the number of starters of its group
+POINT_FORMULAS = {
+    # Last place gets one point, every place above one more
+    'reverse_place': lambda place, starters: starters + 1 - place,
+    'place': lambda place, starters: place,
+}
+
+NOT_STARTED = ('drop', 'keep', 'zero')
+
+
+@dataclass
+class ScoringRules:
+    # Name of a formula from POINT_FORMULAS or 'table' to use points_table
+    points: str = 'reverse_place'
+    points_table: dict = field(default_factory=dict)
+    # Extra points per place
+    bonus: dict = field(default_factory=lambda: {1: 1})
+    # Teams without a place: 'drop' them before counting starters, 'keep' them
+    # without points or 'zero' to count them as starters with zero points
+    not_started: str = 'drop'
+    group_by: list = field(default_factory=lambda: ['Altersklasse', 'Geschlecht'])
+    club: str = 'Gliederung'
+    place: str = 'Platz'
+    result: str = 'Punktzahl'
+    # Club rankings: name -> pattern matched against ranking_column, first match wins
+    rankings: dict = field(default_factory=lambda: {'Rettungswettkampf': r'\bAK\b', 'Wellenwettkampf': r'\bAkW\b'})
+    ranking_column: str = 'Altersklasse'
+
+    def __post_init__(self):
+        if self.points != 'table' and self.points not in POINT_FORMULAS:
+            raise ValueError(f'Unbekannte Punkteformel: {self.points}')
+        if self.not_started not in NOT_STARTED:
+            raise ValueError(f'Unbekannte Behandlung nicht angetretener Teams: {self.not_started}')
+        # JSON only knows string keys
+        self.points_table = {int(place): points for place, points in self.points_table.items()}
+        self.bonus = {int(place): points for place, points in self.bonus.items()}
+
+    @property
+    def columns(self):
+        """Columns of the result data the rules depend on."""
+        return list(dict.fromkeys([*self.group_by, self.club, self.place, self.ranking_column]))
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(not_started='drop' if settings.drop_not_started_teams else 'keep')
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as file:
+            data = json.load(file)
+        names = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in names})
+
+
+def ranking_labels(labels, rules):
+    """Assign every row to a ranking by matching the patterns once per distinct label."""
+    labels = labels.astype('category')
+    patterns = [(name, re.compile(pattern)) for name, pattern in rules.rankings.items()]
+    lookup = np.array([next((name for name, pattern in patterns if pattern.search(str(label))), None)
+                       for label in labels.cat.categories] + [None], dtype=object)
+    # Code -1 (missing label) picks the trailing None
+    return pd.Categorical(lookup[labels.cat.codes.to_numpy()], categories=list(rules.rankings))
+
+
+def award_points(df, rules):
+    """Return a copy of the results with the points of every team in ``rules.result``."""
+    if rules.not_started == 'drop':
+        df = df.dropna(subset=[rules.place])
+    df = df.copy()
+    place = df[rules.place]
+
+    if rules.points == 'table':
+        points = place.map(rules.points_table)
+    else:
+        starters = df.groupby(rules.group_by, sort=False, observed=True)[rules.place].transform('size')
+        points = POINT_FORMULAS[rules.points](place, starters)
+
+    for bonus_place, bonus in rules.bonus.items():
+        points = points + (place == bonus_place) * bonus
+
+    if rules.not_started == 'zero':
+        points = points.fillna(0)
+    df[rules.result] = points
+    return df
+
+
+def club_totals(df, rules, by=()):
+    """Sum the points per ranking and club, optionally per additional keys ``by`` first."""
+    ranking = pd.Series(ranking_labels(df[rules.ranking_column], rules), index=df.index, name='ranking')
+    return df.groupby([*(df[key] for key in by), ranking, df[rules.club]], observed=True)[rules.result].sum()
+
+
+def rankings_from_totals(totals, rules):
+    """Turn the points per (ranking, club) into one sorted table per ranking."""
+    rankings = {}
+    for name in rules.rankings:
+        if name in totals.index.get_level_values(0):
+            ergebnis = totals.xs(name).reset_index()
+        else:
+            ergebnis = pd.DataFrame(columns=[rules.club, rules.result])
+        ergebnis = ergebnis.sort_values(by=rules.result, ascending=False).reset_index(drop=True)
+        ergebnis.index += 1
+        rankings[name] = ergebnis
+    return rankings
+
+
+def score(df, rules):
+    """Award points to every result and build the club rankings.
+
+    Returns the scored data and a dict of ranking name -> DataFrame with one
+    row per club, sorted by points and numbered from 1.
+    """
+    df = award_points(df, rules)
+    return df, rankings_from_totals(club_totals(df, rules), rules)
@@ -0,0 +1,62 @@
+import json
+from dataclasses import dataclass, field, asdict, fields
+
+from wettkampftools.age_groups import AgeGroups
+
+DEFAULT_AGE_GROUPS = ['AK 10', 'AK 12', 'AK 13/14', 'AK 15/16', 'AK 17/18', 'AK Offen']
+DEFAULT_AGE_GROUPS_SENIOR_TEAM = ['AK 100', 'AK 120', 'AK 140', 'AK 170', 'AK 200', 'AK 240', 'AK 280+']
+DEFAULT_AGE_GROUPS_SENIOR_INDIVIDUAL = ['AK 25', 'AK 30', 'AK 35', 'AK 40', 'AK 45', 'AK 50', 'AK 55', 'AK 60+']
+DEFAULT_START_AGE_GROUP_WWK = 'AK 13/14'
+# Venue name -> (latitude, longitude)
+DEFAULT_VENUES = {'Bad Nauheim': (50.367073, 8.740880)}
+
+
+@dataclass
+class Settings:
+    """Competition settings as edited on the "Einstellungen" page."""
+    age_groups: list = field(default_factory=lambda: list(DEFAULT_AGE_GROUPS))
+    age_groups_senior_team: list = field(default_factory=lambda: list(DEFAULT_AGE_GROUPS_SENIOR_TEAM))
+    age_groups_senior_individual: list = field(default_factory=lambda: list(DEFAULT_AGE_GROUPS_SENIOR_INDIVIDUAL))
+    start_age_group_wwk: str = DEFAULT_START_AGE_GROUP_WWK
+    simplify_senior_groups: bool = True
+    drop_not_started_teams: bool = True
+    venues: dict = field(default_factory=lambda: dict(DEFAULT_VENUES))
+    # ISC Gliederung name -> confirmed gazetteer name (see GazetteerIndex.key)
+    aliases: dict = field(default_factory=dict)
+
+    @property
+    def age_group_registry(self):
+        """Compiled age groups, built once for every distinct set of age group settings."""
+        return AgeGroups.from_settings(self)
+
+    @property
+    def age_groups_start_permit_wwk(self):
+        """Age groups that are allowed to start in the wave competition, in the order of the settings."""
+        return list(self.age_group_registry.start_permit_wwk)
+
+    @property
+    def age_groups_wwk(self):
+        """Wave competition (AkW) labels of the permitted age groups."""
+        return list(self.age_group_registry.wwk)
+
+    @property
+    def all_age_groups(self):
+        """Every known age group in sort order."""
+        return list(self.age_group_registry.labels)
+
+    @property
+    def age_group_dtype(self):
+        """Categorical dtype of ``all_age_groups``, shared by every frame with the same age groups."""
+        return self.age_group_registry.dtype
+
+    @classmethod
+    def from_file(cls, path):
+        """Load settings from a JSON file, missing keys fall back to the defaults."""
+        with open(path, encoding='utf-8') as file:
+            data = json.load(file)
+        names = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in names})
+
+    def to_file(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(asdict(self), file, indent=2, ensure_ascii=False)
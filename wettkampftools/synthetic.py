@@ -0,0 +1,153 @@
+"""Synthetic competition data for benchmarks.
+
+Generates ISC exports, JAuswertung workbooks and a gazetteer that look like
+the real ones, from a single club up to a national championship. The data
+is random but reproducible for a given seed::
+
+    from wettkampftools import synthetic
+    files = synthetic.generate('/tmp/wk', scale='landesverband')
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from wettkampftools import preparation
+from wettkampftools.export import write_tables
+from wettkampftools.settings import Settings
+
+# Scale -> (number of clubs, maximum teams of a club per age group and gender)
+SCALES = {
+    'ortsgruppe': (1, 3),
+    'bezirk': (20, 3),
+    'landesverband': (150, 4),
+    'bundesebene': (800, 4),
+}
+
+# The real gazetteer holds about 2000 Gliederungen
+GAZETTEER_SIZE = 2200
+
+PREFIXES = ['', '', '', 'Bad ', 'Neu', 'Alt', 'Groß-', 'Klein-']
+STEMS = ['Nau', 'Fried', 'Butz', 'Wetz', 'Gieß', 'Lich', 'Hun', 'Ober', 'Nieder', 'Rosen', 'Linden', 'Eich',
+         'Buch', 'Berg', 'Wald', 'Stein', 'Mühl', 'Sonn', 'Kirch', 'Hoch', 'Schön', 'Weiß', 'Rot', 'Grün',
+         'Frank', 'Hamm', 'Lau', 'Dorn', 'Bären', 'Fal', 'Hage', 'Kron', 'Lüt', 'Mar', 'Oster', 'Reich',
+         'Salz', 'Tann', 'Vogel', 'Wolf']
+SUFFIXES = ['heim', 'berg', 'bach', 'dorf', 'hausen', 'feld', 'burg', 'stadt', 'au', 'ingen', 'rode', 'tal',
+            'hofen', 'weiler', 'brück']
+CLUB_TYPES = ['Ortsgruppe', 'Ortsgruppe', 'Ortsgruppe', 'Ortsverband', 'Bezirk']
+GENDERS = ['weiblich', 'männlich']
+
+
+def town_names(count, rng):
+    """``count`` distinct German sounding town names."""
+    combinations = len(PREFIXES) * len(STEMS) * len(SUFFIXES)
+    if count > combinations:
+        raise ValueError(f'Höchstens {combinations} Orte möglich')
+    names = []
+    seen = set()
+    while len(names) < count:
+        prefix, stem = rng.choice(PREFIXES), rng.choice(STEMS)
+        # 'Neunauheim' but 'Bad Nauheim' and 'Groß-Nauheim'
+        stem = stem.lower() if prefix in ('Neu', 'Alt') else stem
+        name = f'{prefix}{stem}{rng.choice(SUFFIXES)}'
+        if name.lower() not in seen:
+            seen.add(name.lower())
+            names.append(name)
+    return names
+
+
+def gazetteer(towns, rng):
+    """Gld entries like the DLRG service returns them, one per town."""
+    # Spread over Germany
+    lat = rng.uniform(47.4, 54.8, len(towns))
+    lon = rng.uniform(6.0, 14.8, len(towns))
+    entries = [{'typ': 'Gld', 'lat': str(lat[i]), 'lon': str(lon[i]), 'name': town,
+                'pois': [{'name': f'{rng.choice(CLUB_TYPES)} {town} e.V.', 'x': 1}]}
+               for i, town in enumerate(towns)]
+    # The service also lists other POI types
+    entries += [{'typ': 'Wachstation', 'lat': str(lat[i]), 'lon': str(lon[i]), 'name': f'Wache {towns[i]}', 'pois': []}
+                for i in range(0, len(towns), 10)]
+    return entries
+
+
+def isc_names(towns, rng):
+    """Club names as typed in the ISC: mostly clean, some with prefix, whitespace or spelling variants."""
+    variants = []
+    for town in towns:
+        kind = rng.random()
+        if kind < 0.75:
+            variants.append(town)
+        elif kind < 0.85:
+            variants.append(f'DLRG {town} ')
+        elif kind < 0.95:
+            variants.append(town.replace('ü', 'ue').replace('ö', 'oe').replace('ä', 'ae').replace('ß', 'ss'))
+        else:
+            variants.append(f'OG {town}')
+    return variants
+
+
+def isc_export(clubs, rng, settings=None, max_teams=3):
+    """Registrations of ``clubs`` in the columns of an ISC export."""
+    settings = settings or Settings()
+    age_groups = settings.age_groups + settings.age_groups_senior_team
+    rows = []
+    for club in clubs:
+        # Not every club starts in every age group
+        for ak in rng.choice(age_groups, size=rng.integers(1, len(age_groups) + 1), replace=False):
+            for geschlecht in GENDERS:
+                for _ in range(rng.integers(0, max_teams + 1)):
+                    # Some clubs type the age group in lower case
+                    rows.append((club, ak.replace('AK', 'Ak') if rng.random() < 0.05 else ak, geschlecht))
+    df = pd.DataFrame(rows, columns=['gliederung', 'ak', 'geschlecht'])
+    # ISC exports end every line with a separator
+    df[''] = ''
+    return df
+
+
+def jauswertung(isc, rng, settings=None):
+    """'Seriendruck' and 'Daten' sheets of a JAuswertung export for the registrations in ``isc``."""
+    settings = settings or Settings()
+    df = preparation.prepare(isc.drop(columns=[''], errors='ignore'), settings)
+    df = preparation.registrations(df, settings)
+
+    daten = pd.DataFrame({
+        'Name': df['name'].to_numpy(),
+        'Gliederung': df['gliederung'].to_numpy(),
+        'Altersklasse': df['ak'].astype(str).to_numpy(),
+        'Geschlecht': df['geschlecht'].to_numpy(),
+    })
+    # Rank random scores within every age group and gender
+    daten['Punkte'] = rng.integers(100, 1000, len(daten))
+    daten['Platz'] = daten.groupby(['Altersklasse', 'Geschlecht'])['Punkte'].rank(ascending=False, method='min')
+    # Teams that did not start have no place
+    daten.loc[rng.random(len(daten)) < 0.05, 'Platz'] = np.nan
+    daten = daten[['Platz', 'Name', 'Gliederung', 'Altersklasse', 'Geschlecht', 'Punkte']]
+
+    seriendruck = daten.sample(frac=1, random_state=rng.integers(2 ** 31)).reset_index(drop=True)
+    seriendruck['Vorname'] = ''
+    return {'Seriendruck': seriendruck, 'Daten': daten}
+
+
+def generate(directory, scale='bezirk', seed=0, settings=None):
+    """Write an ISC export, a JAuswertung export and a gazetteer of the given scale.
+
+    Returns a dict with the paths of 'isc', 'jauswertung' and 'gazetteer'.
+    """
+    clubs, max_teams = SCALES[scale]
+    rng = np.random.default_rng(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    # Participating clubs are the first towns of the gazetteer
+    towns = town_names(max(GAZETTEER_SIZE, clubs), rng)
+    isc = isc_export(isc_names(towns[:clubs], rng), rng, settings, max_teams)
+    paths = {
+        'isc': os.path.join(directory, f'isc_{scale}.csv'),
+        'jauswertung': os.path.join(directory, f'jauswertung_{scale}.xlsx'),
+        'gazetteer': os.path.join(directory, f'gliederungen_{scale}.json'),
+    }
+    isc.to_csv(paths['isc'], sep=';', index=False, encoding='utf-8')
+    write_tables(paths['jauswertung'], jauswertung(isc, rng, settings))
+    with open(paths['gazetteer'], 'w', encoding='utf-8') as file:
+        json.dump(gazetteer(towns, rng), file, ensure_ascii=False)
+    return paths
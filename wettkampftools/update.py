@@ -0,0 +1,15 @@
+import requests
+
+RELEASES_URL = 'https://api.github.com/repos/joe2824/wettkampftools/releases'
+
+
+def fetch_latest_release(timeout=5):
+    """Return the tag name of the newest release or None."""
+    response = requests.get(RELEASES_URL, timeout=timeout)
+    if response.status_code != 200:
+        return None
+
+    releases = response.json()
+    if not releases:
+        return None
+    return releases[0]['tag_name']
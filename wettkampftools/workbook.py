@@ -0,0 +1,49 @@
+"""Reading JAuswertung workbooks."""
+import importlib.util
+
+import pandas as pd
+
+from wettkampftools.labels import JAUSWERTUNG_LABELS, categorize
+
+SHEETS = ('Seriendruck', 'Daten')
+
+
+def excel_engine(path):
+    """Pick the fastest installed reader for the workbook.
+
+    Legacy ``.xls`` files can only be read by xlrd. For ``.xlsx`` calamine
+    (Rust based) is used when installed, otherwise openpyxl, which pandas
+    already opens in read-only mode.
+    """
+    if str(path).lower().endswith('.xls'):
+        return 'xlrd'
+    if importlib.util.find_spec('python_calamine'):
+        return 'calamine'
+    return 'openpyxl'
+
+
+def read_sheets(path, columns):
+    """Open the workbook once and parse the given sheets.
+
+    ``columns`` maps sheet name -> column names to load, ``None`` loads every
+    column of that sheet.
+    """
+    with pd.ExcelFile(path, engine=excel_engine(path)) as workbook:
+        return {sheet: workbook.parse(sheet, usecols=None if usecols is None else usecols.__contains__)
+                for sheet, usecols in columns.items()}
+
+
+def read_jauswertung(path, daten_columns=None, daten=True):
+    """Read the 'Seriendruck' and, if requested, the 'Daten' sheet of a JAuswertung export.
+
+    The Seriendruck sheet is always loaded completely because it is handed on
+    to the mail merge as is.
+    """
+    columns = {'Seriendruck': None}
+    if daten:
+        columns['Daten'] = None if daten_columns is None else set(daten_columns)
+    sheets = read_sheets(path, columns)
+    # Grouping and sorting work on the codes of the label columns
+    for sheet in sheets.values():
+        categorize(sheet, JAUSWERTUNG_LABELS)
+    return sheets